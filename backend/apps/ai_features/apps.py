@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AiFeaturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ai_features'
+
+    def ready(self):
+        from . import llm
+        llm.configure() # One LLM backend per process, shared by all chats
@@ -0,0 +1,115 @@
+# backend/apps/ai_features/concurrency.py
+# Admission control for the async chat endpoint (AsyncGeminiChatView).
+# Under ASGI a chat awaits the upstream model without holding a worker thread, so nothing would stop a
+# burst of chats from piling thousands of upstream calls onto one process. Every chat takes a slot first:
+# - at most AI_CHAT_MAX_CONCURRENT upstream calls in flight per worker process
+# - at most AI_CHAT_MAX_CONCURRENT_PER_USER of them for one user (or one client address when anonymous)
+# Chats over a cap wait in line for up to AI_CHAT_QUEUE_TIMEOUT seconds and are then turned away
+# (429 when the user's own cap is the problem, 503 when the whole process is busy).
+# Semaphores belong to an event loop, so there is one limiter per running loop (one per uvicorn/daphne
+# worker); under WSGI every request runs in its own loop and the caps don't apply.
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+
+class ChatQueueTimeout(Exception):
+    def __init__(self, per_user):
+        super().__init__("User chat limit reached." if per_user else "Chat capacity reached.")
+        self.per_user = per_user
+
+
+class _UserSlots:
+    __slots__ = ('semaphore', 'users')
+
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0 # Chats holding or waiting for a slot; the entry is dropped when it reaches 0
+
+
+class ChatLimiter:
+    def __init__(self, max_concurrent, max_per_user, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._users = {}
+        self.in_flight = 0
+        self.waiting = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            getattr(settings, 'AI_CHAT_MAX_CONCURRENT', 50),
+            getattr(settings, 'AI_CHAT_MAX_CONCURRENT_PER_USER', 2),
+            getattr(settings, 'AI_CHAT_QUEUE_TIMEOUT', 10),
+        )
+
+    async def acquire(self, key):
+        """
+        Waits for a slot for `key`; raises ChatQueueTimeout when none frees up within queue_timeout.
+        Every successful acquire() must be followed by one release(key).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        user = self._users.get(key)
+        if user is None:
+            user = self._users[key] = _UserSlots(self.max_per_user)
+        user.users += 1
+        self.waiting += 1
+        try:
+            await self._wait(user.semaphore, self.queue_timeout, per_user=True)
+            try:
+                await self._wait(self._global, deadline - loop.time(), per_user=False)
+            except BaseException:
+                user.semaphore.release()
+                raise
+        except BaseException: # Timed out, or the client went away while queued
+            self._forget(key, user)
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    @staticmethod
+    async def _wait(semaphore, timeout, per_user):
+        if not semaphore.locked(): # Free slot: no timer needed
+            await semaphore.acquire()
+            return
+        try:
+            await asyncio.wait_for(semaphore.acquire(), max(timeout, 0))
+        except asyncio.TimeoutError: # Not the builtin TimeoutError before Python 3.11
+            raise ChatQueueTimeout(per_user) from None
+
+    def release(self, key):
+        self.in_flight -= 1
+        self._global.release()
+        user = self._users[key]
+        user.semaphore.release()
+        self._forget(key, user)
+
+    def _forget(self, key, user):
+        user.users -= 1
+        if not user.users:
+            del self._users[key]
+
+    @asynccontextmanager
+    async def slot(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+
+_limiters = weakref.WeakKeyDictionary() # Event loop -> ChatLimiter
+
+
+def get_limiter():
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = ChatLimiter.from_settings()
+    return limiter
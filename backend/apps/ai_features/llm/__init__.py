@@ -0,0 +1,57 @@
+# backend/apps/ai_features/llm/__init__.py
+# The LLM client service used by the chat views. One backend instance per process, built in
+# AiFeaturesConfig.ready() and shared by every request, so models and transport connections are reused.
+# The backend is chosen in settings, like the file processing extractors:
+#   AI_LLM_BACKEND  dotted path of an LLMBackend subclass (default: Gemini)
+#   AI_LLM_OPTIONS  keyword arguments for it, e.g. {'timeout': 30} or, for FakeBackend, {'latency': 0.5}
+# When the backend can't be built (e.g. no GEMINI_API_KEY) get_backend() returns None and the chat
+# answers 503.
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .base import LLMBackend, LLMError, NoReplyError # noqa: F401 The interface views and backends use
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'apps.ai_features.llm.gemini.GeminiBackend'
+
+_backend = None
+
+
+def load_backend():
+    backend_class = import_string(getattr(settings, 'AI_LLM_BACKEND', DEFAULT_BACKEND))
+    return backend_class(**getattr(settings, 'AI_LLM_OPTIONS', {}))
+
+
+def configure():
+    global _backend
+    try:
+        _backend = load_backend()
+    except ImproperlyConfigured as e:
+        _backend = None
+        logger.warning(f"{e} Chatbot functionality is disabled.")
+    except Exception as e:
+        _backend = None
+        logger.error(f"Critical error during LLM backend configuration: {e}", exc_info=True)
+    else:
+        logger.info(f"LLM backend '{_backend.name}' configured.")
+    return _backend
+
+
+def get_backend():
+    return _backend
+
+
+@contextmanager
+def use_backend(backend):
+    # Swaps in another backend for the duration of a block (tests, chat_loadtest)
+    global _backend
+    previous, _backend = _backend, backend
+    try:
+        yield backend
+    finally:
+        _backend = previous
@@ -0,0 +1,57 @@
+# backend/apps/ai_features/llm/base.py
+# The interface the chat views talk to. A backend is built once per process (see llm/__init__.py) with
+# the assistant's setup from prompts.py and serves every chat; `contents` are Gemini-style turns,
+# [{'role': 'user' | 'model', 'parts': [{'text': ...}]}], which other providers map to their own format.
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+
+
+class LLMError(Exception):
+    pass
+
+
+class NoReplyError(LLMError):
+    # The model answered without any text; `block_reason` is set when the safety settings blocked the prompt
+    def __init__(self, block_reason=None):
+        super().__init__(f"Content was blocked ({block_reason})." if block_reason else "The model returned no text.")
+        self.block_reason = block_reason
+
+
+class LLMBackend(ABC):
+    """
+    Base class of the LLM backends. Subclasses implement generate() and stream(); the async variants
+    default to running those in a worker thread and should be overridden by backends with a native
+    async client, so awaiting a reply holds no thread.
+    Methods raise NoReplyError when there is no reply text and LLMError (or the provider's own
+    exceptions) when the call fails.
+    """
+    name = None
+
+    @abstractmethod
+    def generate(self, contents):
+        # The complete reply text
+        ...
+
+    @abstractmethod
+    def stream(self, contents):
+        # Iterator of reply text pieces, as the provider produces them
+        ...
+
+    async def agenerate(self, contents):
+        return await sync_to_async(self.generate, thread_sensitive=False)(contents)
+
+    async def astream(self, contents):
+        pieces = iter(await sync_to_async(self.stream, thread_sensitive=False)(contents))
+        next_piece = sync_to_async(next, thread_sensitive=False)
+        done = object()
+        while (piece := await next_piece(pieces, done)) is not done:
+            yield piece
+
+
+def last_user_text(contents):
+    # Last text part of the latest user turn: the question itself (context parts come before it)
+    for turn in reversed(contents):
+        if turn.get('role') == 'user' and turn.get('parts'):
+            return turn['parts'][-1].get('text', '')
+    return ''
@@ -0,0 +1,59 @@
+# backend/apps/ai_features/llm/fake.py
+# Deterministic local backend: no network and no API key, for development, tests and latency benchmarks.
+#   AI_LLM_BACKEND = 'apps.ai_features.llm.fake.FakeBackend'
+#   AI_LLM_OPTIONS = {'latency': 0.8, 'chunk_delay': 0.05}
+# The reply depends only on the question. `latency` is the time to the first text (what the user waits
+# for), `chunk_delay` the time between streamed pieces of `chunk_size` characters.
+import asyncio
+import time
+
+from .base import LLMBackend, last_user_text
+
+QUESTION_PREFIX = "User's current question: " # Added to the question by build_chat_contents()
+
+
+class FakeBackend(LLMBackend):
+    name = 'fake'
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, chunk_size=20, reply=None):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_size = max(1, chunk_size)
+        self.reply = reply # Fixed reply instead of the question-based one
+        self.calls = 0
+
+    def reply_for(self, contents):
+        if self.reply is not None:
+            return self.reply
+        question = last_user_text(contents).removeprefix(QUESTION_PREFIX)
+        return f"This is a local test reply to: {question}"
+
+    def pieces(self, contents):
+        text = self.reply_for(contents)
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def generate(self, contents):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.reply_for(contents)
+
+    def stream(self, contents):
+        self.calls += 1
+        time.sleep(self.latency)
+        for i, piece in enumerate(self.pieces(contents)):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield piece
+
+    async def agenerate(self, contents):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self.reply_for(contents)
+
+    async def astream(self, contents):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        for i, piece in enumerate(self.pieces(contents)):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            yield piece
@@ -0,0 +1,97 @@
+# backend/apps/ai_features/llm/gemini.py
+# Google Gemini through the google-generativeai SDK.
+# The SDK is configured and the GenerativeModel built once per process: the (long) system instruction is
+# converted once instead of on every chat, and all calls share the SDK's clients and their gRPC channels.
+# The SDK's async client (and its gRPC channel) belongs to the event loop it is first used on: the server's
+# loop under ASGI. Under WSGI or runserver every async view call runs in a new, short-lived loop, so async
+# calls from any other loop use the blocking client in a worker thread instead of a dead channel.
+import asyncio
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import google.generativeai as genai
+except ImportError: # Only needed when this backend is selected
+    genai = None
+
+from ..prompts import CODENEST_SYSTEM_INSTRUCTION, GENERATION_CONFIG, SAFETY_SETTINGS
+from .base import LLMBackend, NoReplyError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-1.5-flash-latest" # Or "gemini-1.5-pro-latest"
+
+
+def _block_reason(response):
+    feedback = getattr(response, 'prompt_feedback', None)
+    if feedback and feedback.block_reason:
+        return feedback.block_reason.name
+    return None
+
+
+def _reply_text(response):
+    if not response.candidates or not response.candidates[0].content.parts:
+        logger.error(f"Gemini API returned no valid candidates. Raw response: {response}. Feedback: {response.prompt_feedback}")
+        raise NoReplyError(_block_reason(response))
+    return response.candidates[0].content.parts[0].text
+
+
+def _chunk_text(chunk):
+    # Text of one streamed response; chunk.text raises when a chunk has no parts
+    # (e.g. the final chunk carrying only the finish reason)
+    block_reason = _block_reason(chunk)
+    if block_reason:
+        raise NoReplyError(block_reason)
+    if not chunk.candidates:
+        return ''
+    return ''.join(getattr(part, 'text', '') for part in chunk.candidates[0].content.parts)
+
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+
+    def __init__(self, api_key=None, model_name=DEFAULT_MODEL, system_instruction=CODENEST_SYSTEM_INSTRUCTION,
+                 generation_config=GENERATION_CONFIG, safety_settings=SAFETY_SETTINGS, timeout=None):
+        if genai is None:
+            raise ImproperlyConfigured("The Gemini backend needs the google-generativeai package.")
+        api_key = api_key or getattr(settings, 'GEMINI_API_KEY', None)
+        if not api_key:
+            raise ImproperlyConfigured("GEMINI_API_KEY not found in settings.")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=system_instruction,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+        )
+        self.request_options = {'timeout': timeout} if timeout else None # Seconds per upstream call
+        self._async_loop = None # The loop the SDK's async client is bound to
+
+    def _owns_async_client(self):
+        loop = asyncio.get_running_loop()
+        if self._async_loop is None:
+            self._async_loop = loop
+        return loop is self._async_loop
+
+    def generate(self, contents):
+        return _reply_text(self.model.generate_content(contents, request_options=self.request_options))
+
+    def stream(self, contents):
+        for chunk in self.model.generate_content(contents, stream=True, request_options=self.request_options):
+            yield _chunk_text(chunk)
+
+    async def agenerate(self, contents):
+        if not self._owns_async_client():
+            return await super().agenerate(contents)
+        return _reply_text(await self.model.generate_content_async(contents, request_options=self.request_options))
+
+    async def astream(self, contents):
+        if not self._owns_async_client():
+            async for piece in super().astream(contents):
+                yield piece
+            return
+        response = await self.model.generate_content_async(contents, stream=True, request_options=self.request_options)
+        async for chunk in response:
+            yield _chunk_text(chunk)
@@ -0,0 +1,143 @@
+# backend/apps/ai_features/loadtesting.py
+# Helpers for the chat_loadtest command: a local fake model server and an LLM backend that calls it.
+# The Gemini SDK's async client only talks gRPC over TLS to Google, so it can't be pointed at a local
+# server. FakeServerBackend is swapped in as the LLM backend instead and makes a real HTTP round trip over
+# a socket to FakeModelServer, which answers after a fixed latency. The chat path under test (admission,
+# awaiting the upstream call, building the response) is the real one; only the far end is fake.
+import asyncio
+import http.client
+import json
+import time
+
+from django.test import AsyncClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .llm import LLMBackend
+
+
+class FakeModelServer:
+    """
+    Minimal HTTP/1.1 server on 127.0.0.1 that answers every POST after `latency` seconds with
+    {"text": ...}. Tracks how many requests it is working on at once (`peak`).
+    """
+    def __init__(self, latency=0.5, reply="Hello from the fake model."):
+        self.latency = latency
+        self.reply = reply
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self._server = None
+        self.port = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            headers = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in headers.decode('latin-1').split('\r\n'):
+                name, _, value = line.partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            await asyncio.sleep(self.latency)
+            body = json.dumps({'text': self.reply}).encode()
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                b'Content-Length: %d\r\nConnection: close\r\n\r\n%s' % (len(body), body)
+            )
+            await writer.drain()
+        finally:
+            self.in_flight -= 1
+            writer.close()
+
+
+class FakeServerBackend(LLMBackend):
+    """
+    LLM backend that posts the contents to the FakeModelServer on `port` over a new connection per call
+    and returns its text. The load test drives the async chat endpoint; the sync methods serve
+    GeminiChatView if the backend is installed outside of it.
+    """
+    name = 'fake-server'
+
+    def __init__(self, port):
+        self.port = port
+
+    async def agenerate(self, contents):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            body = json.dumps({'contents': contents}).encode()
+            writer.write(
+                b'POST /generate HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n'
+                b'Content-Length: %d\r\nConnection: close\r\n\r\n%s' % (len(body), body)
+            )
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        return json.loads(raw.partition(b'\r\n\r\n')[2])['text']
+
+    async def astream(self, contents):
+        yield await self.agenerate(contents)
+
+    def generate(self, contents):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        try:
+            connection.request(
+                'POST', '/generate', json.dumps({'contents': contents}), {'Content-Type': 'application/json'}
+            )
+            return json.loads(connection.getresponse().read())['text']
+        finally:
+            connection.close()
+
+    def stream(self, contents):
+        yield self.generate(contents)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def user_authorization(user_id):
+    # Authorization header of a signed-in user; the chat view only validates the token, so no user row is needed
+    token = AccessToken()
+    token[jwt_settings.USER_ID_CLAIM] = user_id
+    return f'Bearer {token}'
+
+
+async def run_chats(path, total, concurrency, users):
+    """
+    Sends `total` chats through Django's ASGI request handling, `concurrency` at a time, from `users`
+    distinct signed-in users (the per-user cap's key).
+    Returns (wall time, [(status code, latency)]).
+    """
+    client = AsyncClient(raise_request_exception=False)
+    authorizations = [user_authorization(f'loadtest-{i}') for i in range(users)]
+    results = []
+    queue = iter(range(total)) # Shared by the workers; next() never awaits, so each chat is sent once
+
+    async def worker():
+        for i in queue:
+            started = time.perf_counter()
+            response = await client.post(
+                path, {'message': f'Chat {i}', 'history': []}, content_type='application/json',
+                headers={'Authorization': authorizations[i % users]},
+            )
+            results.append((response.status_code, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, results
@@ -0,0 +1,68 @@
+# backend/apps/ai_features/management/commands/chat_loadtest.py
+import asyncio
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.ai_features import llm, loadtesting
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the async chat endpoint: many concurrent chats go through Django's ASGI request handling "
+        "to a local fake model server with a fixed latency. Reports throughput, latency percentiles, "
+        "turned-away chats and the peak number of upstream calls in flight. Nothing is sent to Gemini."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=200, help="Chats in progress at once.")
+        parser.add_argument('--chats', type=int, default=None, help="Chats to send (default: 5 x concurrency).")
+        parser.add_argument('--users', type=int, default=None, help="Distinct users (default: one per concurrent chat).")
+        parser.add_argument('--latency', type=float, default=0.5, help="Seconds the fake model takes per reply.")
+        parser.add_argument('--max-concurrent', type=int, default=None, help="Overrides AI_CHAT_MAX_CONCURRENT.")
+        parser.add_argument('--max-per-user', type=int, default=None, help="Overrides AI_CHAT_MAX_CONCURRENT_PER_USER.")
+        parser.add_argument('--queue-timeout', type=float, default=None, help="Overrides AI_CHAT_QUEUE_TIMEOUT.")
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        chats = options['chats'] or concurrency * 5
+        users = options['users'] or concurrency
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'], # The host Django's test client sends
+        }
+        for option, setting in [('max_concurrent', 'AI_CHAT_MAX_CONCURRENT'),
+                                ('max_per_user', 'AI_CHAT_MAX_CONCURRENT_PER_USER'),
+                                ('queue_timeout', 'AI_CHAT_QUEUE_TIMEOUT')]:
+            if options[option] is not None:
+                overrides[setting] = options[option]
+        with override_settings(**overrides):
+            server, wall_time, results = asyncio.run(self._run(chats, concurrency, users, options['latency']))
+
+        statuses = Counter(code for code, _ in results)
+        latencies = sorted(latency for code, latency in results if code == 200)
+        self.stdout.write(
+            f"{chats} chats, {concurrency} concurrent, {users} user(s), fake model latency {options['latency']:.3f}s"
+        )
+        self.stdout.write("Responses: " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+        self.stdout.write(f"Wall time: {wall_time:.2f}s, throughput: {statuses[200] / wall_time:.1f} chats/s")
+        self.stdout.write(
+            "Latency of answered chats (ms): "
+            + ", ".join(f"p{int(fraction * 100)} {loadtesting.percentile(latencies, fraction) * 1000:.0f}"
+                        for fraction in (0.5, 0.95, 0.99))
+            + f", max {(latencies[-1] if latencies else 0) * 1000:.0f}"
+        )
+        self.stdout.write(f"Upstream calls: {server.requests}, peak in flight: {server.peak}")
+
+    async def _run(self, chats, concurrency, users, latency):
+        server = await loadtesting.FakeModelServer(latency).start()
+        try:
+            with llm.use_backend(loadtesting.FakeServerBackend(server.port)):
+                wall_time, results = await loadtesting.run_chats(reverse('gemini_chat_async'), chats, concurrency, users)
+        finally:
+            await server.stop()
+        return server, wall_time, results
@@ -0,0 +1,188 @@
+# backend/apps/ai_features/streaming.py
+# Server-Sent Events for the chat: the reply is forwarded piece by piece while the model generates it,
+# instead of after the whole reply (up to max_output_tokens) is ready.
+# Clients ask for it with `Accept: text/event-stream` and receive:
+#   event: delta   data: {"text": "..."}    appended to the reply, in order
+#   event: done    data: {"reply": "..."}   the complete reply, once
+#   event: error   data: {"error": "..."}   instead of `done` when generation fails
+# The model splits its output wherever it likes, so a @@LINK[text](url)@@ marker can straddle two pieces.
+# LinkSafeBuffer holds back a marker (or what may be the beginning of one) until it is complete, so every
+# delta carries whole markers and the client can render the accumulated text at any point.
+import asyncio
+import json
+import logging
+import re
+
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+
+from .llm import NoReplyError
+
+logger = logging.getLogger(__name__)
+
+MARKER_START = '@@LINK['
+MAX_MARKER_CHARS = 1000 # A "marker" still unclosed after this many characters is let through as text
+_MARKER_RE = re.compile(r'@@LINK\[.*?\]\(.*?\)@@', re.S) # Same pattern the chat UI renders
+
+GENERIC_ERROR = "An unexpected error occurred while communicating with the AI assistant."
+NO_REPLY_ERROR = "The AI assistant could not generate a response at this time."
+STREAM_OPEN = b': stream open\n\n' # Sends the headers straight away; comments are ignored by SSE clients
+
+
+def sse_event(event, data):
+    # One SSE frame; the JSON payload has no raw newlines, so it fits on a single data: line
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    # Lets DRF accept `Accept: text/event-stream`; the view streams its own frames, so a plain Response
+    # rendered here is an error raised before streaming started and becomes a single `error` event
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        error = data.get('error', data.get('detail', data)) if isinstance(data, dict) else data
+        return sse_event('error', {'error': error})
+
+
+class LinkSafeBuffer:
+    """
+    Splits streamed text into pieces that never cut a @@LINK[...](...)@@ marker in two.
+    feed() returns the text that is safe to send now; flush() returns whatever is left at the end.
+    """
+    def __init__(self):
+        self._pending = ''
+
+    def feed(self, text):
+        self._pending += text
+        safe, self._pending = split_at_open_marker(self._pending)
+        return safe
+
+    def flush(self):
+        rest, self._pending = self._pending, ''
+        return rest
+
+
+def split_at_open_marker(text):
+    # (text that can be sent, held back tail): the tail is an unfinished marker or a partial MARKER_START
+    pos = 0
+    while True:
+        start = text.find(MARKER_START, pos)
+        if start == -1:
+            break
+        match = _MARKER_RE.match(text, start)
+        if match is not None:
+            pos = match.end()
+        elif len(text) - start > MAX_MARKER_CHARS:
+            pos = start + 1 # Malformed; don't stall the stream on it
+        else:
+            return text[:start], text[start:]
+    for size in range(min(len(MARKER_START) - 1, len(text) - pos), 0, -1):
+        if text.endswith(MARKER_START[:size]):
+            return text[:-size], text[-size:]
+    return text, ''
+
+
+def no_reply_message(error):
+    # What the user sees for a NoReplyError
+    if error.block_reason:
+        return f"{NO_REPLY_ERROR} Reason: Content was blocked ({error.block_reason})."
+    return NO_REPLY_ERROR
+
+
+class _ReplyEvents:
+    # Frames for one streamed reply, shared by the sync and async generators below
+    def __init__(self):
+        self.buffer, self.reply = LinkSafeBuffer(), []
+
+    def piece(self, text):
+        self.reply.append(text)
+        safe = self.buffer.feed(text)
+        return [sse_event('delta', {'text': safe})] if safe else []
+
+    def failed(self, e):
+        if isinstance(e, NoReplyError):
+            return [sse_event('error', {'error': no_reply_message(e)})]
+        logger.error(f"Error while streaming the chat reply: {e}", exc_info=True)
+        return [sse_event('error', {'error': GENERIC_ERROR})]
+
+    def end(self):
+        rest = self.buffer.flush()
+        frames = [sse_event('delta', {'text': rest})] if rest else []
+        reply = ''.join(self.reply)
+        if not reply:
+            logger.error("The LLM backend streamed no text for the chat reply.")
+            return frames + [sse_event('error', {'error': NO_REPLY_ERROR})]
+        return frames + [sse_event('done', {'reply': reply})]
+
+
+def iter_reply_events(pieces):
+    """
+    SSE frames for an iterator of reply text pieces (LLMBackend.stream()): deltas as text arrives, then `done`.
+    Errors (including a prompt blocked by the safety settings) end the stream with an `error` event.
+    """
+    yield STREAM_OPEN
+    events = _ReplyEvents()
+    try:
+        for text in pieces:
+            yield from events.piece(text)
+    except Exception as e:
+        yield from events.failed(e)
+        return
+    yield from events.end()
+
+
+async def aiter_reply_events(pieces):
+    # iter_reply_events() for an async iterator of pieces (LLMBackend.astream(), the async chat view)
+    yield STREAM_OPEN
+    events = _ReplyEvents()
+    try:
+        async for text in pieces:
+            for frame in events.piece(text):
+                yield frame
+    except Exception as e:
+        for frame in events.failed(e):
+            yield frame
+        return
+    for frame in events.end():
+        yield frame
+
+
+class ClosingEvents:
+    """
+    Async iterable of SSE frames that runs `on_close` once when the stream is over: finished, failed,
+    or dropped by a client that went away, even before the first frame. StreamingHttpResponse calls
+    close() when the response is closed, possibly from a worker thread, so `on_close` is handed to the
+    event loop the stream was created on.
+    """
+    def __init__(self, frames, on_close):
+        self._frames = frames
+        self._on_close = on_close
+        self._loop = asyncio.get_running_loop()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        try:
+            async for frame in self._frames:
+                yield frame
+        finally:
+            self.close()
+
+    def close(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(on_close)
+        except RuntimeError: # The loop is gone, and the semaphores with it
+            pass
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # nginx would otherwise buffer the whole reply
+    return response
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import concurrency, llm, streaming
+from .llm.fake import FakeBackend
+from .llm.gemini import GeminiBackend
+
+
+def gemini_response(text=None, block_reason=None):
+    # The parts of a GenerateContentResponse the Gemini backend reads
+    feedback = SimpleNamespace(block_reason=SimpleNamespace(name=block_reason)) if block_reason else None
+    parts = [SimpleNamespace(text=text)] if text is not None else []
+    return SimpleNamespace(prompt_feedback=feedback, candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))])
+
+
+class FailingBackend(FakeBackend):
+    # Streams the start of the reply, then loses the upstream connection
+    def stream(self, contents):
+        yield 'Partial'
+        raise ConnectionResetError('upstream reset')
+
+
+def parse_events(body):
+    events = []
+    for frame in body.decode().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in frame.splitlines() if not line.startswith(':'))
+        if lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class LinkSafeBufferTests(SimpleTestCase):
+    TEXT = 'See the @@LINK[Academic Calendar](http://testserver/media/guides/cal.pdf)@@ or @@LINK[upload](/projects/create)@@.'
+
+    def test_markers_are_never_split(self):
+        for size in range(1, 12):
+            buffer, pieces = streaming.LinkSafeBuffer(), []
+            for start in range(0, len(self.TEXT), size):
+                pieces.append(buffer.feed(self.TEXT[start:start + size]))
+            pieces.append(buffer.flush())
+            self.assertEqual(''.join(pieces), self.TEXT)
+            for piece in pieces:
+                self.assertEqual(piece.count('@@LINK['), piece.count(')@@'), piece)
+
+    def test_plain_text_passes_straight_through(self):
+        buffer = streaming.LinkSafeBuffer()
+        self.assertEqual(buffer.feed('Hello, world'), 'Hello, world')
+        self.assertEqual(buffer.feed(' mail me @'), ' mail me ') # Could be the start of a marker
+        self.assertEqual(buffer.feed('x'), '@x')
+
+
+class GeminiChatViewTests(TestCase):
+    REPLY = 'Check the @@LINK[Academic Calendar](/media/cal.pdf)@@ for dates.'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _chat(self, data, backend, stream=True):
+        with llm.use_backend(backend):
+            response = self.client.post(
+                '/api/ai/chat/gemini/', data, format='json', **({'HTTP_ACCEPT': 'text/event-stream'} if stream else {})
+            )
+            if response.streaming:
+                response.content_events = parse_events(b''.join(response.streaming_content))
+        return response
+
+    def test_reply_is_streamed_as_events(self):
+        response = self._chat({'message': 'When do classes start?'}, FakeBackend(reply=self.REPLY, chunk_size=7))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.content_events
+        self.assertEqual(events[-1], ('done', {'reply': self.REPLY}))
+        deltas = [data['text'] for event, data in events[:-1]]
+        self.assertEqual(''.join(deltas), self.REPLY)
+        self.assertIn('@@LINK[Academic Calendar](/media/cal.pdf)@@ fo', deltas) # Held back, then sent whole
+
+    def test_errors_become_error_events(self):
+        response = self._chat({}, FakeBackend())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(parse_events(response.content), [('error', {'error': 'Message content is required.'})])
+
+        response = self._chat({'message': 'Hi'}, FailingBackend())
+        self.assertEqual(response.content_events[-1], ('error', {'error': streaming.GENERIC_ERROR}))
+
+        response = self._chat({'message': 'Hi'}, None)
+        self.assertEqual(response.status_code, 503)
+
+    def test_json_reply(self):
+        response = self._chat({'message': 'Hi'}, FakeBackend(), stream=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'reply': 'This is a local test reply to: Hi'})
+
+        blocked = FakeBackend()
+        blocked.generate = mock.Mock(side_effect=llm.NoReplyError('SAFETY'))
+        response = self._chat({'message': 'Hi'}, blocked, stream=False)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Content was blocked (SAFETY)', response.json()['error'])
+
+
+class LLMBackendTests(SimpleTestCase):
+    @mock.patch('apps.ai_features.llm.gemini.genai')
+    def test_gemini_model_is_built_once(self, genai):
+        model = genai.GenerativeModel.return_value
+        model.generate_content.return_value = gemini_response('Hello!')
+        backend = GeminiBackend(api_key='test-key')
+        self.assertEqual(backend.generate([]), 'Hello!')
+        self.assertEqual(backend.generate([]), 'Hello!')
+        genai.configure.assert_called_once_with(api_key='test-key')
+        genai.GenerativeModel.assert_called_once()
+
+        model.generate_content.return_value = iter([gemini_response('Hel'), gemini_response('lo'), gemini_response()])
+        self.assertEqual(list(backend.stream([])), ['Hel', 'lo', ''])
+        model.generate_content.return_value = iter([gemini_response(block_reason='SAFETY')])
+        with self.assertRaises(llm.NoReplyError) as cm:
+            list(backend.stream([]))
+        self.assertEqual(cm.exception.block_reason, 'SAFETY')
+
+    @mock.patch('apps.ai_features.llm.gemini.genai')
+    def test_gemini_async_client_stays_on_its_loop(self, genai):
+        # Under WSGI each async view call runs in a new loop; only the first loop's calls use the async client
+        model = genai.GenerativeModel.return_value
+        model.generate_content_async = mock.AsyncMock(return_value=gemini_response('async'))
+        model.generate_content.return_value = gemini_response('threaded')
+        backend = GeminiBackend(api_key='test-key')
+
+        async def chat_twice():
+            return [await backend.agenerate([]), await backend.agenerate([])]
+
+        self.assertEqual(asyncio.run(chat_twice()), ['async', 'async'])
+        self.assertEqual(asyncio.run(chat_twice()), ['threaded', 'threaded'])
+        self.assertEqual(model.generate_content_async.await_count, 2)
+
+    @override_settings(AI_LLM_BACKEND='apps.ai_features.llm.fake.FakeBackend', AI_LLM_OPTIONS={'chunk_size': 4})
+    def test_backend_comes_from_settings(self):
+        backend = llm.load_backend()
+        self.assertIsInstance(backend, FakeBackend)
+        contents = [{'role': 'user', 'parts': [{'text': "User's current question: Hi"}]}]
+        self.assertEqual(list(backend.stream(contents)), ['This', ' is ', 'a lo', 'cal ', 'test', ' rep', 'ly t', 'o: H', 'i'])
+        self.assertEqual(backend.generate(contents), backend.generate(contents)) # Deterministic
+
+    @override_settings(AI_LLM_BACKEND='apps.ai_features.llm.gemini.GeminiBackend', AI_LLM_OPTIONS={}, GEMINI_API_KEY='')
+    def test_unconfigured_backend_disables_the_chat(self):
+        with llm.use_backend(FakeBackend()), self.assertLogs('apps.ai_features.llm', 'WARNING'):
+            self.assertIsNone(llm.configure())
+            self.assertIsNone(llm.get_backend())
+
+
+class ChatLimiterTests(SimpleTestCase):
+    async def test_caps_and_queue_timeout(self):
+        limiter = concurrency.ChatLimiter(max_concurrent=2, max_per_user=1, queue_timeout=0.05)
+        await limiter.acquire('a')
+        with self.assertRaises(concurrency.ChatQueueTimeout) as cm:
+            await limiter.acquire('a') # Over the user's own cap
+        self.assertTrue(cm.exception.per_user)
+        await limiter.acquire('b')
+        with self.assertRaises(concurrency.ChatQueueTimeout) as cm:
+            await limiter.acquire('c') # Over the global cap
+        self.assertFalse(cm.exception.per_user)
+
+        # A queued chat gets the slot as soon as one is released
+        waiting = asyncio.ensure_future(limiter.acquire('c'))
+        await asyncio.sleep(0)
+        limiter.release('a')
+        await waiting
+        self.assertEqual(limiter.in_flight, 2)
+        limiter.release('b')
+        limiter.release('c')
+        self.assertEqual((limiter.in_flight, limiter.waiting, limiter._users), (0, 0, {}))
+
+
+class AsyncGeminiChatViewTests(SimpleTestCase):
+    async def test_json_and_streamed_replies(self):
+        client = AsyncClient()
+        with llm.use_backend(FakeBackend(reply='See @@LINK[the guide](/guide)@@.', chunk_size=10)):
+            response = await client.post('/api/ai/chat/gemini/async/', {'message': 'Hi'}, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'reply': 'See @@LINK[the guide](/guide)@@.'})
+
+            response = await client.post(
+                '/api/ai/chat/gemini/async/', {'message': 'Hi'}, content_type='application/json',
+                headers={'Accept': 'text/event-stream'},
+            )
+            body = b''.join([frame async for frame in response.streaming_content])
+        self.assertEqual(parse_events(body), [
+            ('delta', {'text': 'See '}),
+            ('delta', {'text': '@@LINK[the guide](/guide)@@.'}),
+            ('done', {'reply': 'See @@LINK[the guide](/guide)@@.'}),
+        ])
+        await asyncio.sleep(0) # The slot is released on the loop once the stream is closed
+        self.assertEqual(concurrency.get_limiter().in_flight, 0)
+
+    @override_settings(AI_CHAT_MAX_CONCURRENT_PER_USER=1, AI_CHAT_QUEUE_TIMEOUT=0.05)
+    async def test_user_over_the_cap_is_turned_away(self):
+        client = AsyncClient()
+        with llm.use_backend(FakeBackend(latency=0.3)):
+            first = asyncio.ensure_future(
+                client.post('/api/ai/chat/gemini/async/', {'message': 'One'}, content_type='application/json')
+            )
+            await asyncio.sleep(0.1)
+            second = await client.post('/api/ai/chat/gemini/async/', {'message': 'Two'}, content_type='application/json')
+            self.assertEqual(second.status_code, 429)
+            self.assertIn('Retry-After', second)
+            self.assertEqual((await first).status_code, 200)
+
+    async def test_bad_requests(self):
+        client = AsyncClient()
+        with llm.use_backend(FakeBackend()):
+            response = await client.post('/api/ai/chat/gemini/async/', {}, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            response = await client.post(
+                '/api/ai/chat/gemini/async/', {'message': 'Hi'}, content_type='application/json',
+                headers={'Authorization': 'Bearer not-a-token'},
+            )
+            self.assertEqual(response.status_code, 401)
+
+
+class ChatLoadTestCommandTests(SimpleTestCase):
+    def test_all_chats_answered_within_the_caps(self):
+        out = io.StringIO()
+        call_command('chat_loadtest', concurrency=20, chats=40, latency=0.01, max_concurrent=5, stdout=out)
+        output = out.getvalue()
+        self.assertIn('Responses: 200: 40', output)
+        self.assertRegex(output, r'Upstream calls: 40, peak in flight: [1-5]\n')
+
+    def test_chats_count_against_their_user(self):
+        out = io.StringIO()
+        call_command('chat_loadtest', concurrency=10, chats=10, users=2, latency=0.2, max_per_user=1,
+                     queue_timeout=0.05, stdout=out)
+        self.assertRegex(out.getvalue(), r'Responses: 200: 2, 429: 8\n')
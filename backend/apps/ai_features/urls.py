@@ -1,7 +1,8 @@
 # backend/apps/ai_features/urls.py
 from django.urls import path
-from .views import GeminiChatView
+from .views import AsyncGeminiChatView, GeminiChatView
 
 urlpatterns = [
     path('chat/gemini/', GeminiChatView.as_view(), name='gemini_chat'),
-]
\ No newline at end of file
+    path('chat/gemini/async/', AsyncGeminiChatView.as_view(), name='gemini_chat_async'), # For ASGI deployments
+]
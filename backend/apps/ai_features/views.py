@@ -1,12 +1,24 @@
 # backend/apps/ai_features/views.py
+import functools
+import json
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-import google.generativeai as genai
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from codenest_core.renderers import API_PARSER_CLASSES, API_RENDERER_CLASSES
 import logging
 import re # For cleaning history
 from django.contrib.sites.models import Site # To get current site domain for full URLs (optional for production)
+from . import concurrency, llm, streaming
 
 # Assuming your knowledge base is in the same app
 # If it's in a different app, adjust the import path.
@@ -50,315 +62,6 @@ DOCUMENT_INFO = {
 
 logger = logging.getLogger(__name__)
 
-# Configure the Gemini client
-# This should ideally happen once when the Django app starts.
-# For example, in your apps/ai_features/apps.py in the AppConfig's ready() method.
-# For simplicity here, we check and configure if not already done.
-SDK_CONFIGURED_SUCCESSFULLY = False
-if settings.GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        SDK_CONFIGURED_SUCCESSFULLY = True # Assume success if configure doesn't raise immediate error
-        logger.info("Gemini SDK configured with API key.")
-    except Exception as e:
-        logger.error(f"Critical error during Gemini SDK configuration: {e}", exc_info=True)
-        # SDK_CONFIGURED_SUCCESSFULLY remains False
-else:
-    logger.warning("GEMINI_API_KEY not found in settings. Chatbot functionality will be severely impaired or disabled.")
-
-
-# Define generation config and safety settings
-GENERATION_CONFIG = {
-    "temperature": 0.7,
-    "top_p": 1,
-    "top_k": 1,
-    "max_output_tokens": 2048,
-}
-
-SAFETY_SETTINGS = [
-    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-]
-
-# General System Instruction for CodeNest AI
-CODENEST_SYSTEM_INSTRUCTION = """You are CodeNest AI, a friendly and helpful assistant for a university collaboration and publication platform named CodeNest.
-CodeNest allows users (students, lecturers, advisors) to upload, share, and discover academic and technical projects, including code, AutoCAD files, research papers, and books.
-Key features include project creation, project exploration, user profiles, commenting, and rating.
-Your primary goal is to assist users with questions about using CodeNest, finding information, and general academic/technical queries related to the platform's purpose.
-Be concise, polite, and informative.
-If asked about specific user data, private project details, or anything beyond your scope, politely state that you cannot access that information.
-here is the information about the academic calendar and curriculum for the 2024-2025 academic year:
-RAUF DENKTAS UNIVERSITY
-ACADEMIC CALENDAR
-
-1 August - 20 September 2024
-
-FALL SEMESTER
-New student application process
-
-2 - 6 September 2024
-
-Period for entering courses to be offered in Fall 2024-2025
-
-9 September - 11 October 2024
-
-Orientation program for new students
-
-11 September – 20 September 2024
-
-Online course registration period for registered students
-
-11 September - 4 October 2024
-
-English Placement and Proficiency Test
-
-15 September 2024
-
-Mawlid (Mevlid Kandili)
-
-16 - 20 September 2024
-
-Course registration with the approval of the advisor
-
-4 October 2024
-
-Classes commence
-First day for late registration
-Last day to apply for change of program
-Last day to apply for course exemptions
-Last day for submission of grade change to the registrar
-
-7 October 2024
-
-Academic year Opening Ceremony
-
-11 October 2024
-
-Last day for late registration
-
-11 October 2024
-
-Last day for add and drop courses
-
-29 October 2024
-
-National holiday (Republic day of Turkey)
-
-10 November 2024
-
-Commemoration of Atatürk
-
-15 November 2024
-
-TRNC Republic Day (National Holiday)
-
-8 -16 November 2024
-
-Midterm Examinations
-
-2 December - 20 December 2024
-
-Period for entering courses to be offered in Spring 2024-2025
-
-20 December 2024
-
-Last day for course withdrawal
-
-27 December 2024
-
-Last day for applying to get leave of absence
-
-25 December 2024
-
-Christmas Day
-
-30 December 2024
-
-Last day of classes
-
-1 January 2025
-
-New Year
-
-3 - 18 January 2025
-
-Final examinations
-
-23 January 2025
-
-Last day for the submission of Fall 2024-2025 letter grades to the system
-
-27 January 2025
-
-Online course registration for Spring 2024-2025 starts
-
-27 January 2025
-
-Last day for submission of the graduation decisions to the registrar
-
-24 - 31 January 2025
-
-Resit Examinations
-
-7 February 2025
-
-Fall Term Graduation Ceremony
-
-3 - 14 February 2025
-
-English Proficiency Test
-
-23 September 2024
-23 September 2024
-
-SPRING SEMESTER
-3 February - 7 March 2025
-
-Orientation program for new students
-
-5 - 28 February 2025
-
-English Placement and Proficiency Test
-
-10 February 2025
-
-Last day for submission of Fall Term Grade Changes, Resit examinations
-grades change to the registrar
-
-11 February 2025
-
-Online course registration period for registered students ends
-
-12 - 14 February 2025
-
-Course registration with the approval of the advisor
-
-14 February 2025
-
-Last day to apply for change of program
-Last day to apply for course exemptions
-
-17 February 2025
-
-Classes commence
-
-14 March 2025
-
-Last day for add and drop courses
-Last day for late registration
-
-29 March 2025
-
-Ramadan Bairam Eve
-
-30 March - 1 April 2025
-
-Ramadan Bairam (Eid al-Fitr)
-
-19 - 26 April 2025
-
-Midterm examinations
-
-23 April 2025
-
-National Sovereignty and Children’s Day
-
-1 May 2025
-
-Workers’ and Spring Day
-
-9 May 2025
-
-Last day for course withdrawal
-
-19 May 2025
-
-National Holiday (Youth and Sports Day)
-
-23 May 2025
-
-Last day for applying to get leave of absence
-
-4 June 2025
-
-Last day of classes
-
-5 June 2025
-
-Kurban Bairam Eve
-
-6 - 9 June 2025
-
-Kurban Bairam
-
-10 - 21 June 2025
-
-Final examinations
-
-25 June 2025
-
-Last day for the submission of Spring 2024-2025 letter grades to the system
-
-27 June 2025
-
-Last day for submission of the graduation decisions to the registrar
-
-4 July 2025
-
-Spring Term Graduation Ceremony
-
-SUMMER SEMESTER
-7 - 11 July 2025
-
-Course registration with the approval of the advisor
-
-14 July 2025
-
-Classes commence
-
-20 July 2025
-
-National Holiday (Peace and Freedom Day - TRNC)
-
-25 July 2025
-
-Last day for late registration
-
-31 July 2025
-
-Last day for add and drop courses
-
-1 August 2025
-
-National Holiday
-
-8 August 2025
-
-Last day for course withdrawal
-
-29 August 2025
-
-Last day of classes
-
-30 August 2025
-
-Victory Day
-
-1 - 3 September 2025
-
-Final examinations
-
-5 September 2024
-
-Last day for the submission of Summer Term 2024-2025 letter grades
-Last day for submission of the graduation decisions to the registrar
-
-12 September 2025
-
-Fall Term Graduation Ceremony
-"""
 
 def get_full_media_url(request, filename):
     if not filename:
@@ -385,12 +88,78 @@ def get_full_media_url(request, filename):
              return f"{settings.MEDIA_URL.rstrip('/')}/{filename.lstrip('/')}"
 
 
+def build_chat_contents(request, user_message_text, conversation_history_raw):
+    """
+    The `contents` for the Gemini API: the cleaned-up history plus the current question, with the
+    knowledge-base context (RAG) found for it. Shared by the sync and async chat views.
+    """
+    # --- RAG: Retrieval Step ---
+    retrieved_info_for_prompt = ""
+    identified_resources_for_prompt = [] # For the LLM to know what it can link to
+
+    user_message_lower = user_message_text.lower()
+
+    # # 1. Check for website link keywords
+    # for key, info in WEBSITE_LINKS.items():
+    #     if any(keyword in user_message_lower for keyword in info["keywords"]):
+    #         retrieved_info_for_prompt += f"\n- Information about '{key}': {info['description']}"
+    #         identified_resources_for_prompt.append(f"Page: '{info['description'][:30]}...' (for queries about {key}, link path: {info['url']})")
+    #         # break # Optional: stop after first match or collect multiple
+
+    # 2. Check for document keywords
+    for key, info in DOCUMENT_INFO.items():
+        if any(keyword in user_message_lower for keyword in info["keywords"]):
+            pdf_public_url = get_full_media_url(request, info["filename"])
+            if pdf_public_url:
+                retrieved_info_for_prompt += f"\n- Document: '{info['title']}'. {info['description']}"
+                identified_resources_for_prompt.append(f"Document: '{info['title']}' (for queries about {key}, link URL: {pdf_public_url})")
+                # break # Optional
+
+    # --- Augmentation Step ---
+    # Construct a dynamic part of the system instruction based on retrieved context
+    rag_context_instruction = ""
+    if retrieved_info_for_prompt:
+        rag_context_instruction += "Based on the user's query, here is some potentially relevant information from the CodeNest platform:\n"
+        rag_context_instruction += retrieved_info_for_prompt
+        rag_context_instruction += "\n\nIf you use this information or if it's directly relevant to the user's query, please incorporate it naturally into your response. "
+        if identified_resources_for_prompt:
+            rag_context_instruction += "You can also suggest relevant resources. When suggesting a resource, please use the following special format: @@LINK[display text for link](actual_url_or_path)@@. The 'display text for link' should be user-friendly (e.g., the page name or document title). The 'actual_url_or_path' should be the corresponding path or URL.\n"
+            rag_context_instruction += "Available resources identified for this query:\n"
+            for res_info in identified_resources_for_prompt:
+                rag_context_instruction += f"  - {res_info}\n"
+        rag_context_instruction += "\nFor example: 'You can @@LINK[upload your new project](/projects/create)@@ on the platform.' or 'For more details on teamwork, please refer to the @@LINK[CodeNest Collaboration Guide](" + (get_full_media_url(request, DOCUMENT_INFO["collaboration guide"]["filename"]) if "collaboration guide" in DOCUMENT_INFO else "PDF_URL") + ")@@.'\n"
+
+    # Prepare chat history for Gemini API
+    # Gemini 1.5 API expects {'role': 'user'/'model', 'parts': [{'text': message}]}
+    formatted_history_for_api = []
+    for entry in conversation_history_raw:
+        role = entry.get("role")
+        text_content = entry.get("text")
+        if role and text_content:
+            # Clean out our special @@LINK markers from history to avoid confusing the LLM on re-reads
+            cleaned_text = re.sub(r'@@LINK\[.*?\]\((.*?)\)@@', r'\1', text_content) # Replace with just the URL/path
+            formatted_history_for_api.append({'role': role, 'parts': [{'text': cleaned_text}]})
+
+    # Construct the content for the current turn, including RAG context if available
+    current_turn_user_parts = []
+    if rag_context_instruction: # Prepend RAG context and instructions for this turn
+        # This context helps the model understand what resources are available for linking
+        current_turn_user_parts.append({'text': rag_context_instruction})
+
+    current_turn_user_parts.append({'text': f"User's current question: {user_message_text}"})
+
+    return formatted_history_for_api + [{'role': 'user', 'parts': current_turn_user_parts}]
+
+
 class GeminiChatView(APIView):
     permission_classes = [permissions.AllowAny] # Allow all connections (no authentication required)
+    renderer_classes = API_RENDERER_CLASSES + [streaming.EventStreamRenderer] # Accept: text/event-stream streams the reply
+    parser_classes = API_PARSER_CLASSES
 
     def post(self, request, *args, **kwargs):
-        if not SDK_CONFIGURED_SUCCESSFULLY:
-            logger.error("GeminiChatView: Attempted to use chat but SDK is not configured.")
+        backend = llm.get_backend() # Built once at startup (see llm/__init__.py)
+        if backend is None:
+            logger.error("GeminiChatView: Attempted to use chat but the LLM backend is not configured.")
             return Response(
                 {"error": "Chatbot feature is currently unavailable due to a configuration issue."},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
@@ -411,93 +180,122 @@ class GeminiChatView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # --- RAG: Retrieval Step ---
-        retrieved_info_for_prompt = ""
-        identified_resources_for_prompt = [] # For the LLM to know what it can link to
-
-        user_message_lower = user_message_text.lower()
-
-        # # 1. Check for website link keywords
-        # for key, info in WEBSITE_LINKS.items():
-        #     if any(keyword in user_message_lower for keyword in info["keywords"]):
-        #         retrieved_info_for_prompt += f"\n- Information about '{key}': {info['description']}"
-        #         identified_resources_for_prompt.append(f"Page: '{info['description'][:30]}...' (for queries about {key}, link path: {info['url']})")
-        #         # break # Optional: stop after first match or collect multiple
-
-        # 2. Check for document keywords
-        for key, info in DOCUMENT_INFO.items():
-            if any(keyword in user_message_lower for keyword in info["keywords"]):
-                pdf_public_url = get_full_media_url(request, info["filename"])
-                if pdf_public_url:
-                    retrieved_info_for_prompt += f"\n- Document: '{info['title']}'. {info['description']}"
-                    identified_resources_for_prompt.append(f"Document: '{info['title']}' (for queries about {key}, link URL: {pdf_public_url})")
-                    # break # Optional
-
-        # --- Augmentation Step ---
-        # Construct a dynamic part of the system instruction based on retrieved context
-        rag_context_instruction = ""
-        if retrieved_info_for_prompt:
-            rag_context_instruction += "Based on the user's query, here is some potentially relevant information from the CodeNest platform:\n"
-            rag_context_instruction += retrieved_info_for_prompt
-            rag_context_instruction += "\n\nIf you use this information or if it's directly relevant to the user's query, please incorporate it naturally into your response. "
-            if identified_resources_for_prompt:
-                rag_context_instruction += "You can also suggest relevant resources. When suggesting a resource, please use the following special format: @@LINK[display text for link](actual_url_or_path)@@. The 'display text for link' should be user-friendly (e.g., the page name or document title). The 'actual_url_or_path' should be the corresponding path or URL.\n"
-                rag_context_instruction += "Available resources identified for this query:\n"
-                for res_info in identified_resources_for_prompt:
-                    rag_context_instruction += f"  - {res_info}\n"
-            rag_context_instruction += "\nFor example: 'You can @@LINK[upload your new project](/projects/create)@@ on the platform.' or 'For more details on teamwork, please refer to the @@LINK[CodeNest Collaboration Guide](" + (get_full_media_url(request, DOCUMENT_INFO["collaboration guide"]["filename"]) if "collaboration guide" in DOCUMENT_INFO else "PDF_URL") + ")@@.'\n"
-        
-        # Prepare chat history for Gemini API
-        # Gemini 1.5 API expects {'role': 'user'/'model', 'parts': [{'text': message}]}
-        formatted_history_for_api = []
-        for entry in conversation_history_raw:
-            role = entry.get("role")
-            text_content = entry.get("text")
-            if role and text_content:
-                # Clean out our special @@LINK markers from history to avoid confusing the LLM on re-reads
-                cleaned_text = re.sub(r'@@LINK\[.*?\]\((.*?)\)@@', r'\1', text_content) # Replace with just the URL/path
-                formatted_history_for_api.append({'role': role, 'parts': [{'text': cleaned_text}]})
-
-        # Construct the content for the current turn, including RAG context if available
-        current_turn_user_parts = []
-        if rag_context_instruction: # Prepend RAG context and instructions for this turn
-            # This context helps the model understand what resources are available for linking
-            current_turn_user_parts.append({'text': rag_context_instruction})
-        
-        current_turn_user_parts.append({'text': f"User's current question: {user_message_text}"})
-
-        contents_for_api = formatted_history_for_api + [{'role': 'user', 'parts': current_turn_user_parts}]
-
-        try:
-            model_name = "gemini-1.5-flash-latest" # Or "gemini-1.5-pro-latest"
-            model = genai.GenerativeModel(
-                model_name=model_name,
-                system_instruction=CODENEST_SYSTEM_INSTRUCTION, # Global system instruction
-                generation_config=GENERATION_CONFIG,
-                safety_settings=SAFETY_SETTINGS
-            )
-
-            gemini_response = model.generate_content(contents_for_api)
+        contents_for_api = build_chat_contents(request, user_message_text, conversation_history_raw)
 
-            if not gemini_response.candidates or not gemini_response.candidates[0].content.parts:
-                logger.error(f"Gemini API returned no valid candidates. Raw response: {gemini_response}. Feedback: {gemini_response.prompt_feedback}")
-                error_message = "The AI assistant could not generate a response at this time."
-                if gemini_response.prompt_feedback and gemini_response.prompt_feedback.block_reason:
-                    error_message += f" Reason: Content was blocked ({gemini_response.prompt_feedback.block_reason.name})."
-                # You could inspect gemini_response.prompt_feedback.safety_ratings for more details
-                return Response({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if request.accepted_renderer.format == streaming.EventStreamRenderer.format:
+            # Text is forwarded as Server-Sent Events as it arrives (see streaming.py)
+            return streaming.event_stream_response(streaming.iter_reply_events(backend.stream(contents_for_api)))
 
-            bot_response_text = gemini_response.candidates[0].content.parts[0].text
+        try:
+            bot_response_text = backend.generate(contents_for_api)
 
             # The LLM should have formatted links as @@LINK[...](...)@@ based on rag_context_instruction
             # No further post-processing of URLs needed here if LLM follows instructions.
 
             return Response({"reply": bot_response_text}, status=status.HTTP_200_OK)
 
+        except llm.NoReplyError as e:
+            return Response({"error": streaming.no_reply_message(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            logger.error(f"Error during Gemini API call: {e}", exc_info=True)
+            logger.error(f"Error during LLM API call: {e}", exc_info=True)
             # Avoid exposing detailed internal errors or API specific errors to the client
             return Response(
                 {"error": "An unexpected error occurred while communicating with the AI assistant."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+def chat_client_key(request):
+    """
+    Who a chat counts against for the per-user cap: the user id of a valid JWT access token, or the client
+    address for anonymous chats. Raises InvalidToken for a bad token, like DRF's authentication would.
+    The token is only validated, not looked up, so admission costs no database query.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return f"addr:{request.META.get('REMOTE_ADDR', '')}"
+    token = authenticator.get_validated_token(raw_token)
+    return f"user:{token[jwt_settings.USER_ID_CLAIM]}"
+
+
+def chat_error_response(wants_stream, message, status_code):
+    # Errors in the format the client asked for; streaming clients get a single `error` event
+    if wants_stream:
+        return HttpResponse(streaming.sse_event('error', {'error': message}), status=status_code,
+                            content_type='text/event-stream')
+    return JsonResponse({"error": message}, status=status_code)
+
+
+@method_decorator(csrf_exempt, name='dispatch') # Token-authenticated API, like the DRF views
+class AsyncGeminiChatView(View):
+    """
+    GeminiChatView for ASGI deployments: the model call is awaited, so a chat waiting on the model holds
+    no worker thread and can't starve the project API. Same request and response formats (JSON, or
+    Server-Sent Events with `Accept: text/event-stream`), JSON request bodies only.
+    Chats are admitted through the global and per-user caps of concurrency.py. Under WSGI (runserver) it
+    still answers, but each chat holds a thread, the caps don't apply and a streamed reply is only sent
+    once it is complete; WSGI deployments should use GeminiChatView (the frontend does unless built
+    with VITE_CHAT_ASYNC=true).
+    """
+    async def post(self, request, *args, **kwargs):
+        wants_stream = 'text/event-stream' in request.headers.get('Accept', '')
+        backend = llm.get_backend()
+        if backend is None:
+            logger.error("AsyncGeminiChatView: Attempted to use chat but the LLM backend is not configured.")
+            return chat_error_response(
+                wants_stream, "Chatbot feature is currently unavailable due to a configuration issue.",
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        try:
+            client_key = chat_client_key(request)
+        except InvalidToken as e:
+            return chat_error_response(wants_stream, str(e.detail['detail']), e.status_code)
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return chat_error_response(wants_stream, "Request body must be a JSON object.", status.HTTP_400_BAD_REQUEST)
+
+        user_message_text = data.get("message")
+        conversation_history_raw = data.get("history", [])
+        if not user_message_text:
+            return chat_error_response(wants_stream, "Message content is required.", status.HTTP_400_BAD_REQUEST)
+        # May look up the current Site for document links
+        contents_for_api = await sync_to_async(build_chat_contents)(request, user_message_text, conversation_history_raw)
+
+        limiter = concurrency.get_limiter()
+        try:
+            await limiter.acquire(client_key)
+        except concurrency.ChatQueueTimeout as e:
+            if e.per_user:
+                response = chat_error_response(
+                    wants_stream, "You have too many chats in progress. Please wait for a reply first.",
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                )
+            else:
+                response = chat_error_response(
+                    wants_stream, "The AI assistant is busy right now. Please try again shortly.",
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+            response['Retry-After'] = str(max(1, round(limiter.queue_timeout)))
+            return response
+
+        if wants_stream:
+            # The slot is held until the stream is over; the response releases it
+            events = streaming.aiter_reply_events(backend.astream(contents_for_api))
+            return streaming.event_stream_response(
+                streaming.ClosingEvents(events, functools.partial(limiter.release, client_key))
+            )
+        try:
+            bot_response_text = await backend.agenerate(contents_for_api)
+        except llm.NoReplyError as e:
+            return JsonResponse({"error": streaming.no_reply_message(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            logger.error(f"Error during LLM API call: {e}", exc_info=True)
+            return JsonResponse({"error": streaming.GENERIC_ERROR}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            limiter.release(client_key)
+        return JsonResponse({"reply": bot_response_text})
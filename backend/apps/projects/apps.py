@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.projects'
+
+    def ready(self):
+        from . import signals  # noqa: F401 Registers model signal handlers
+        from .search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,158 @@
+# backend/apps/projects/archives.py
+# Bulk upload of a zip/tar archive into many ProjectFiles.
+# Entries are streamed one at a time (hashed while being spooled to a bounded temp file), stored in the
+# content-addressed blob store, and inserted with bulk_create inside a single transaction.
+# bulk_create skips post_save, so processing jobs and the search index are updated explicitly here.
+import hashlib
+import posixpath
+import tarfile
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import caching, search
+from .models import FileBlob, FileProcessingJob, ProjectFile
+
+MAX_ENTRIES = getattr(settings, 'ARCHIVE_MAX_ENTRIES', 2000)
+MAX_TOTAL_SIZE = getattr(settings, 'ARCHIVE_MAX_TOTAL_SIZE', 500 * 1024 ** 2) # Uncompressed bytes
+MAX_ENTRY_SIZE = getattr(settings, 'ARCHIVE_MAX_ENTRY_SIZE', 100 * 1024 ** 2)
+READ_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024 # Entries larger than this spill to disk while being hashed
+
+# Metadata clutter that archivers add and nobody wants as project files
+_IGNORED_PARTS = ('__MACOSX', '.DS_Store', 'Thumbs.db', '.git')
+
+
+def clean_path(name):
+    # Normalized relative path inside the archive, or None for entries that must not be stored
+    name = name.replace('\\', '/')
+    path = posixpath.normpath(name).lstrip('/')
+    if not path or path == '.' or path.startswith('..') or name.startswith('/'):
+        return None
+    if any(part in _IGNORED_PARTS for part in path.split('/')):
+        return None
+    return path
+
+
+def _iter_zip(uploaded):
+    with zipfile.ZipFile(uploaded) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as stream:
+                yield info.filename, info.file_size, stream
+
+
+def _iter_tar(uploaded):
+    # Stream mode ('r|*'): a single forward pass over the (optionally compressed) archive
+    with tarfile.open(fileobj=uploaded, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile(): # Skips directories, symlinks, devices
+                continue
+            stream = archive.extractfile(member)
+            if stream is not None:
+                yield member.name, member.size, stream
+
+
+def iter_entries(uploaded):
+    name = (getattr(uploaded, 'name', '') or '').lower()
+    if name.endswith('.zip') or zipfile.is_zipfile(uploaded):
+        uploaded.seek(0)
+        return _iter_zip(uploaded)
+    uploaded.seek(0)
+    return _iter_tar(uploaded)
+
+
+def _spool_entry(stream, limit):
+    # Copies an entry to a spooled temp file, hashing as it goes; stops at `limit` bytes
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    hasher = hashlib.sha256()
+    size = 0
+    while True:
+        data = stream.read(READ_SIZE)
+        if not data:
+            break
+        size += len(data)
+        if size > limit:
+            spool.close()
+            return None, None, size
+        hasher.update(data)
+        spool.write(data)
+    spool.seek(0)
+    return spool, hasher.hexdigest(), size
+
+
+def import_archive(project, uploaded):
+    """
+    Expands `uploaded` into ProjectFiles of `project`, keeping directory structure in original_filename.
+    Returns (created_files, skipped) where skipped is a list of {'name', 'reason'}.
+    Raises ValidationError (rolling everything back) when the archive breaks the entry or size limits.
+    """
+    created_blobs = [] # Stored by this import; removed again if the transaction rolls back
+    skipped = []
+    try:
+        with transaction.atomic():
+            files = []
+            total = 0
+            for entry_name, declared_size, stream in iter_entries(uploaded):
+                path = clean_path(entry_name)
+                if path is None:
+                    skipped.append({'name': entry_name, 'reason': 'unsafe or ignored path'})
+                    continue
+                if len(path) > ProjectFile._meta.get_field('original_filename').max_length:
+                    skipped.append({'name': entry_name, 'reason': 'path too long'})
+                    continue
+                if len(files) >= MAX_ENTRIES:
+                    raise ValidationError({'archive': f'Archive has more than {MAX_ENTRIES} files.'})
+                if declared_size > MAX_ENTRY_SIZE:
+                    skipped.append({'name': path, 'reason': 'file too large'})
+                    continue
+
+                # Declared sizes can lie (zip bombs), so the limits are enforced on the bytes actually read
+                spool, sha256, size = _spool_entry(stream, min(MAX_ENTRY_SIZE, MAX_TOTAL_SIZE - total))
+                if spool is None:
+                    if total + size > MAX_TOTAL_SIZE:
+                        raise ValidationError({'archive': f'Archive expands to more than {MAX_TOTAL_SIZE} bytes.'})
+                    skipped.append({'name': path, 'reason': 'file too large'})
+                    continue
+                total += size
+                with spool:
+                    content = File(spool, name=posixpath.basename(path))
+                    content.size = size
+                    blob = FileBlob.acquire(sha256, content, path)
+                if blob.ref_count == 1:
+                    created_blobs.append(blob.file.name)
+                files.append(ProjectFile(
+                    project=project,
+                    file=blob.file.name,
+                    blob=blob,
+                    sha256=sha256,
+                    original_filename=path,
+                    file_type=ProjectFile.guess_file_type(path),
+                ))
+
+            created = ProjectFile.objects.bulk_create(files, batch_size=500)
+            FileProcessingJob.objects.bulk_create(
+                [FileProcessingJob(project_file=project_file) for project_file in created], batch_size=500
+            )
+            search.index_project(project) # One reindex for the whole archive
+            caching.invalidate([caching.project_tag(project.pk), caching.SEARCH_TAG])
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+        discard_blobs(created_blobs)
+        raise ValidationError({'archive': f'Could not read the archive: {e}'})
+    except Exception:
+        discard_blobs(created_blobs)
+        raise
+    return created, skipped
+
+
+def discard_blobs(names):
+    # Removes stored blobs whose rows were rolled back (unless another upload recreated them meanwhile)
+    storage = FileBlob._meta.get_field('file').storage
+    for name in names:
+        if not FileBlob.objects.filter(file=name).exists():
+            storage.delete(name)
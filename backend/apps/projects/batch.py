@@ -0,0 +1,180 @@
+# backend/apps/projects/batch.py
+# Many project creates/updates in one request (POST /api/projects/batch/).
+# Every operation is validated up front: item fields without touching the database, the target projects
+# with one query and every referenced user id with one query. Valid operations are then written with
+# bulk_create/bulk_update and bulk collaborator link changes inside a single transaction.
+# Those bypass the model signals, so facet counts, the search index and the cache are updated here.
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.users.models import User
+from . import caching, facets, search
+from .models import Project
+
+MAX_OPERATIONS = getattr(settings, 'PROJECT_BATCH_MAX_OPERATIONS', 500)
+OPERATIONS = ('create', 'update', 'partial_update')
+PROJECT_FIELDS = ['title', 'description', 'type', 'department', 'year']
+
+
+class BatchProjectSerializer(serializers.ModelSerializer):
+    # ProjectSerializer's writable fields, with collaborator ids as plain integers: they are checked for
+    # the whole batch at once instead of by PrimaryKeyRelatedField's query per id.
+    # add_/remove_collaborator_ids change the collaborators without replacing them (e.g. for a whole cohort).
+    collaborator_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    add_collaborator_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    remove_collaborator_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    class Meta:
+        model = Project
+        fields = PROJECT_FIELDS + ['collaborator_ids', 'add_collaborator_ids', 'remove_collaborator_ids']
+
+    def validate(self, attrs):
+        if 'collaborator_ids' in attrs and ('add_collaborator_ids' in attrs or 'remove_collaborator_ids' in attrs):
+            raise serializers.ValidationError(
+                "collaborator_ids can't be combined with add_collaborator_ids/remove_collaborator_ids."
+            )
+        return attrs
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    operations = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_OPERATIONS)
+    # With atomic (the default) nothing is written unless every operation is valid
+    atomic = serializers.BooleanField(default=True)
+
+
+def _user_ids(validated):
+    return set().union(*(
+        validated.get(field, ()) for field in ('collaborator_ids', 'add_collaborator_ids', 'remove_collaborator_ids')
+    ))
+
+
+def validate_operations(user, operations):
+    """
+    Returns one result per operation: {'index', 'op', 'id', 'status', ...} with 'errors' for invalid
+    operations and the validated data ('_data', '_project') for valid ones; see public().
+    Costs two queries whatever the number of operations.
+    """
+    results = []
+    for index, operation in enumerate(operations):
+        op = operation.get('op')
+        result = {'index': index, 'op': op, 'id': operation.get('id')}
+        results.append(result)
+        if op not in OPERATIONS:
+            result.update(status=400, errors={'op': [f"Must be one of: {', '.join(OPERATIONS)}."]})
+            continue
+        if op != 'create' and not isinstance(result['id'], int):
+            result.update(status=400, errors={'id': ['A project id is required.']})
+            continue
+        serializer = BatchProjectSerializer(data=operation.get('data', {}), partial=op == 'partial_update')
+        if not serializer.is_valid():
+            result.update(status=400, errors=serializer.errors)
+            continue
+        result.update(status=201 if op == 'create' else 200, _data=serializer.validated_data)
+
+    targets = Counter(result['id'] for result in results if result['op'] in OPERATIONS and result['op'] != 'create')
+    for result in results:
+        if 'errors' not in result and result['op'] != 'create' and targets[result['id']] > 1:
+            result.update(status=400, errors={'id': ['Each project can only be changed once per batch.']})
+
+    valid = [result for result in results if 'errors' not in result]
+    projects = Project.objects.in_bulk([result['id'] for result in valid if result['op'] != 'create'])
+    referenced = set().union(*(_user_ids(result['_data']) for result in valid))
+    known = set(User.objects.filter(pk__in=referenced).values_list('pk', flat=True)) if referenced else set()
+    for result in valid:
+        if result['op'] != 'create':
+            project = projects.get(result['id'])
+            if project is None:
+                result.update(status=404, errors={'detail': 'Not found.'})
+                continue
+            if project.owner_id != user.pk: # Same rule as IsProjectOwnerPermission on single updates
+                result.update(status=403, errors={'detail': 'You do not have permission to perform this action.'})
+                continue
+            result['_project'] = project
+        unknown = sorted(_user_ids(result['_data']) - known)
+        if unknown:
+            result.update(status=400, errors={'collaborator_ids': [f'Invalid pk "{pk}" - object does not exist.' for pk in unknown]})
+    return results
+
+
+def public(result):
+    # A result without the validated data kept for apply_operations, for the response
+    return {key: value for key, value in result.items() if not key.startswith('_')}
+
+
+def _collaborator_changes(items):
+    # (links to insert, Q of links to delete) for [(project, validated data)]
+    Through = Project.collaborators.through
+    inserts, deletes = [], Q()
+    for project, data in items:
+        ids = set(data.get('collaborator_ids', data.get('add_collaborator_ids', ())))
+        inserts += [Through(project_id=project.pk, user_id=user_id) for user_id in sorted(ids)]
+        if 'collaborator_ids' in data:
+            deletes |= Q(project_id=project.pk) & ~Q(user_id__in=ids)
+        elif data.get('remove_collaborator_ids'):
+            deletes |= Q(project_id=project.pk, user_id__in=data['remove_collaborator_ids'])
+    return inserts, deletes
+
+
+def apply_operations(user, results):
+    """
+    Writes the valid operations of `results` (from validate_operations) in one transaction and fills in
+    the ids of created projects. Returns the ids of every project written.
+    """
+    valid = [result for result in results if 'errors' not in result]
+    created = [result for result in valid if result['op'] == 'create']
+    updated = [result for result in valid if result['op'] != 'create']
+    projects = {result['_project'].pk: result['_project'] for result in updated}
+    old_keys = {pk: facets.facet_key(project) for pk, project in projects.items()}
+    changed_fields = set()
+    now = timezone.now()
+
+    with transaction.atomic():
+        new_projects = Project.objects.bulk_create([
+            Project(owner=user, **{field: result['_data'][field] for field in PROJECT_FIELDS if field in result['_data']})
+            for result in created
+        ])
+        for result, project in zip(created, new_projects):
+            result['id'] = project.pk
+
+        for result in updated:
+            project = projects[result['id']]
+            data = result['_data'] # As in ProjectSerializer.update, omitted fields keep their values
+            for field in PROJECT_FIELDS:
+                if field in data:
+                    setattr(project, field, data[field])
+                    changed_fields.add(field)
+            project.updated_at = now
+        if projects:
+            Project.objects.bulk_update(list(projects.values()), sorted(changed_fields | {'updated_at'}), batch_size=500)
+
+        inserts, deletes = _collaborator_changes(
+            [(project, result['_data']) for result, project in zip(created, new_projects)]
+            + [(projects[result['id']], result['_data']) for result in updated]
+        )
+        Through = Project.collaborators.through
+        if deletes:
+            Through.objects.filter(deletes).delete()
+        Through.objects.bulk_create(inserts, ignore_conflicts=True, batch_size=500)
+
+        # Created projects join the lists of their facet cell; moved ones leave one cell's lists and join another's
+        deltas = Counter(facets.facet_key(project) for project in new_projects)
+        moved = set(deltas)
+        for pk, project in projects.items():
+            new_key = facets.facet_key(project)
+            if new_key != old_keys[pk]:
+                deltas[new_key] += 1
+                deltas[old_keys[pk]] -= 1
+                moved.update((new_key, old_keys[pk]))
+        facets.apply_deltas(deltas)
+        tags = {caching.SEARCH_TAG, *(tag for key in moved for tag in caching.membership_tags(key))}
+
+        written = [project.pk for project in new_projects] + list(projects)
+        for project in [*new_projects, *projects.values()]:
+            search.index_project(project)
+        caching.invalidate(sorted(tags | {caching.project_tag(pk) for pk in written}))
+    return written
@@ -0,0 +1,245 @@
+# backend/apps/projects/caching.py
+# Two-tier cache for serialized project list pages and search/facet results.
+#
+#   1. a per-process cachetools TTLCache (no network round trip, short TTL)
+#   2. a shared Redis tier (settings.PROJECT_CACHE_REDIS_URL), so workers reuse each other's pages
+#
+# Invalidation is tag-based. Every entry records the versions of its tags at the time it was built
+# (e.g. `project:42` for each project on the page, `list:type=CODE` for the filters it was built with).
+# Invalidating a tag writes a new version, and entries whose recorded versions no longer match are
+# treated as misses in both tiers. An edit to one project therefore only evicts the pages that show it.
+# Tag versions are stored in Redis without a TTL; with maxmemory set, use a volatile-* eviction policy
+# so only the (expiring) entries get evicted. Without Redis the versions live in this process only.
+#
+# Disabled unless settings.PROJECT_CACHE_ENABLED is set (it defaults to on when a Redis URL is configured).
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from collections import Counter
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+try:
+    import redis
+except ImportError: # Shared tier unavailable; the local tier still works
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL = getattr(settings, 'PROJECT_CACHE_LOCAL_TTL', 30) # Seconds
+LOCAL_MAXSIZE = getattr(settings, 'PROJECT_CACHE_LOCAL_MAXSIZE', 512) # Entries
+SHARED_TTL = getattr(settings, 'PROJECT_CACHE_SHARED_TTL', 300) # Seconds
+KEY_PREFIX = getattr(settings, 'PROJECT_CACHE_KEY_PREFIX', 'codenest:projects:')
+
+_local = TTLCache(maxsize=LOCAL_MAXSIZE, ttl=LOCAL_TTL)
+_local_versions = {} # Tag versions when there's no shared tier
+_lock = threading.Lock()
+_redis_client = None
+_stats = Counter() # This process
+_unflushed = Counter() # Not yet added to the shared totals in Redis
+STATS_FLUSH_EVERY = 100
+
+
+def is_enabled():
+    return getattr(settings, 'PROJECT_CACHE_ENABLED', bool(getattr(settings, 'PROJECT_CACHE_REDIS_URL', None)))
+
+
+def get_redis():
+    # Shared-tier client, or None when no Redis is configured
+    global _redis_client
+    url = getattr(settings, 'PROJECT_CACHE_REDIS_URL', None)
+    if not url or redis is None:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis_client
+
+
+def _redis_errors():
+    return (redis.RedisError,) if redis is not None else ()
+
+
+def make_key(request, namespace):
+    # Query params are sorted so ?a=1&b=2 and ?b=2&a=1 share an entry; the host is part of the key
+    # because serialized file URLs are absolute
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    raw = json.dumps([namespace, request.get_host(), request.path, params])
+    return KEY_PREFIX + 'entry:' + hashlib.sha1(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _tag_key(tag):
+    return KEY_PREFIX + 'tag:' + tag
+
+
+def _current_versions(tags):
+    client = get_redis()
+    if client is None:
+        with _lock:
+            return {tag: _local_versions.get(tag) for tag in tags}
+    values = client.mget([_tag_key(tag) for tag in tags])
+    return {tag: value.decode() if value is not None else None for tag, value in zip(tags, values)}
+
+
+def _is_fresh(entry):
+    versions = entry['tags']
+    return not versions or _current_versions(list(versions)) == versions
+
+
+def lookup(key):
+    """
+    Returns the cached data for `key` or None. Counts a hit per tier or a miss in the stats.
+    """
+    if not is_enabled():
+        return None
+    with _lock:
+        entry = _local.get(key)
+    try:
+        if entry is not None:
+            if _is_fresh(entry):
+                _count('local_hits')
+                return entry['data']
+            with _lock:
+                _local.pop(key, None)
+
+        client = get_redis()
+        if client is not None:
+            raw = client.get(key)
+            if raw is not None:
+                entry = json.loads(raw)
+                if _is_fresh(entry):
+                    with _lock:
+                        _local[key] = entry # Promote to the local tier
+                    _count('shared_hits')
+                    return entry['data']
+    except _redis_errors():
+        logger.warning('Project cache read failed; serving uncached', exc_info=True)
+        _count('errors')
+    _count('misses')
+    return None
+
+
+def store(key, data, tags):
+    if not is_enabled():
+        return
+    try:
+        # The versions are read before the data is stored: an invalidation racing with this write
+        # leaves a stale-versioned entry that the next read discards
+        entry = {'tags': _current_versions(sorted(tags)), 'data': data}
+        payload = json.dumps(entry, cls=DjangoJSONEncoder)
+        entry = json.loads(payload) # Local and shared tiers hold the same plain-JSON data
+        with _lock:
+            _local[key] = entry
+        client = get_redis()
+        if client is not None:
+            client.set(key, payload, ex=SHARED_TTL)
+        _count('sets')
+    except _redis_errors():
+        logger.warning('Project cache write failed', exc_info=True)
+        _count('errors')
+
+
+def _bump(tags):
+    client = get_redis()
+    versions = {_tag_key(tag): uuid.uuid4().hex for tag in tags}
+    if client is None:
+        with _lock:
+            _local_versions.update({tag: versions[_tag_key(tag)] for tag in tags})
+    else:
+        try:
+            client.mset(versions)
+        except _redis_errors():
+            logger.warning('Project cache invalidation failed', exc_info=True)
+            _count('errors')
+            return
+    _count('invalidations', len(tags))
+
+
+def invalidate(tags):
+    # Applied once the surrounding transaction commits, so a concurrent request can't re-cache the old rows
+    tags = {tag for tag in tags if tag}
+    if tags and is_enabled():
+        transaction.on_commit(lambda: _bump(tags))
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
+        _local_versions.clear()
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+        _unflushed[name] += amount
+        if sum(_unflushed.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_unflushed)
+        _unflushed.clear()
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for field, value in pending.items():
+            pipe.hincrby(KEY_PREFIX + 'stats', field, value)
+        pipe.execute()
+    except _redis_errors():
+        pass # Metrics are best effort
+
+
+def _summary(counts):
+    hits = counts.get('local_hits', 0) + counts.get('shared_hits', 0)
+    lookups = hits + counts.get('misses', 0)
+    return {**counts, 'hit_ratio': round(hits / lookups, 4) if lookups else None}
+
+
+def stats():
+    """
+    Hit/miss counters of this process, and the totals of all processes when the shared tier is on
+    (those are flushed every STATS_FLUSH_EVERY events, so they trail slightly).
+    """
+    with _lock:
+        result = {'process': {**_summary(dict(_stats)), 'local_size': len(_local)}}
+    client = get_redis()
+    if client is not None:
+        try:
+            shared = client.hgetall(KEY_PREFIX + 'stats')
+            result['shared'] = _summary({k.decode(): int(v) for k, v in shared.items()})
+        except _redis_errors():
+            result['shared'] = None
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+        _unflushed.clear()
+
+
+# --- Tags ---
+
+def project_tag(project_id):
+    return f'project:{project_id}'
+
+
+def list_tags(selected):
+    # A filtered list is tagged with each of its filter values; the unfiltered list with `list:all`
+    if not selected:
+        return ['list:all']
+    return [f'list:{field}={value}' for field, value in selected.items()]
+
+
+def membership_tags(key):
+    # Lists a project with facet key (type, department, year) appears in, i.e. whose pages shift
+    # when such a project is created, deleted or moved between filters
+    project_type, department, year = key
+    return ['list:all', f'list:type={project_type}', f'list:department={department}', f'list:year={year}']
+
+
+SEARCH_TAG = 'search' # Any search document changed
+FACETS_TAG = 'facets' # Any facet count changed
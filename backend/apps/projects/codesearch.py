@@ -0,0 +1,224 @@
+# backend/apps/projects/codesearch.py
+# Grep across every uploaded source file, backed by a trigram index (the Google Code Search / Zoekt approach).
+# Each distinct source text (CodeDocument, keyed by content hash) gets one CodeTrigram row per distinct
+# lower-cased trigram it contains. A query is turned into a boolean plan of trigrams that any match must
+# contain: a literal needs all of its trigrams; a regex needs the trigrams of the literal runs it can't
+# match without (alternatives become ORs). Posting lists are intersected in the database, and only the
+# surviving candidates are scanned line by line with the real pattern.
+# The processing worker indexes CODE files after upload (processing/jobs.py); documents no file refers to
+# any more are dropped when files are deleted (signals.py).
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+try:
+    from re import _parser as sre_parse
+except ImportError: # Python < 3.11
+    import sre_parse
+
+from .models import CodeDocument, CodeTrigram, ProjectFile
+
+MAX_DOCUMENT_CHARS = getattr(settings, 'CODE_SEARCH_MAX_FILE_CHARS', 1_000_000) # Indexed (and searched) per file
+MAX_QUERY_LENGTH = 200
+# Regexes run with Python's backtracking engine, so they get tighter limits than literal queries
+MAX_REGEX_LENGTH = 100
+MAX_REGEX_CANDIDATES = getattr(settings, 'CODE_SEARCH_MAX_REGEX_CANDIDATES', 2000)
+MAX_REGEX_SCAN_CHARS = getattr(settings, 'CODE_SEARCH_MAX_REGEX_SCAN_CHARS', 200_000) # Per file
+MAX_FILES = 50 # Matching source texts per response
+MAX_HITS_PER_FILE = 20
+MAX_LINE_CHARS = 300 # Hit lines are cut to this length
+SCAN_BATCH_SIZE = 100
+
+_REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', sre_parse.MAX_REPEAT)}
+
+
+def trigrams(text):
+    # Distinct lower-cased trigrams; ones spanning a line break are left out, since hits are per line
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2) if '\n' not in text[i:i + 3]}
+
+
+def index_document(sha256, text):
+    # Adds the source text of `sha256` to the index once; identical files processed again reuse it
+    if not sha256 or text is None:
+        return
+    text = text.replace('\x00', '')[:MAX_DOCUMENT_CHARS] # NUL isn't allowed in PostgreSQL text
+    with transaction.atomic():
+        document, created = CodeDocument.objects.get_or_create(sha256=sha256, defaults={'content': text})
+        if created:
+            CodeTrigram.objects.bulk_create(
+                [CodeTrigram(document=document, trigram=trigram) for trigram in trigrams(text)], batch_size=5000
+            )
+
+
+def remove_unreferenced(sha256s):
+    # Drops the documents (and their postings) that no code file has any more
+    sha256s = [sha256 for sha256 in sha256s if sha256]
+    if sha256s:
+        CodeDocument.objects.filter(sha256__in=sha256s).exclude(
+            sha256__in=ProjectFile.objects.filter(sha256__in=sha256s, file_type=ProjectFile.FileType.CODE).values('sha256')
+        ).delete()
+
+
+# --- Query planning ---
+# A plan is None (no constraint: anything could match), ('trigrams', set), ('and', [plans]) or ('or', [plans]).
+
+def _literal_plan(text):
+    found = trigrams(text)
+    return ('trigrams', found) if found else None
+
+
+def _combine(kind, plans):
+    if kind == 'or' and any(plan is None for plan in plans):
+        return None # One unconstrained alternative makes the whole alternation unconstrained
+    plans = [plan for plan in plans if plan is not None]
+    if not plans:
+        return None
+    return plans[0] if len(plans) == 1 else (kind, plans)
+
+
+def _regex_plan(items):
+    # Plan of a parsed regex sequence: literal runs of 3+ characters and constrained sub-patterns, ANDed
+    plans, run = [], []
+
+    def end_run():
+        plans.append(_literal_plan(''.join(run)))
+        run.clear()
+
+    for op, value in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            plans.append(_regex_plan(value[-1]))
+        elif op is sre_parse.BRANCH:
+            plans.append(_combine('or', [_regex_plan(branch) for branch in value[1]]))
+        elif op in _REPEATS and value[0] >= 1: # x+ and x{2,} need at least one x
+            plans.append(_regex_plan(value[2]))
+    end_run()
+    return _combine('and', plans)
+
+
+def _has_nested_repeat(items, inside_repeat=False):
+    # True for an unbounded repeat inside another repeat, e.g. (a+)+ or (\w*\s?)*: the classic
+    # catastrophic-backtracking shape
+    for op, value in items:
+        if op in _REPEATS:
+            unbounded = value[1] is sre_parse.MAXREPEAT
+            if (inside_repeat and unbounded) or _has_nested_repeat(value[2], True):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _has_nested_repeat(value[-1], inside_repeat):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_has_nested_repeat(branch, inside_repeat) for branch in value[1]):
+                return True
+    return False
+
+
+def plan_query(query, regex=False):
+    """
+    Trigram plan for a query. Raises ValidationError for invalid regexes, for regexes with nested
+    unbounded repeats, and for queries that no trigram can narrow down (fewer than 3 consecutive
+    literal characters required).
+    """
+    max_length = MAX_REGEX_LENGTH if regex else MAX_QUERY_LENGTH
+    if not query or len(query) > max_length:
+        raise ValidationError({'q': f'Enter a query of 1 to {max_length} characters.'})
+    if regex:
+        try:
+            parsed = sre_parse.parse(query)
+        except re.error as e:
+            raise ValidationError({'q': f'Invalid regular expression: {e}'})
+        if _has_nested_repeat(parsed):
+            raise ValidationError({'q': 'Nested repetitions such as (a+)+ are not supported.'})
+        plan = _regex_plan(parsed)
+    else:
+        plan = _literal_plan(query)
+    if plan is None:
+        raise ValidationError({'q': 'The query needs at least 3 consecutive literal characters.'})
+    return plan
+
+
+def candidate_documents(plan):
+    # Ids of the documents that can match `plan`
+    kind, value = plan
+    if kind == 'trigrams':
+        # Posting-list intersection: documents holding every one of the trigrams
+        return set(
+            CodeTrigram.objects.filter(trigram__in=value).values('document_id')
+            .annotate(found=Count('trigram')).filter(found=len(value)).values_list('document_id', flat=True)
+        )
+    if kind == 'and':
+        result = None
+        # Small trigram sets tend to be the least selective; start with the largest
+        for child in sorted(value, key=lambda child: -len(child[1]) if child[0] == 'trigrams' else 0):
+            ids = candidate_documents(child)
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result or set()
+    return set().union(*(candidate_documents(child) for child in value))
+
+
+# --- Search ---
+
+def _line_hits(pattern, content, max_chars=None):
+    hits = []
+    if max_chars is not None:
+        content = content[:max_chars]
+    if not pattern.search(content):
+        return hits
+    for number, line in enumerate(content.splitlines(), 1):
+        if pattern.search(line):
+            hits.append({'line': number, 'text': line[:MAX_LINE_CHARS]})
+            if len(hits) >= MAX_HITS_PER_FILE:
+                break
+    return hits
+
+
+def search(query, regex=False, ignore_case=False, max_files=MAX_FILES):
+    """
+    Returns (results, truncated). Results are the code files with matching lines:
+    [{'file_id', 'project_id', 'project_title', 'filename', 'hits': [{'line', 'text'}]}],
+    ordered by project and filename. `truncated` is set when more than `max_files` source texts matched.
+    """
+    plan = plan_query(query, regex)
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        pattern = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        raise ValidationError({'q': f'Invalid regular expression: {e}'})
+
+    candidates = sorted(candidate_documents(plan))
+    if regex and len(candidates) > MAX_REGEX_CANDIDATES:
+        raise ValidationError({'q': 'The regular expression matches too many files; add a longer literal part.'})
+    max_chars = MAX_REGEX_SCAN_CHARS if regex else None
+    matched, truncated = {}, False
+    for start in range(0, len(candidates), SCAN_BATCH_SIZE):
+        batch = CodeDocument.objects.filter(pk__in=candidates[start:start + SCAN_BATCH_SIZE]).values_list('sha256', 'content')
+        for sha256, content in batch:
+            hits = _line_hits(pattern, content, max_chars)
+            if hits:
+                matched[sha256] = hits
+        if len(matched) > max_files:
+            truncated = True
+            break
+    if truncated:
+        matched = dict(sorted(matched.items())[:max_files])
+
+    files = (
+        ProjectFile.objects.filter(sha256__in=matched, file_type=ProjectFile.FileType.CODE)
+        .order_by('project_id', 'original_filename', 'id')
+        .values_list('id', 'project_id', 'project__title', 'original_filename', 'sha256')
+    )
+    results = [
+        {'file_id': file_id, 'project_id': project_id, 'project_title': project_title, 'filename': filename,
+         'hits': matched[sha256]}
+        for file_id, project_id, project_title, filename, sha256 in files
+    ]
+    return results, truncated
@@ -0,0 +1,81 @@
+# backend/apps/projects/conditional.py
+# HTTP validators (ETag / Last-Modified) for project representations.
+# A project's validator combines its updated_at with the count and newest uploaded_at of its files,
+# so adding or deleting files changes it even through bulk paths that skip signals. Changes that leave
+# no timestamp of their own (collaborators, file processing results) touch Project.updated_at instead.
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+from . import caching
+from .models import Project
+from .serving import is_not_modified
+
+
+def touch_projects(project_ids):
+    # Bumps updated_at without going through save(), so facet/search signals don't fire.
+    # The cached list pages showing these projects are invalidated along with it.
+    project_ids = list(project_ids)
+    Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+    caching.invalidate(caching.project_tag(pk) for pk in project_ids)
+
+
+def touch_projects_of_files(file_ids):
+    touch_projects(Project.objects.filter(files__pk__in=file_ids).values_list('pk', flat=True).distinct())
+
+
+def has_conditional_headers(request):
+    return bool(request.headers.get('If-None-Match') or request.headers.get('If-Modified-Since'))
+
+
+def make_validators(kind, project_id, updated_at, file_count, files_uploaded_at):
+    """
+    Returns (etag, last_modified). `kind` distinguishes representations of the same project
+    (e.g. the detail view and its file list), which must not share an ETag.
+    """
+    parts = [kind, project_id, updated_at.isoformat(), file_count,
+             files_uploaded_at.isoformat() if files_uploaded_at else '']
+    digest = hashlib.md5(':'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+    last_modified = max(updated_at, files_uploaded_at) if files_uploaded_at else updated_at
+    return f'W/"{digest}"', last_modified
+
+
+def query_validators(kind, project_id):
+    # One aggregate query over the project and its files; None when the project doesn't exist
+    try:
+        row = (
+            Project.objects.filter(pk=project_id)
+            .annotate(file_count=Count('files'), files_uploaded_at=Max('files__uploaded_at'))
+            .values_list('pk', 'updated_at', 'file_count', 'files_uploaded_at')
+            .first()
+        )
+    except (TypeError, ValueError): # Malformed id in the URL
+        return None
+    if row is None:
+        return None
+    return make_validators(kind, *row)
+
+
+def instance_validators(kind, project, files):
+    # Same validators computed from an already-loaded project and its (prefetched) files, without a query
+    uploaded = [f.uploaded_at for f in files]
+    return make_validators(kind, project.pk, project.updated_at, len(uploaded), max(uploaded, default=None))
+
+
+def not_modified(request, validators):
+    etag, last_modified = validators
+    # The stored ETag is weak; If-None-Match comparison ignores the W/ prefix on both sides
+    return is_not_modified(request, etag.removeprefix('W/'), last_modified)
+
+
+def set_validators(response, validators):
+    etag, last_modified = validators
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Caches may store the response but must revalidate it on every use
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept']) # JSON and MessagePack bodies share the validator
+    return response
@@ -0,0 +1,150 @@
+# backend/apps/projects/duplicates.py
+# Near-duplicate detection for uploaded code and papers with MinHash + LSH.
+# The processing worker computes each file's MinHash signature (processing/fingerprints.py) and
+# index_signature() stores it with its LSH band buckets. Finding the near-duplicates of a file is then an
+# indexed lookup of its buckets plus a signature comparison with the few candidates found there, instead
+# of a comparison with every file in the corpus.
+# Results are recorded in the file's extracted_metadata['near_duplicates'] when it is processed;
+# project_report() recomputes them on demand, so files uploaded later show up as well.
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ContentFingerprint, LshBucket, ProjectFile
+from .processing import fingerprints
+
+MIN_SIMILARITY = getattr(settings, 'NEAR_DUPLICATE_MIN_SIMILARITY', 0.5) # Estimated Jaccard of the shingle sets
+MAX_MATCHES = getattr(settings, 'NEAR_DUPLICATE_MAX_MATCHES', 20) # Per file
+METADATA_KEY = 'near_duplicates'
+LOOKUP_CHUNK_SIZE = 500 # Values per IN (...) lookup; keeps big projects under SQLite's variable limit
+
+
+def _chunks(values):
+    values, size = list(values), LOOKUP_CHUNK_SIZE
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def index_signature(sha256, signature):
+    # Stores the fingerprint of `sha256` once; identical content processed again reuses it
+    if not sha256 or signature is None:
+        return
+    with transaction.atomic():
+        fingerprint, created = ContentFingerprint.objects.get_or_create(
+            sha256=sha256, defaults={'signature': fingerprints.pack(signature)}
+        )
+        if created:
+            LshBucket.objects.bulk_create([
+                LshBucket(fingerprint=fingerprint, band=band, bucket=bucket)
+                for band, bucket in enumerate(fingerprints.band_hashes(signature))
+            ])
+
+
+def remove_unreferenced(sha256s):
+    # Drops the fingerprints (and their buckets) of content no file holds any more
+    sha256s = [sha256 for sha256 in sha256s if sha256]
+    if sha256s:
+        ContentFingerprint.objects.filter(sha256__in=sha256s).exclude(
+            sha256__in=ProjectFile.objects.filter(sha256__in=sha256s).values('sha256')
+        ).delete()
+
+
+def _matching_content(signatures):
+    """
+    {sha256: {other sha256: similarity}} for {sha256: signature}. Candidates are the fingerprints sharing
+    an LSH bucket (found for all signatures with one query per LOOKUP_CHUNK_SIZE buckets); they are kept
+    when the estimated similarity reaches MIN_SIMILARITY. Identical content (the same sha256) is a match
+    with similarity 1.
+    """
+    wanted = defaultdict(list) # (band, bucket) -> sha256s whose signature falls into it
+    for sha256, signature in signatures.items():
+        for band, bucket in enumerate(fingerprints.band_hashes(signature)):
+            wanted[band, bucket].append(sha256)
+
+    candidates = defaultdict(set) # sha256 -> candidate fingerprint ids
+    for chunk in _chunks({bucket for _, bucket in wanted}):
+        rows = LshBucket.objects.filter(bucket__in=chunk).values_list('band', 'bucket', 'fingerprint_id')
+        for band, bucket, fingerprint_id in rows:
+            for sha256 in wanted.get((band, bucket), ()):
+                candidates[sha256].add(fingerprint_id)
+
+    stored = {}
+    for chunk in _chunks(set().union(*candidates.values())):
+        for pk, sha256, signature in ContentFingerprint.objects.filter(pk__in=chunk).values_list(
+            'pk', 'sha256', 'signature'
+        ):
+            stored[pk] = (sha256, fingerprints.unpack(signature))
+    matches = {sha256: {sha256: 1.0} for sha256 in signatures}
+    for sha256, fingerprint_ids in candidates.items():
+        for fingerprint_id in fingerprint_ids:
+            other, other_signature = stored[fingerprint_id]
+            if other == sha256:
+                continue
+            similarity = fingerprints.estimate_similarity(signatures[sha256], other_signature)
+            if similarity >= MIN_SIMILARITY:
+                matches[sha256][other] = similarity
+    return matches
+
+
+def _matching_files(matches, project_id):
+    # {sha256: [match, ...]} with the files in other projects holding the matching content, best first
+    holders = defaultdict(list)
+    for chunk in _chunks(set().union(*matches.values())):
+        rows = (
+            ProjectFile.objects.filter(sha256__in=chunk)
+            .exclude(project_id=project_id)
+            .values_list('id', 'project_id', 'project__title', 'original_filename', 'sha256')
+        )
+        for file_id, other_project_id, project_title, filename, sha256 in rows:
+            holders[sha256].append({
+                'file_id': file_id,
+                'project_id': other_project_id,
+                'project_title': project_title,
+                'filename': filename,
+            })
+    result = {}
+    for sha256, others in matches.items():
+        found = [
+            {**holder, 'similarity': round(similarity, 3)}
+            for other, similarity in others.items() for holder in holders[other]
+        ]
+        found.sort(key=lambda match: (-match['similarity'], match['file_id']))
+        result[sha256] = found[:MAX_MATCHES]
+    return result
+
+
+def near_duplicates(project_file):
+    # Near-duplicates of one file in other projects, or None when its content has no fingerprint
+    if not project_file.sha256:
+        return None
+    signature = ContentFingerprint.objects.filter(sha256=project_file.sha256).values_list('signature', flat=True).first()
+    if signature is None:
+        return None
+    signatures = {project_file.sha256: fingerprints.unpack(signature)}
+    return _matching_files(_matching_content(signatures), project_file.project_id)[project_file.sha256]
+
+
+def project_report(project_id):
+    """
+    The project's files that have near-duplicates in other projects:
+    [{'file_id', 'filename', 'matches': [{'file_id', 'project_id', 'project_title', 'filename', 'similarity'}]}].
+    A fixed number of queries per LOOKUP_CHUNK_SIZE files, whatever the size of the corpus.
+    """
+    files = list(
+        ProjectFile.objects.filter(project_id=project_id).exclude(sha256='')
+        .order_by('original_filename', 'id').values_list('id', 'original_filename', 'sha256')
+    )
+    signatures = {
+        sha256: fingerprints.unpack(signature)
+        for sha256, signature in ContentFingerprint.objects.filter(
+            sha256__in=ProjectFile.objects.filter(project_id=project_id).values('sha256')
+        ).values_list('sha256', 'signature')
+    }
+    if not signatures:
+        return []
+    matches = _matching_files(_matching_content(signatures), project_id)
+    return [
+        {'file_id': file_id, 'filename': filename, 'matches': matches[sha256]}
+        for file_id, filename, sha256 in files if matches.get(sha256)
+    ]
@@ -0,0 +1,127 @@
+# backend/apps/projects/exports.py
+# Streaming catalog export (CSV / JSONL) for reporting.
+# Projects are read with QuerySet.iterator() (a server-side cursor on PostgreSQL) and processed in
+# batches: each batch gets its collaborators and files in one query each and is encoded and yielded
+# before the next one is read, so memory stays constant whatever the catalog size.
+import csv
+import io
+import itertools
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.negotiation import BaseContentNegotiation
+
+from . import fast_serializers, search
+from .models import Project
+
+BATCH_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson'}
+
+CSV_COLUMNS = [
+    'id', 'title', 'description', 'type', 'department', 'year', 'created_at', 'updated_at',
+    'owner_id', 'owner_email', 'owner_name', 'collaborator_emails',
+    'file_count', 'file_names', 'file_types', 'files_metadata',
+]
+
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    # The export writes its own bytes, so the Accept header (e.g. text/csv) must not cause a 406
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def accepts_gzip(request):
+    """
+    Whether the Accept-Encoding header allows gzip: listed (or covered by `*`) with a non-zero q-value,
+    so "gzip;q=0" is a refusal.
+    """
+    qvalues = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            qvalues[name.lower()] = q
+    return qvalues.get('gzip', qvalues.get('*', 0.0)) > 0
+
+
+def export_queryset(selected, query=None):
+    """
+    Projects matching the list filters: {field: value} from get_facet_filters() and an optional ?q= search.
+    Ordered by id, so an export is stable and cheap to page through on the primary key.
+    """
+    queryset = search.matching_projects(query) if query else Project.objects.all()
+    return queryset.filter(**selected).order_by('id') # Every match: exports aren't capped like ranked search
+
+
+def iter_project_batches(queryset, context, batch_size=BATCH_SIZE):
+    # Yields lists of ProjectSerializer-shaped dicts, `batch_size` projects at a time
+    plan = fast_serializers.project_plan()
+    rows = queryset.values(*fast_serializers.project_columns(plan)).iterator(chunk_size=batch_size)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield fast_serializers.render_projects(fast_serializers.attach_relations(batch, plan), context, plan)
+
+
+def _csv_row(project):
+    owner, files = project['owner'], project['files']
+    return [
+        project['id'], project['title'], project['description'], project['type'], project['department'],
+        project['year'], project['created_at'], project['updated_at'],
+        owner['id'], owner['email'], f"{owner['first_name']} {owner['last_name']}".strip(),
+        ';'.join(user['email'] for user in project['collaborators']),
+        len(files),
+        ';'.join(f['original_filename'] for f in files),
+        ';'.join(f['file_type'] for f in files),
+        json.dumps([f['extracted_metadata'] for f in files], cls=DjangoJSONEncoder, ensure_ascii=False),
+    ]
+
+
+def iter_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for batch in batches:
+        writer.writerows(_csv_row(project) for project in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_jsonl(batches):
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=DjangoJSONEncoder().default)
+    for batch in batches:
+        yield ''.join(encoder.encode(project) + '\n' for project in batch).encode()
+
+
+def iter_gzip(chunks, level=6):
+    # Compresses on the fly; wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(export_format, queryset, context, gzip=False, batch_size=BATCH_SIZE):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format: {export_format}')
+    batches = iter_project_batches(queryset, context, batch_size)
+    chunks = iter_csv(batches) if export_format == 'csv' else iter_jsonl(batches)
+    return iter_gzip(chunks) if gzip else chunks
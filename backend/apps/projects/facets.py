@@ -0,0 +1,94 @@
+# backend/apps/projects/facets.py
+# Facet counts for project browsing (type / department / year).
+# Counts live in ProjectFacetCount, one row per (type, department, year) cell, and are
+# adjusted incrementally from the Project save/delete signals. Reading facets is a single
+# query over that table, which is tiny compared to Project.
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from . import caching
+from .filters import FACET_FIELDS
+from .models import Project, ProjectFacetCount
+
+
+def facet_key(project):
+    return (project.type, project.department or '', project.year)
+
+
+def apply_deltas(deltas):
+    """
+    Applies {(type, department, year): delta} to the facet table.
+    Used by the signal handlers and by bulk code paths that bypass signals.
+    """
+    if any(deltas.values()):
+        caching.invalidate([caching.FACETS_TAG])
+    with transaction.atomic():
+        for (project_type, department, year), delta in deltas.items():
+            if not delta:
+                continue
+            # get_or_create falls back to the existing row when a concurrent insert wins the unique constraint
+            cell, created = ProjectFacetCount.objects.get_or_create(
+                type=project_type, department=department, year=year, defaults={'count': delta}
+            )
+            if not created:
+                ProjectFacetCount.objects.filter(pk=cell.pk).update(count=F('count') + delta)
+
+
+def rebuild():
+    # Recomputes the whole table from Project; for backfills and after bulk imports
+    caching.invalidate([caching.FACETS_TAG])
+    with transaction.atomic():
+        ProjectFacetCount.objects.all().delete()
+        rows = (
+            Project.objects.order_by()
+            .values('type', 'department', 'year')
+            .annotate(total=Count('id'))
+        )
+        ProjectFacetCount.objects.bulk_create([
+            ProjectFacetCount(type=row['type'], department=row['department'] or '', year=row['year'], count=row['total'])
+            for row in rows
+        ])
+
+
+def _breakdown(cells, selected):
+    # Disjunctive faceting: each dimension is counted with the *other* selected filters applied,
+    # so the client can still see the alternatives for the dimension it already filtered on.
+    facets = {field: Counter() for field in FACET_FIELDS}
+    for cell, count in cells:
+        values = dict(zip(FACET_FIELDS, cell))
+        for field in FACET_FIELDS:
+            if all(values[other] == selected[other] for other in selected if other != field):
+                facets[field][values[field]] += count
+    return {
+        field: [
+            {'value': value, 'count': count}
+            for value, count in sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))
+            if count > 0 and value not in ('', None) # Projects without a department/year aren't a facet value
+        ]
+        for field, counter in facets.items()
+    }
+
+
+def empty_facets():
+    return {field: [] for field in FACET_FIELDS}
+
+
+def get_facets(selected):
+    # Facet breakdown of the whole catalog under the given {field: value} filters. None (filters that
+    # can't match anything, see get_facet_filters) gives empty facets, like the empty list it goes with
+    if selected is None:
+        return empty_facets()
+    cells = (
+        ((row[0], row[1], row[2]), row[3])
+        for row in ProjectFacetCount.objects.filter(count__gt=0).values_list('type', 'department', 'year', 'count')
+    )
+    return _breakdown(cells, selected)
+
+
+def get_facets_for_cells(cells, selected):
+    # Facet breakdown of an explicit result set, e.g. full-text search hits: ((type, department, year), count)
+    if selected is None:
+        return empty_facets()
+    return _breakdown(cells, selected)
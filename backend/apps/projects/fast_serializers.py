@@ -0,0 +1,330 @@
+# backend/apps/projects/fast_serializers.py
+# Read-only fast path for project listings.
+# Builds exactly the representation of ProjectSerializer from values() rows instead of model instances.
+# The field plan (output name, row key, converter) is compiled once from the DRF serializers themselves,
+# so field order, formats and nesting follow them; only the per-row work is done here.
+# URLs of the method fields are reversed once per response and filled in per file.
+# Plans can also be compiled for a subset of fields (?fields= / ?expand=); relations outside it aren't queried.
+import functools
+from collections import defaultdict
+
+from django.db.models import Count
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import ISO_8601, api_settings
+
+from apps.users.models import User
+from .models import Project, ProjectFile
+from .serializers import PREVIEW_KINDS, ProjectFileSerializer, ProjectSerializer
+
+# Placeholder ids used to reverse a URL once and turn it into a format string
+_PK_SENTINEL = 987654321012
+_FILE_SENTINEL = 987654321013
+
+
+def _identity_choices(field):
+    return all(str(key) == key for key in field.choice_strings_to_values.values())
+
+
+def _datetime_converter(field):
+    # Same steps as DateTimeField.to_representation for the default ISO 8601 format
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def convert(value):
+        value = field.enforce_timezone(value) if tz is None else value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _converter(field):
+    # None means the row value is already its own representation
+    if isinstance(field, serializers.ChoiceField):
+        return None if _identity_choices(field) else field.to_representation
+    if isinstance(field, serializers.CharField):
+        return _strict_type(str)
+    if isinstance(field, serializers.IntegerField):
+        return _strict_type(int)
+    if isinstance(field, serializers.JSONField) and not field.binary:
+        return None
+    return field.to_representation # Anything else goes through DRF, still without building instances
+
+
+def _strict_type(cls):
+    # str(value)/int(value) as DRF does, skipped for values that already have the right type
+    def convert(value):
+        return value if type(value) is cls else cls(value)
+    return convert
+
+
+# --- Method fields: (serializer class, field name) -> (row keys, binder(context) -> fn(row)) ---
+
+METHOD_FIELDS = {}
+
+
+def method_field(serializer_class, name, columns):
+    def decorator(binder):
+        METHOD_FIELDS[(serializer_class, name)] = (tuple(columns), binder)
+        return binder
+    return decorator
+
+
+def _url_template(request, url_name, **kwargs):
+    url = reverse(url_name, kwargs=kwargs)
+    if request:
+        url = request.build_absolute_uri(url)
+    url = url.replace('{', '{{').replace('}', '}}')
+    return url.replace(str(_PK_SENTINEL), '{pk}').replace(str(_FILE_SENTINEL), '{file_id}')
+
+
+@method_field(ProjectFileSerializer, 'file_url', ['id', 'project_id', 'file'])
+def bind_file_url(context):
+    template = _url_template(
+        context.get('request'), 'project-file-download', pk=_PK_SENTINEL, file_id=_FILE_SENTINEL
+    )
+
+    def file_url(row):
+        if not row['file']:
+            return None
+        return template.format(pk=row['project_id'], file_id=row['id'])
+    return file_url
+
+
+@method_field(ProjectFileSerializer, 'previews', ['id', 'project_id', 'file_type', 'processing_status'])
+def bind_previews(context):
+    request = context.get('request')
+    templates = {
+        file_type: [
+            (kind, _url_template(request, 'project-file-preview', pk=_PK_SENTINEL, file_id=_FILE_SENTINEL, kind=kind))
+            for kind in kinds
+        ]
+        for file_type, kinds in PREVIEW_KINDS.items()
+    }
+
+    def previews(row):
+        if row['processing_status'] != ProjectFile.ProcessingStatus.DONE:
+            return {}
+        return {
+            kind: template.format(pk=row['project_id'], file_id=row['id'])
+            for kind, template in templates.get(row['file_type'], [])
+        }
+    return previews
+
+
+class RowPlan:
+    """
+    Compiled, read-only equivalent of a DRF serializer that works on dict rows.
+    Nested serializers become nested plans reading a dict (or list of dicts) under the field's source.
+
+    `fields` limits the output to those names (None: every readable field) and `expand` lists the nested
+    serializers rendered as objects (None: all of them); the others are rendered as their primary keys.
+    `extra` maps computed output names to row keys, for values that have no serializer field; they are only
+    output when named in `fields`, so the default plan matches the serializer exactly.
+    """
+    def __init__(self, serializer, fields=None, expand=None, extra=None):
+        self.steps = [] # (output name, row key, kind, payload)
+        self.columns = [] # Row keys this plan reads, for values()
+        self.relations = {} # Nested field name -> True when expanded, False when rendered as pk(s)
+        for field in serializer._readable_fields:
+            name = field.field_name
+            if fields is not None and name not in fields:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                columns, binder = METHOD_FIELDS[(type(serializer), name)]
+                self.steps.append((name, None, 'method', binder))
+                self.columns += [column for column in columns if column not in self.columns]
+            elif isinstance(field, serializers.BaseSerializer):
+                expanded = expand is None or name in expand
+                many = isinstance(field, serializers.ListSerializer)
+                self.relations[name] = expanded
+                if not expanded:
+                    # Primary keys: the FK column itself, or a list of ids filled in by the loader
+                    source = field.source if many else f'{field.source}_id'
+                    self.steps.append((name, source, 'value', None))
+                elif many:
+                    self.steps.append((name, field.source, 'many', RowPlan(field.child)))
+                else:
+                    self.steps.append((name, field.source, 'one', RowPlan(field)))
+            else:
+                if '.' in field.source or field.source == '*':
+                    raise TypeError(f'{type(serializer).__name__}.{name}: dotted sources have no fast path')
+                kind = 'datetime' if isinstance(field, serializers.DateTimeField) else 'value'
+                payload = field if kind == 'datetime' else _converter(field)
+                self.steps.append((name, field.source, kind, payload))
+                if field.source not in self.columns:
+                    self.columns.append(field.source)
+        for name, source in (extra or {}).items():
+            if fields is not None and name in fields:
+                self.steps.append((name, source, 'value', None))
+
+    def has(self, name):
+        return any(step[0] == name for step in self.steps)
+
+    def nested(self, name):
+        return next(step[3] for step in self.steps if step[0] == name)
+
+    def bind(self, context):
+        # Resolves per-response state (URL templates, current timezone) into a row -> dict function
+        steps = []
+        for name, source, kind, payload in self.steps:
+            if kind == 'method':
+                steps.append((name, None, payload(context)))
+            elif kind == 'many':
+                steps.append((name, source, _many(payload.bind(context))))
+            elif kind == 'one':
+                steps.append((name, source, payload.bind(context)))
+            elif kind == 'datetime':
+                steps.append((name, source, _datetime_converter(payload)))
+            else:
+                steps.append((name, source, payload))
+
+        def render(row):
+            item = {}
+            for name, source, convert in steps:
+                if source is None: # Method field: gets the whole row
+                    item[name] = convert(row)
+                    continue
+                value = row[source]
+                item[name] = value if value is None or convert is None else convert(value)
+            return item
+        return render
+
+    def render(self, rows, context):
+        render = self.bind(context)
+        return [render(row) for row in rows]
+
+
+def _many(render):
+    def render_many(rows):
+        return [render(row) for row in rows]
+    return render_many
+
+
+# --- Projects ---
+
+# Computed values that can be requested with ?fields= but aren't ProjectSerializer fields
+PROJECT_EXTRA_FIELDS = {'file_count': 'file_count'}
+# Named field sets for ?fields=; `card` is what ProjectCard renders
+PROJECT_FIELD_PRESETS = {
+    'card': (('id', 'title', 'description', 'type', 'department', 'year', 'owner', 'file_count'), ('owner',)),
+}
+
+
+@functools.cache
+def project_plan(fields=None, expand=None):
+    # Compiled on first use (once the app registry and URLconf are loaded) and once per field selection
+    return RowPlan(ProjectSerializer(), fields=fields, expand=expand, extra=PROJECT_EXTRA_FIELDS)
+
+
+def _split_param(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_field_selection(query_params):
+    """
+    Returns the plan for ?fields= (comma-separated names, or a preset such as `card`) and ?expand=
+    (nested relations to render as objects). Without either, the full ProjectSerializer representation.
+    With only ?expand=, every field is returned and relations not listed come back as ids.
+    `id` is always included.
+    """
+    fields_param = query_params.get('fields', '').strip()
+    expand_param = query_params.get('expand')
+    if not fields_param and expand_param is None:
+        return project_plan()
+
+    full = project_plan()
+    allowed = [step[0] for step in full.steps] + list(PROJECT_EXTRA_FIELDS)
+    expand = _split_param(expand_param or '')
+    if fields_param in PROJECT_FIELD_PRESETS:
+        fields, preset_expand = PROJECT_FIELD_PRESETS[fields_param]
+        expand = expand or list(preset_expand)
+    elif fields_param:
+        fields = _split_param(fields_param)
+    else:
+        fields = [step[0] for step in full.steps]
+
+    errors = {}
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        errors['fields'] = f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(allowed)}."
+    not_nested = [name for name in expand if name not in full.relations]
+    if not_nested:
+        errors['expand'] = f"Cannot expand: {', '.join(not_nested)}. Choose from: {', '.join(full.relations)}."
+    if errors:
+        raise ValidationError(errors)
+    # id is always returned: clients key on it, and cached pages are tagged with it
+    return project_plan(tuple(sorted({'id', *fields})), tuple(sorted(set(expand))))
+
+
+def project_columns(plan=None):
+    # values() columns for the page query: the requested own fields plus, when expanded, the owner joined in.
+    # id and created_at are always read: relations are keyed by id and the cursor position is created_at.
+    plan = plan or project_plan()
+    columns = ['id', 'created_at', 'owner_id', *plan.columns]
+    if plan.relations.get('owner'):
+        columns += [f'owner__{column}' for column in plan.nested('owner').columns]
+    return list(dict.fromkeys(columns))
+
+
+def attach_relations(rows, plan=None):
+    """
+    Adds the relations `plan` needs to project rows from project_columns(plan): 'owner', 'collaborators'
+    and 'files' sub-rows (or id lists), and 'file_count', with at most one query each.
+    Relations the plan doesn't output are not queried. Mirrors select_related('owner') + prefetch_related().
+    """
+    plan = plan or project_plan()
+    ids = [row['id'] for row in rows]
+    if plan.relations.get('owner'):
+        owner_columns = plan.nested('owner').columns
+        for row in rows:
+            row['owner'] = {column: row[f'owner__{column}'] for column in owner_columns}
+    if 'collaborators' in plan.relations:
+        collaborators = defaultdict(list)
+        if ids and plan.relations['collaborators']:
+            for user in User.objects.filter(collaborating_projects__in=ids).values(
+                'collaborating_projects', *plan.nested('collaborators').columns
+            ):
+                collaborators[user.pop('collaborating_projects')].append(user)
+        elif ids:
+            for project_id, user_id in Project.collaborators.through.objects.filter(
+                project_id__in=ids
+            ).values_list('project_id', 'user_id'):
+                collaborators[project_id].append(user_id)
+        for row in rows:
+            row['collaborators'] = collaborators.get(row['id'], [])
+    if 'files' in plan.relations:
+        files = defaultdict(list)
+        if ids and plan.relations['files']:
+            for project_file in ProjectFile.objects.filter(project_id__in=ids).values(*plan.nested('files').columns):
+                files[project_file['project_id']].append(project_file)
+        elif ids:
+            for project_id, file_id in ProjectFile.objects.filter(project_id__in=ids).values_list('project_id', 'id'):
+                files[project_id].append(file_id)
+        for row in rows:
+            row['files'] = files.get(row['id'], [])
+    if plan.has('file_count'):
+        counts = {}
+        if ids:
+            counts = dict(
+                ProjectFile.objects.filter(project_id__in=ids).order_by()
+                .values('project_id').annotate(total=Count('id')).values_list('project_id', 'total')
+            )
+        for row in rows:
+            row['file_count'] = counts.get(row['id'], 0)
+    return rows
+
+
+def project_rows(project_ids, plan=None):
+    # Rows for the given ids, in that order; for result lists that aren't a queryset (e.g. ranked search hits)
+    by_id = {row['id']: row for row in Project.objects.filter(id__in=project_ids).values(*project_columns(plan))}
+    return attach_relations([by_id[pk] for pk in project_ids if pk in by_id], plan)
+
+
+def render_projects(rows, context, plan=None):
+    return (plan or project_plan()).render(rows, context)
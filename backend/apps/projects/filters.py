@@ -0,0 +1,37 @@
+# backend/apps/projects/filters.py
+from rest_framework import filters
+
+# Query params that filter the catalog by exact match; also the facet dimensions
+FACET_FIELDS = ('type', 'department', 'year')
+
+
+def get_facet_filters(request):
+    """
+    Returns {field: value} for the ?type=, ?department= and ?year= params present on the request,
+    or None when a value can't match anything (e.g. a non-numeric year).
+    """
+    params = request.query_params
+    selected = {}
+    for field in FACET_FIELDS:
+        value = params.get(field)
+        if not value:
+            continue
+        if field == 'year':
+            try:
+                value = int(value)
+            except ValueError:
+                return None
+        selected[field] = value
+    return selected
+
+
+class ProjectFilterBackend(filters.BaseFilterBackend):
+    """
+    Filters projects by exact ?type=, ?department= and ?year= query params.
+    These match the composite indexes declared on Project.Meta.
+    """
+    def filter_queryset(self, request, queryset, view):
+        selected = get_facet_filters(request)
+        if selected is None:
+            return queryset.none() # A non-numeric year can't match anything
+        return queryset.filter(**selected)
@@ -0,0 +1,246 @@
+# backend/apps/projects/imports.py
+# Bulk import of legacy projects from a manifest (CSV or JSON Lines) plus a directory of files.
+# The manifest is processed in batches; each batch resolves its owners/collaborators by email in one query,
+# bulk-inserts projects, collaborator links and files, and commits on its own, so an interrupted import
+# can resume after the last committed batch (see load_checkpoint/save_checkpoint).
+# bulk_create skips the model signals, so facet counts, the search index, processing jobs and the
+# response cache are updated here explicitly, once per batch.
+import csv
+import hashlib
+import itertools
+import json
+import os
+from collections import Counter
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from apps.users.models import User
+from . import archives, caching, facets, search
+from .models import FileBlob, FileProcessingJob, Project, ProjectFile
+
+BATCH_SIZE = 500
+MANIFEST_FORMATS = ('csv', 'jsonl')
+READ_SIZE = 64 * 1024
+
+# Manifest columns; list columns are ';'-separated in CSV and may be arrays in JSONL
+MANIFEST_COLUMNS = ['title', 'description', 'type', 'department', 'year', 'owner_email', 'collaborator_emails', 'files']
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def guess_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_manifest(path, manifest_format=None):
+    """
+    Yields manifest rows as dicts, in file order. Blank JSONL lines are skipped.
+    """
+    manifest_format = manifest_format or guess_format(path)
+    if manifest_format not in MANIFEST_FORMATS:
+        raise ManifestError(f'Unknown manifest format: {manifest_format}')
+    with open(path, newline='' if manifest_format == 'csv' else None, encoding='utf-8') as manifest:
+        if manifest_format == 'csv':
+            reader = csv.DictReader(manifest)
+            missing = {'title', 'owner_email'} - set(reader.fieldnames or ())
+            if missing:
+                raise ManifestError(f"Manifest is missing the column(s): {', '.join(sorted(missing))}")
+            yield from reader
+            return
+        for number, line in enumerate(manifest, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ManifestError(f'Line {number} is not valid JSON: {e}')
+            if not isinstance(row, dict):
+                raise ManifestError(f'Line {number} is not a JSON object.')
+            yield row
+
+
+def count_rows(path, manifest_format=None):
+    # Total for the progress bar; one extra pass over the manifest, without building projects
+    return sum(1 for _ in read_manifest(path, manifest_format))
+
+
+def _split(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _email(value):
+    return str(value or '').strip().lower()
+
+
+def load_checkpoint(path, manifest_path):
+    # Number of manifest rows already committed by a previous run of the same manifest (0 if none)
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('manifest') != os.path.abspath(manifest_path):
+        raise ManifestError(f"Checkpoint {path} belongs to another manifest: {state.get('manifest')}")
+    return int(state.get('rows', 0))
+
+
+def save_checkpoint(path, manifest_path, rows):
+    # Written to a temp file and renamed over the old one, so a crash never leaves half a checkpoint
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'manifest': os.path.abspath(manifest_path), 'rows': rows}, f)
+    os.replace(tmp, path)
+
+
+class Importer:
+    """
+    Imports manifest rows batch by batch. Users are resolved with one query per batch for the emails
+    not seen before; unknown owners skip the row, unknown collaborators and missing files are reported.
+    """
+    def __init__(self, files_root, batch_size=BATCH_SIZE):
+        self.files_root = os.path.abspath(files_root) if files_root else None
+        self.batch_size = batch_size
+        self.user_ids = {} # lower-cased email -> user id (None for unknown emails)
+        self.projects = 0
+        self.files = 0
+        self.skipped = [] # {'row', 'reason'}
+
+    def run(self, rows, start=0, on_batch=None):
+        """
+        Imports `rows` (an iterable of manifest dicts), skipping the first `start` of them.
+        After each committed batch, calls on_batch(rows_done, batch_rows).
+        """
+        rows = itertools.islice(enumerate(rows, 1), start, None)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            self.import_batch(batch)
+            done = batch[-1][0]
+            if on_batch is not None:
+                on_batch(done, len(batch))
+
+    def _resolve_users(self, batch):
+        emails = {_email(row.get('owner_email')) for _, row in batch}
+        for _, row in batch:
+            emails.update(_email(email) for email in _split(row.get('collaborator_emails')))
+        emails -= set(self.user_ids) | {''}
+        if not emails:
+            return
+        self.user_ids.update(dict.fromkeys(emails))
+        self.user_ids.update(
+            User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+            .values_list('email_lower', 'id')
+        )
+
+    def _build_project(self, number, row):
+        title = str(row.get('title') or '').strip()
+        owner_id = self.user_ids.get(_email(row.get('owner_email')))
+        project_type = str(row.get('type') or Project.ProjectType.OTHER).strip().upper()
+        year = row.get('year')
+        if not title:
+            reason = 'missing title'
+        elif owner_id is None:
+            reason = f"unknown owner {row.get('owner_email')!r}"
+        elif project_type not in Project.ProjectType.values:
+            reason = f'unknown type {project_type!r}'
+        elif year not in (None, '') and not str(year).strip().isdigit():
+            reason = f'invalid year {year!r}'
+        else:
+            return Project(
+                owner_id=owner_id,
+                title=title[:Project._meta.get_field('title').max_length],
+                description=str(row.get('description') or ''),
+                type=project_type,
+                department=str(row.get('department') or '').strip()[:Project._meta.get_field('department').max_length],
+                year=int(year) if year not in (None, '') else None,
+            )
+        self.skipped.append({'row': number, 'reason': reason})
+        return None
+
+    def _source_path(self, name):
+        # Absolute path of a manifest file entry, or None when it escapes the files root
+        path = archives.clean_path(name) if self.files_root else None
+        if path is None:
+            return None, None
+        return path, os.path.join(self.files_root, *path.split('/'))
+
+    def _store_file(self, source):
+        hasher = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for data in iter(lambda: f.read(READ_SIZE), b''):
+                hasher.update(data)
+            f.seek(0)
+            content = File(f, name=os.path.basename(source))
+            content.size = os.path.getsize(source)
+            sha256 = hasher.hexdigest()
+            return sha256, FileBlob.acquire(sha256, content, source)
+
+    def import_batch(self, batch):
+        # One transaction per batch; a failure rolls back the batch and removes the blobs it stored
+        self._resolve_users(batch)
+        created_blobs = []
+        try:
+            with transaction.atomic():
+                entries = [(number, row, self._build_project(number, row)) for number, row in batch]
+                entries = [entry for entry in entries if entry[2] is not None]
+                projects = Project.objects.bulk_create([project for _, _, project in entries], batch_size=self.batch_size)
+
+                Through = Project.collaborators.through
+                links, files = [], []
+                for (number, row, _), project in zip(entries, projects):
+                    collaborators = set()
+                    for email in _split(row.get('collaborator_emails')):
+                        user_id = self.user_ids.get(_email(email))
+                        if user_id is None:
+                            self.skipped.append({'row': number, 'reason': f'unknown collaborator {email!r}'})
+                        elif user_id != project.owner_id:
+                            collaborators.add(user_id)
+                    links += [Through(project_id=project.pk, user_id=user_id) for user_id in sorted(collaborators)]
+
+                    for name in _split(row.get('files')):
+                        path, source = self._source_path(name)
+                        if source is None or not os.path.isfile(source):
+                            self.skipped.append({'row': number, 'reason': f'missing file {name!r}'})
+                            continue
+                        if len(path) > ProjectFile._meta.get_field('original_filename').max_length:
+                            self.skipped.append({'row': number, 'reason': f'path too long {name!r}'})
+                            continue
+                        sha256, blob = self._store_file(source)
+                        if blob.ref_count == 1:
+                            created_blobs.append(blob.file.name)
+                        files.append(ProjectFile(
+                            project=project,
+                            file=blob.file.name,
+                            blob=blob,
+                            sha256=sha256,
+                            original_filename=path,
+                            file_type=ProjectFile.guess_file_type(path),
+                        ))
+
+                Through.objects.bulk_create(links, batch_size=self.batch_size)
+                created = ProjectFile.objects.bulk_create(files, batch_size=self.batch_size)
+                FileProcessingJob.objects.bulk_create(
+                    [FileProcessingJob(project_file=project_file) for project_file in created], batch_size=self.batch_size
+                )
+
+                keys = Counter(facets.facet_key(project) for project in projects)
+                facets.apply_deltas(keys)
+                for project in projects:
+                    search.index_project(project) # Includes the file names inserted above
+                tags = {caching.SEARCH_TAG}
+                for key in keys:
+                    tags.update(caching.membership_tags(key))
+                caching.invalidate(sorted(tags))
+        except Exception:
+            archives.discard_blobs(created_blobs)
+            raise
+        self.projects += len(projects)
+        self.files += len(created)
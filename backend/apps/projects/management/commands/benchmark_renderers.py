@@ -0,0 +1,63 @@
+# backend/apps/projects/management/commands/benchmark_renderers.py
+import gzip
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.projects import fast_serializers
+from apps.projects.benchmarking import best_of, generate_projects, make_request
+from apps.projects.models import Project
+from codenest_core.renderers import FastJSONParser, FastJSONRenderer, MessagePackParser, MessagePackRenderer, orjson
+
+CODECS = [
+    ('json (drf)', JSONRenderer, JSONParser),
+    ('json (orjson)' if orjson else 'json (fast, no orjson)', FastJSONRenderer, FastJSONParser),
+    ('msgpack', MessagePackRenderer, MessagePackParser),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares encode/decode time and payload size of the API renderers on generated project listings. "
+        "The data is created in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Projects per listing.")
+        parser.add_argument('--fields', default='', help="?fields= selection for the listing, e.g. 'card'.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement; the best time is reported.")
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        plan = fast_serializers.parse_field_selection({'fields': options['fields']} if options['fields'] else {})
+        request = make_request()
+        with transaction.atomic():
+            generate_projects(sizes[-1])
+            self.stdout.write(
+                f"{'rows':>7} {'codec':<24} {'encode (ms)':>12} {'decode (ms)':>12} {'bytes':>11} {'gzip bytes':>11}"
+            )
+            for size in sizes:
+                rows = list(Project.objects.values(*fast_serializers.project_columns(plan)).order_by('-created_at', '-id')[:size])
+                data = {
+                    'next': None, 'previous': None,
+                    'results': fast_serializers.render_projects(
+                        fast_serializers.attach_relations(rows, plan), {'request': request}, plan
+                    ),
+                }
+                self._compare(size, data, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _compare(self, size, data, repeat):
+        for name, renderer_class, parser_class in CODECS:
+            renderer, parser = renderer_class(), parser_class()
+            encode_time, payload = best_of(repeat, renderer.render, data, renderer.media_type, {})
+            decode_time, decoded = best_of(repeat, lambda: parser.parse(io.BytesIO(payload), parser.media_type, {}))
+            if decoded != data:
+                raise CommandError(f"{name} does not round-trip the listing of {size} projects.")
+            self.stdout.write(
+                f"{size:>7} {name:<24} {encode_time * 1000:>12.2f} {decode_time * 1000:>12.2f} "
+                f"{len(payload):>11} {len(gzip.compress(payload)):>11}"
+            )
@@ -0,0 +1,50 @@
+# backend/apps/projects/management/commands/benchmark_serializers.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.projects import fast_serializers
+from apps.projects.benchmarking import best_of, generate_projects, make_request
+from apps.projects.models import Project
+from apps.projects.serializers import ProjectSerializer
+
+ORDERING = ('-created_at', '-id')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares ProjectSerializer with the values()-based fast path on generated projects and checks that "
+        "both render identical JSON. The data is created in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Row counts to measure.")
+        parser.add_argument('--files', type=int, default=3, help="Files per project.")
+        parser.add_argument('--collaborators', type=int, default=2, help="Collaborators per project.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per size; the best time is reported.")
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        request = make_request()
+        with transaction.atomic():
+            generate_projects(sizes[-1], options['files'], options['collaborators'])
+            self.stdout.write(f"{'rows':>8} {'drf (s)':>10} {'fast (s)':>10} {'speedup':>8}")
+            for size in sizes:
+                drf_time, drf_bytes = best_of(options['repeat'], self._render_drf, size, request)
+                fast_time, fast_bytes = best_of(options['repeat'], self._render_fast, size, request)
+                if drf_bytes != fast_bytes:
+                    raise CommandError(f"Fast path output differs from ProjectSerializer at {size} rows.")
+                self.stdout.write(f"{size:>8} {drf_time:>10.4f} {fast_time:>10.4f} {drf_time / fast_time:>7.1f}x")
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-identical at every size."))
+
+    def _render_drf(self, size, request):
+        queryset = (
+            Project.objects.select_related('owner').prefetch_related('collaborators', 'files').order_by(*ORDERING)[:size]
+        )
+        return JSONRenderer().render(ProjectSerializer(queryset, many=True, context={'request': request}).data)
+
+    def _render_fast(self, size, request):
+        rows = list(Project.objects.values(*fast_serializers.project_columns()).order_by(*ORDERING)[:size])
+        rows = fast_serializers.attach_relations(rows)
+        return JSONRenderer().render(fast_serializers.render_projects(rows, {'request': request}))
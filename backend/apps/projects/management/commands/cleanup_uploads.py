@@ -0,0 +1,12 @@
+# backend/apps/projects/management/commands/cleanup_uploads.py
+from django.core.management.base import BaseCommand
+
+from apps.projects import uploads
+
+
+class Command(BaseCommand):
+    help = "Aborts chunked uploads that have been idle longer than CHUNKED_UPLOAD_TTL_HOURS and deletes their staged data."
+
+    def handle(self, *args, **options):
+        count = uploads.cleanup_stale_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Aborted {count} stale upload sessions."))
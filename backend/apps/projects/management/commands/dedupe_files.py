@@ -0,0 +1,43 @@
+# backend/apps/projects/management/commands/dedupe_files.py
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.projects.models import FileBlob, ProjectFile
+
+
+class Command(BaseCommand):
+    help = "Moves ProjectFiles stored per upload into the content-addressed blob store, removing duplicate copies."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many files would be moved.")
+
+    def handle(self, *args, **options):
+        legacy = ProjectFile.objects.filter(blob__isnull=True).exclude(file='')
+        if options['dry_run']:
+            self.stdout.write(f"{legacy.count()} files are not blob-backed yet.")
+            return
+
+        moved = 0
+        for project_file in legacy.iterator():
+            storage, old_name = project_file.file.storage, project_file.file.name
+            if not storage.exists(old_name):
+                self.stderr.write(f"Missing file for ProjectFile {project_file.pk}: {old_name}")
+                continue
+            with storage.open(old_name, 'rb') as content:
+                if not project_file.sha256:
+                    hasher = hashlib.sha256()
+                    for chunk in content.chunks():
+                        hasher.update(chunk)
+                    project_file.sha256 = hasher.hexdigest()
+                    content.seek(0)
+                with transaction.atomic():
+                    blob = FileBlob.acquire(project_file.sha256, content, project_file.original_filename)
+                    ProjectFile.objects.filter(pk=project_file.pk).update(
+                        blob=blob, file=blob.file.name, sha256=project_file.sha256
+                    )
+            if blob.file.name != old_name:
+                storage.delete(old_name)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} files into the blob store."))
@@ -0,0 +1,43 @@
+# backend/apps/projects/management/commands/export_projects.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams the project catalog with owners, collaborators and file metadata as CSV or JSON Lines. "
+        "Takes the same filters as the project list; file URLs are written relative to the site."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=exports.EXPORT_FORMATS, default='csv', dest='export_format')
+        parser.add_argument('--output', '-o', default='-', help="File to write, or '-' for stdout.")
+        parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip.")
+        parser.add_argument('--type', help="Only projects of this type.")
+        parser.add_argument('--department', help="Only projects of this department.")
+        parser.add_argument('--year', type=int, help="Only projects of this academic year.")
+        parser.add_argument('--q', help="Only projects matching this full-text search.")
+        parser.add_argument('--batch-size', type=int, default=exports.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        selected = {field: options[field] for field in ('type', 'department', 'year') if options[field] is not None}
+        queryset = exports.export_queryset(selected, options['q'])
+        chunks = exports.iter_export(
+            options['export_format'], queryset, {'request': None},
+            gzip=options['gzip'], batch_size=options['batch_size'],
+        )
+        if options['output'] == '-':
+            if options['gzip'] and sys.stdout.isatty():
+                raise CommandError("Refusing to write gzip data to a terminal; use --output or a pipe.")
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+            return
+        with open(options['output'], 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
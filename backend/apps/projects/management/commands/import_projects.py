@@ -0,0 +1,58 @@
+# backend/apps/projects/management/commands/import_projects.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from apps.projects import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports projects and their files from a CSV/JSONL manifest with the columns "
+        f"{', '.join(imports.MANIFEST_COLUMNS)}. Owners and collaborators are matched by email; "
+        "'files' lists paths relative to --files-root (';'-separated in CSV). "
+        "Each batch commits on its own, and --checkpoint lets an interrupted import continue where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help="Path to the .csv or .jsonl manifest.")
+        parser.add_argument('--files-root', help="Directory the manifest's file paths are relative to.")
+        parser.add_argument('--format', choices=imports.MANIFEST_FORMATS, dest='manifest_format',
+                            help="Manifest format; guessed from the extension by default.")
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+        parser.add_argument('--checkpoint', help="File recording committed rows; an existing one resumes the import.")
+        parser.add_argument('--no-progress', action='store_true', help="Don't show a progress bar.")
+
+    def handle(self, *args, **options):
+        manifest, checkpoint = options['manifest'], options['checkpoint']
+        try:
+            start = imports.load_checkpoint(checkpoint, manifest)
+            total = None if options['no_progress'] else imports.count_rows(manifest, options['manifest_format'])
+            rows = imports.read_manifest(manifest, options['manifest_format'])
+        except (OSError, imports.ManifestError) as e:
+            raise CommandError(str(e))
+        if start:
+            self.stdout.write(f"Resuming after row {start}.")
+
+        importer = imports.Importer(options['files_root'], batch_size=options['batch_size'])
+        progress = tqdm(total=total, initial=start, unit='row', file=sys.stderr, disable=options['no_progress'])
+
+        def on_batch(done, count):
+            if checkpoint:
+                imports.save_checkpoint(checkpoint, manifest, done)
+            progress.update(count)
+            progress.set_postfix(projects=importer.projects, files=importer.files, refresh=False)
+
+        try:
+            importer.run(rows, start=start, on_batch=on_batch)
+        except (OSError, imports.ManifestError) as e:
+            raise CommandError(str(e))
+        finally:
+            progress.close()
+
+        for problem in importer.skipped:
+            self.stderr.write(f"Row {problem['row']}: {problem['reason']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.projects} projects and {importer.files} files; {len(importer.skipped)} problems."
+        ))
@@ -0,0 +1,23 @@
+# backend/apps/projects/management/commands/index_code.py
+from django.core.management.base import BaseCommand
+
+from apps.projects import codesearch
+from apps.projects.models import CodeDocument, ProjectFile
+from apps.projects.processing import jobs
+from apps.projects.processing.extractors import MAX_CODE_BYTES
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds processed code files that are not in the code search index yet (e.g. processed before "
+        "code search existed) to the trigram index."
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        for project_file in jobs.files_to_backfill([ProjectFile.FileType.CODE], CodeDocument):
+            with project_file.file.storage.open(project_file.file.name, 'rb') as source:
+                text = source.read(MAX_CODE_BYTES).decode('utf-8', 'replace')
+            codesearch.index_document(project_file.sha256, text)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} file(s)."))
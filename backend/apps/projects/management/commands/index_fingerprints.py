@@ -0,0 +1,28 @@
+# backend/apps/projects/management/commands/index_fingerprints.py
+from django.core.management.base import BaseCommand
+
+from apps.projects import duplicates
+from apps.projects.models import ContentFingerprint, ProjectFile
+from apps.projects.processing import jobs
+from apps.projects.processing.fingerprints import compute_signature
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds processed code and PDF files that have no MinHash fingerprint yet (e.g. processed before "
+        "near-duplicate detection existed) to the LSH index."
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        file_types = [ProjectFile.FileType.CODE, ProjectFile.FileType.PDF]
+        for project_file in jobs.files_to_backfill(file_types, ContentFingerprint):
+            path = jobs.stored_path(project_file)
+            if path:
+                signature = compute_signature(project_file.file_type, path, project_file.extracted_metadata)
+            else:
+                with jobs.local_copy(project_file) as tmp_path:
+                    signature = compute_signature(project_file.file_type, tmp_path, project_file.extracted_metadata)
+            duplicates.index_signature(project_file.sha256, signature)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} file(s)."))
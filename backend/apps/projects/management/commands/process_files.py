@@ -0,0 +1,70 @@
+# backend/apps/projects/management/commands/process_files.py
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.projects.processing import jobs
+from apps.projects.processing.pipeline import process_file
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Runs the background ProjectFile processing worker (metadata extraction, previews) with a local process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Size of the extraction process pool.")
+        parser.add_argument('--batch-size', type=int, default=8, help="Jobs claimed per polling round.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, **options):
+        extra = jobs.extra_extractors()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                close_old_connections()
+                jobs.reclaim_stale_jobs()
+                processed = self.run_batch(pool, options['batch_size'], extra)
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+    def run_batch(self, pool, batch_size, extra):
+        claimed = jobs.claim_jobs(batch_size)
+        futures = []
+        for job in claimed:
+            project_file = job.project_file
+            reused = jobs.reuse_metadata(project_file)
+            if reused is not None:
+                jobs.complete_job(job, reused)
+                continue
+            try:
+                path = jobs.stored_path(project_file)
+                if path:
+                    futures.append((job, pool.submit(
+                        process_file, project_file.file_type, path, project_file.original_filename, extra
+                    )))
+                else:
+                    # Remote storage: the temp copy only lives inside this block, so extract right here
+                    with jobs.local_copy(project_file) as tmp_path:
+                        result = process_file(project_file.file_type, tmp_path, project_file.original_filename, extra)
+                    jobs.complete_job(job, **result)
+            except Exception as e:
+                logger.exception("Processing ProjectFile %s failed", project_file.pk)
+                jobs.fail_job(job, e)
+
+        for job, future in futures:
+            try:
+                result = future.result()
+                jobs.complete_job(job, **result)
+            except Exception as e:
+                logger.exception("Processing ProjectFile %s failed", job.project_file_id)
+                jobs.fail_job(job, e)
+        if claimed:
+            self.stdout.write(f"Processed {len(claimed)} file(s).")
+        return len(claimed)
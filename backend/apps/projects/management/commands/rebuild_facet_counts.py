@@ -0,0 +1,13 @@
+# backend/apps/projects/management/commands/rebuild_facet_counts.py
+from django.core.management.base import BaseCommand
+
+from apps.projects import facets
+from apps.projects.models import ProjectFacetCount
+
+
+class Command(BaseCommand):
+    help = "Recomputes the precomputed project facet counts (type / department / year) from the Project table."
+
+    def handle(self, *args, **options):
+        facets.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {ProjectFacetCount.objects.count()} facet cells."))
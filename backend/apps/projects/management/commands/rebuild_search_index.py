@@ -0,0 +1,15 @@
+# backend/apps/projects/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from apps.projects import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the project full-text search index from the Project and ProjectFile tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} projects."))
@@ -0,0 +1,26 @@
+# backend/apps/projects/management/commands/refresh_related_projects.py
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects import similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Precomputes the related projects (top-K by TF-IDF similarity) shown on project pages. "
+        "Only lists affected by changes since the last run are recomputed, unless --full is given. "
+        "Meant to run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every project's list.")
+        parser.add_argument('--top-k', type=int, default=similarity.TOP_K, help="Neighbours kept per project.")
+        parser.add_argument('--min-score', type=float, default=similarity.MIN_SCORE,
+                            help="Lowest cosine similarity that still counts as related.")
+
+    def handle(self, *args, **options):
+        try:
+            recomputed, total = similarity.refresh(options['full'], options['top_k'], options['min_score'])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {recomputed} of {total} related-project lists."))
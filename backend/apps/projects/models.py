@@ -1,10 +1,13 @@
 # backend/apps/projects/models.py
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.conf import settings # To refer to the custom User model
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
 import os # For file path handling
 import json # For JSONField
+import hashlib
+import uuid
 # Add any necessary imports for file processing (later)
 
 def project_file_upload_to(instance, filename):
@@ -50,11 +53,20 @@ class Project(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # When refresh_related_projects last computed this project's neighbour list (see similarity.py)
+    related_computed_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = _("Project")
         verbose_name_plural = _("Projects")
         ordering = ['-created_at']
+        # Composite indexes backing cursor pagination and the common filtered orderings
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='project_created_id_idx'),
+            models.Index(fields=['type', '-created_at', '-id'], name='project_type_created_idx'),
+            models.Index(fields=['department', 'year'], name='project_dept_year_idx'),
+            models.Index(fields=['year', '-created_at'], name='project_year_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -62,6 +74,95 @@ class Project(models.Model):
     # Add methods for future features like citation, versioning, etc.
 
 
+class ProjectFacetCount(models.Model):
+    # Precomputed project counts per (type, department, year) combination.
+    # Kept up to date by signals on Project save/delete (see facets.py), so facet
+    # breakdowns are read from this small table instead of GROUP BYs over Project.
+    type = models.CharField(max_length=50, choices=Project.ProjectType.choices)
+    department = models.CharField(max_length=100, blank=True)
+    year = models.IntegerField(null=True, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Project Facet Count")
+        verbose_name_plural = _("Project Facet Counts")
+        # One row per cell. NULLs are distinct in a unique index, so cells without a year get their own constraint
+        constraints = [
+            models.UniqueConstraint(
+                fields=['type', 'department', 'year'], condition=models.Q(year__isnull=False), name='unique_facet_cell'
+            ),
+            models.UniqueConstraint(
+                fields=['type', 'department'], condition=models.Q(year__isnull=True), name='unique_facet_cell_no_year'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type}/{self.department}/{self.year}: {self.count}"
+
+
+def blob_storage_path(sha256, filename):
+    # Content-addressed path: blobs/ab/cd/abcd...<ext>; the extension only helps content-type sniffing
+    ext = os.path.splitext(filename or '')[1].lower()[:16]
+    return os.path.join('blobs', sha256[:2], sha256[2:4], f'{sha256}{ext}')
+
+
+class FileBlob(models.Model):
+    # A stored file shared by every ProjectFile with the same SHA-256.
+    # ref_count is the number of ProjectFiles pointing at it; storage is freed when it drops to zero.
+    sha256 = models.CharField(_("SHA-256"), max_length=64, unique=True)
+    file = models.FileField(_("File"), max_length=255)
+    size = models.BigIntegerField(_("Size"), default=0)
+    ref_count = models.PositiveIntegerField(_("Reference Count"), default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("File Blob")
+        verbose_name_plural = _("File Blobs")
+
+    def __str__(self):
+        return self.sha256
+
+    @classmethod
+    def acquire(cls, sha256, content, filename):
+        """
+        Returns the blob for `sha256` with its reference count incremented,
+        storing `content` only if no blob with that hash exists yet.
+        """
+        with transaction.atomic():
+            if cls.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1):
+                return cls.objects.get(sha256=sha256)
+
+            storage = cls._meta.get_field('file').storage
+            path = blob_storage_path(sha256, filename)
+            if not storage.exists(path):
+                path = storage.save(path, content)
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(
+                        sha256=sha256, file=path, size=getattr(content, 'size', 0) or 0, ref_count=1
+                    )
+            except IntegrityError:
+                # Another upload of the same content created the blob first
+                cls.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1)
+                return cls.objects.get(sha256=sha256)
+
+    @classmethod
+    def release(cls, blob_id):
+        # Drops one reference; the last one deletes the row and, after commit, the stored bytes
+        with transaction.atomic():
+            cls.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+            blob = cls.objects.select_for_update().filter(pk=blob_id, ref_count__lte=0).first()
+            if blob is None:
+                return
+            storage, name = blob.file.storage, blob.file.name
+            blob.delete()
+
+        def delete_stored_file():
+            if not cls.objects.filter(file=name).exists(): # Re-created by a concurrent upload
+                storage.delete(name)
+        transaction.on_commit(delete_stored_file)
+
+
 class ProjectFile(models.Model):
     project = models.ForeignKey(
         Project,
@@ -70,6 +171,14 @@ class ProjectFile(models.Model):
         help_text=_("The project this file belongs to.")
     )
     file = models.FileField(_("File"), upload_to=project_file_upload_to)
+    # Shared, reference-counted storage for the file contents; `file` points at the blob's path
+    blob = models.ForeignKey(
+        FileBlob,
+        on_delete=models.PROTECT,
+        related_name='project_files',
+        null=True,
+        blank=True,
+    )
 
     class FileType(models.TextChoices):
         # Inherit or mirror ProjectType, or be more specific if needed
@@ -88,9 +197,25 @@ class ProjectFile(models.Model):
     )
 
     original_filename = models.CharField(_("Original Filename"), max_length=255)
+    # SHA-256 of the file contents, computed while the upload streams in
+    sha256 = models.CharField(_("SHA-256"), max_length=64, blank=True, db_index=True)
     # JSONField for storing extracted metadata (e.g., PDF title, author, code language)
     extracted_metadata = models.JSONField(_("Extracted Metadata"), default=dict, blank=True, null=True)
 
+    class ProcessingStatus(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        DONE = 'DONE', _('Done')
+        FAILED = 'FAILED', _('Failed')
+
+    # Mirrors the latest FileProcessingJob, so listings can show progress without joining the job table
+    processing_status = models.CharField(
+        _("Processing Status"),
+        max_length=20,
+        choices=ProcessingStatus.choices,
+        default=ProcessingStatus.PENDING,
+    )
+
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -101,6 +226,21 @@ class ProjectFile(models.Model):
     def __str__(self):
         return self.original_filename
 
+    @classmethod
+    def guess_file_type(cls, filename):
+        # Basic classification by extension; shared by save() and bulk paths that bypass it
+        name, ext = os.path.splitext(filename.lower())
+        if ext in ['.py', '.js', '.c', '.cpp', '.java', '.cs', '.html', '.css']:
+            return cls.FileType.CODE
+        elif ext in ['.dwg', '.dxf']:
+             return cls.FileType.AUTOCAD
+        elif ext == '.pdf':
+             return cls.FileType.PDF
+        elif ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg']:
+             return cls.FileType.IMAGE
+        # TODO: More specific mapping and actual file content type checking later
+        return cls.FileType.OTHER
+
     def save(self, *args, **kwargs):
         # Set original_filename if not set
         if not self.original_filename and self.file:
@@ -108,39 +248,201 @@ class ProjectFile(models.Model):
 
         # Attempt to determine file_type if not set (basic based on extension)
         if not self.file_type or self.file_type == self.FileType.OTHER:
-            name, ext = os.path.splitext(self.original_filename.lower())
-            if ext in ['.py', '.js', '.c', '.cpp', '.java', '.cs', '.html', '.css']:
-                self.file_type = self.FileType.CODE
-            elif ext in ['.dwg', '.dxf']:
-                 self.file_type = self.FileType.AUTOCAD
-            elif ext == '.pdf':
-                 self.file_type = self.FileType.PDF
-            elif ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg']:
-                 self.file_type = self.FileType.IMAGE
-            # TODO: More specific mapping and actual file content type checking later
-
-        # TODO: Trigger metadata extraction and thumbnail generation here or via signal/Celery task
+            self.file_type = self.guess_file_type(self.original_filename)
+
+        if self.file and not self.file._committed:
+            # Hash new uploads chunk by chunk (chunked uploads arrive with the hash already set)
+            if not self.sha256:
+                hasher = hashlib.sha256()
+                for chunk in self.file.chunks():
+                    hasher.update(chunk)
+                self.sha256 = hasher.hexdigest()
+                self.file.seek(0)
+            # Store by content: identical uploads share one blob instead of one copy each
+            self.blob = FileBlob.acquire(self.sha256, self.file.file, self.original_filename)
+            self.file = self.blob.file.name
+
+        # Metadata extraction is queued by the post_save handler in signals.py and run by `manage.py process_files`
         super().save(*args, **kwargs)
 
-    def delete(self, *args, **kwargs):
-        # Delete the file from the filesystem when the model is deleted
-        if self.file:
-            storage, path = self.file.storage, self.file.path
-            super().delete(*args, **kwargs) # Delete model instance
-            storage.delete(path) # Delete file
-        else:
-            super().delete(*args, **kwargs)
-
-# TODO: Add Signals for file processing (e.g., post_save for ProjectFile)
-# This would trigger metadata extraction, preview generation in the background
-# Example:
-# from django.db.models.signals import post_save
-# from django.dispatch import receiver
-# @receiver(post_save, sender=ProjectFile)
-# def process_project_file(sender, instance, created, **kwargs):
-#     if created:
-#         # Trigger Celery task or direct function call for processing
-#         print(f"File uploaded: {instance.original_filename}. Processing...")
-#         # process_file_metadata.delay(instance.id) # If using Celery
-#         # or: from .file_processors import process_file_metadata
-#         # process_file_metadata(instance) # Simple direct call
\ No newline at end of file
+    def release_storage(self):
+        # Called from post_delete (so cascades from Project deletes are covered too).
+        # Blob-backed files drop a reference; legacy per-upload files are deleted directly.
+        if self.blob_id:
+            FileBlob.release(self.blob_id)
+        elif self.file:
+            storage, name = self.file.storage, self.file.name
+            transaction.on_commit(lambda: storage.delete(name))
+
+class UploadSession(models.Model):
+    # State of a resumable chunked upload: chunks are appended to a staging file
+    # until received_bytes reaches total_size, then the upload is finalized into a ProjectFile.
+    class Status(models.TextChoices):
+        ACTIVE = 'ACTIVE', _('Active')
+        COMPLETE = 'COMPLETE', _('Complete')
+        ABORTED = 'ABORTED', _('Aborted')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='upload_sessions')
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(_("Filename"), max_length=255)
+    total_size = models.BigIntegerField(_("Total Size"))
+    received_bytes = models.BigIntegerField(_("Received Bytes"), default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Upload Session")
+        verbose_name_plural = _("Upload Sessions")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+
+class FileProcessingJob(models.Model):
+    # Durable queue entry for background processing of one ProjectFile (metadata extraction, previews).
+    # Claimed and run by the `process_files` worker command; see processing/jobs.py.
+    Status = ProjectFile.ProcessingStatus
+
+    project_file = models.ForeignKey(ProjectFile, on_delete=models.CASCADE, related_name='processing_jobs')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("File Processing Job")
+        verbose_name_plural = _("File Processing Jobs")
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_file_id}: {self.status}"
+
+
+def preview_storage_path(sha256, kind, content_type):
+    ext = {'text/html': '.html', 'text/plain': '.txt', 'image/png': '.png', 'image/jpeg': '.jpg'}.get(
+        content_type.split(';')[0], ''
+    )
+    return os.path.join('previews', sha256[:2], sha256[2:4], f'{sha256}-{kind}{ext}')
+
+
+class PreviewArtifact(models.Model):
+    # A rendered preview of file contents (highlighted code, first-page text, thumbnail).
+    # Keyed by content hash, so deduplicated files share previews and the bytes never change.
+    class Kind(models.TextChoices):
+        CODE = 'code', _('Highlighted Code')
+        TEXT = 'text', _('First Page Text')
+        THUMBNAIL = 'thumbnail', _('Thumbnail')
+
+    sha256 = models.CharField(_("SHA-256"), max_length=64)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    content_type = models.CharField(max_length=100)
+    file = models.FileField(_("File"), max_length=255)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Preview Artifact")
+        verbose_name_plural = _("Preview Artifacts")
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'kind'], name='unique_preview_per_kind'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} {self.kind}"
+
+
+class RelatedProject(models.Model):
+    # Precomputed nearest neighbours of a project: TF-IDF cosine similarity of title, description and
+    # department, top-K per project. Written by `manage.py refresh_related_projects` (see similarity.py).
+    # `related` has no database constraint, so deleting a project leaves its entries in other lists
+    # behind; the next refresh recomputes those lists and readers skip ids that no longer exist.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Project, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("Related Project")
+        verbose_name_plural = _("Related Projects")
+        ordering = ['project', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'rank'], name='unique_related_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class ContentFingerprint(models.Model):
+    # MinHash signature of a file's shingled code or text, for near-duplicate detection (see duplicates.py).
+    # Keyed by content hash like PreviewArtifact, so deduplicated files share one fingerprint.
+    sha256 = models.CharField(_("SHA-256"), max_length=64, unique=True)
+    signature = models.BinaryField(_("MinHash Signature"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Content Fingerprint")
+        verbose_name_plural = _("Content Fingerprints")
+
+    def __str__(self):
+        return self.sha256
+
+
+class LshBucket(models.Model):
+    # Locality-sensitive hashing index: one row per (fingerprint, signature band). Fingerprints sharing
+    # a bucket in any band are near-duplicate candidates, found with one indexed lookup per file.
+    fingerprint = models.ForeignKey(ContentFingerprint, on_delete=models.CASCADE, related_name='buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = _("LSH Bucket")
+        verbose_name_plural = _("LSH Buckets")
+        indexes = [
+            models.Index(fields=['bucket', 'band'], name='lsh_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.band}:{self.bucket}"
+
+
+class CodeDocument(models.Model):
+    # Source text of a code file for the trigram code search (see codesearch.py).
+    # Keyed by content hash, so identical files across projects are indexed and scanned once.
+    sha256 = models.CharField(_("SHA-256"), max_length=64, unique=True)
+    content = models.TextField(_("Content"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Code Document")
+        verbose_name_plural = _("Code Documents")
+
+    def __str__(self):
+        return self.sha256
+
+
+class CodeTrigram(models.Model):
+    # Posting: `document` contains `trigram` (lower-cased). The (trigram, document) index turns
+    # "documents containing all of these trigrams" into index range scans.
+    document = models.ForeignKey(CodeDocument, on_delete=models.CASCADE, related_name='trigrams')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        verbose_name = _("Code Trigram")
+        verbose_name_plural = _("Code Trigrams")
+        indexes = [
+            models.Index(fields=['trigram', 'document'], name='code_trigram_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} in {self.document_id}"
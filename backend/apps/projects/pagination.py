@@ -0,0 +1,24 @@
+# backend/apps/projects/pagination.py
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id) for the project catalog.
+    Each page is a range scan on the matching composite index, so page N costs the same as page 1.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # id breaks ties between projects created in the same instant
+    ordering = ('-created_at', '-id')
+
+
+class ProjectSearchPagination(PageNumberPagination):
+    """
+    Page-number pagination over a relevance-ranked list of project ids.
+    Ranking has no stable keyset, so search results page by position instead.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,210 @@
+# backend/apps/projects/processing/extractors.py
+# Pluggable metadata extractors, keyed by ProjectFile.FileType value.
+# Extractors run inside worker processes, so they must stay free of Django model/DB access:
+# each takes a local file path and the original filename and returns a dict merged into extracted_metadata.
+import os
+import re
+import struct
+import zlib
+
+MAX_TEXT_CHARS = 100_000 # Extracted text kept per file (feeds search and previews)
+MAX_CODE_BYTES = 5 * 1024 * 1024 # Larger source files are only partially analysed
+MAX_PDF_SCAN_BYTES = 32 * 1024 * 1024 # The fallback PDF scanner only reads this much of a file
+# Inflated bytes per content stream in the fallback scanner; text operators carry far more bytes than
+# the text they show, but a stream this large already holds more text than MAX_TEXT_CHARS keeps
+MAX_PDF_STREAM_BYTES = 20 * MAX_TEXT_CHARS
+
+_registry = {}
+
+
+def register(*file_types):
+    # Decorator: @register('PDF') adds an extractor for that file type
+    def decorator(func):
+        for file_type in file_types:
+            _registry.setdefault(file_type, []).append(func)
+        return func
+    return decorator
+
+
+def extractors_for(file_type):
+    return list(_registry.get(file_type, []))
+
+
+def run_extractors(file_type, path, filename, extra=()):
+    """
+    Runs every extractor registered for `file_type` (plus `extra` callables) and merges their output.
+    Executed in a worker process; one failing extractor doesn't discard the others' results.
+    """
+    metadata, errors = {}, {}
+    for extractor in extractors_for(file_type) + list(extra):
+        try:
+            metadata.update(extractor(path, filename) or {})
+        except Exception as e: # Corrupt or unusual files shouldn't kill the job
+            errors[extractor.__name__] = str(e)[:500]
+    if errors:
+        metadata['extraction_errors'] = errors
+    return metadata
+
+
+# --- PDF ---
+
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+_PDF_INFO_RE = {
+    'title': re.compile(rb'/Title\s*\((.*?)(?<!\\)\)', re.S),
+    'author': re.compile(rb'/Author\s*\((.*?)(?<!\\)\)', re.S),
+}
+_PDF_STREAM_RE = re.compile(rb'<<(.*?)>>\s*stream\r?\n(.*?)\r?\nendstream', re.S)
+_PDF_TEXT_RE = re.compile(rb'\((.*?)(?<!\\)\)\s*Tj|\[(.*?)\]\s*TJ', re.S)
+_PDF_TJ_PART_RE = re.compile(rb'\((.*?)(?<!\\)\)', re.S)
+
+
+def _pdf_string(raw):
+    # Decodes a PDF literal string: escapes, then UTF-16 (with BOM) or Latin-1
+    raw = re.sub(rb'\\([nrtbf()\\])', lambda m: {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b',
+                                                b'f': b'\f'}.get(m.group(1), m.group(1)), raw)
+    if raw.startswith(b'\xfe\xff'):
+        return raw[2:].decode('utf-16-be', 'ignore').strip()
+    return raw.decode('latin-1').strip()
+
+
+def _pdf_fallback(path):
+    # Dependency-free best effort: page count, Info title/author and Tj/TJ text from Flate streams
+    with open(path, 'rb') as fh:
+        data = fh.read(MAX_PDF_SCAN_BYTES)
+    result = {'page_count': len(_PDF_PAGE_RE.findall(data))}
+    for key, pattern in _PDF_INFO_RE.items():
+        match = pattern.search(data)
+        if match:
+            result[key] = _pdf_string(match.group(1))
+
+    text_parts, size = [], 0
+    for header, stream in _PDF_STREAM_RE.findall(data):
+        if b'/FlateDecode' in header:
+            try:
+                # Bounded, so a small flate bomb can't inflate into gigabytes
+                stream = zlib.decompressobj().decompress(stream, MAX_PDF_STREAM_BYTES)
+            except zlib.error:
+                continue
+        for single, array in _PDF_TEXT_RE.findall(stream):
+            pieces = [single] if single else _PDF_TJ_PART_RE.findall(array)
+            chunk = ''.join(_pdf_string(p) for p in pieces)
+            text_parts.append(chunk)
+            size += len(chunk)
+        if size >= MAX_TEXT_CHARS:
+            break
+    text = ' '.join(' '.join(text_parts).split())
+    if text:
+        result['text'] = text[:MAX_TEXT_CHARS]
+    return result
+
+
+@register('PDF')
+def extract_pdf(path, filename):
+    try:
+        from pypdf import PdfReader # Optional dependency; far more robust when installed
+    except ImportError:
+        return _pdf_fallback(path)
+    try:
+        return _pypdf_extract(PdfReader(path))
+    except Exception: # pypdf rejects some damaged files the lenient scanner can still read
+        return _pdf_fallback(path)
+
+
+def _pypdf_extract(reader):
+    info = reader.metadata or {}
+    text_parts, size = [], 0
+    for page in reader.pages:
+        chunk = page.extract_text() or ''
+        text_parts.append(chunk)
+        size += len(chunk)
+        if size >= MAX_TEXT_CHARS:
+            break
+    result = {'page_count': len(reader.pages)}
+    if info.get('/Title'):
+        result['title'] = str(info['/Title'])
+    if info.get('/Author'):
+        result['author'] = str(info['/Author'])
+    text = ' '.join(' '.join(text_parts).split())
+    if text:
+        result['text'] = text[:MAX_TEXT_CHARS]
+    return result
+
+
+# --- Code ---
+
+LANGUAGES = {
+    '.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript', '.tsx': 'TypeScript', '.jsx': 'JavaScript',
+    '.c': 'C', '.h': 'C', '.cpp': 'C++', '.hpp': 'C++', '.cc': 'C++', '.java': 'Java', '.cs': 'C#',
+    '.html': 'HTML', '.css': 'CSS', '.go': 'Go', '.rs': 'Rust', '.rb': 'Ruby', '.php': 'PHP',
+    '.kt': 'Kotlin', '.swift': 'Swift', '.sql': 'SQL', '.sh': 'Shell',
+}
+# Single-line comment prefixes per language, for a cheap comment-line count
+_COMMENT_PREFIXES = {
+    'Python': ('#',), 'Ruby': ('#',), 'Shell': ('#',), 'SQL': ('--',),
+    'HTML': ('<!--',), 'CSS': ('/*', '*'),
+}
+_DEFAULT_COMMENT_PREFIXES = ('//', '/*', '*')
+
+
+@register('CODE')
+def extract_code(path, filename):
+    language = LANGUAGES.get(os.path.splitext(filename.lower())[1], 'Unknown')
+    prefixes = _COMMENT_PREFIXES.get(language, _DEFAULT_COMMENT_PREFIXES)
+    lines = blank = comments = 0
+    with open(path, 'rb') as fh:
+        data = fh.read(MAX_CODE_BYTES)
+        truncated = bool(fh.read(1))
+    for line in data.decode('utf-8', 'replace').splitlines():
+        lines += 1
+        stripped = line.strip()
+        if not stripped:
+            blank += 1
+        elif stripped.startswith(prefixes):
+            comments += 1
+    return {
+        'language': language,
+        'line_count': lines,
+        'blank_lines': blank,
+        'comment_lines': comments,
+        'code_lines': lines - blank - comments,
+        'truncated': truncated,
+    }
+
+
+# --- Images ---
+
+def _image_size(header, fh):
+    # Returns (format, width, height) by reading the image header only
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        width, height = struct.unpack('>II', header[16:24])
+        return 'PNG', width, height
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', header[6:10])
+        return 'GIF', width, height
+    if header.startswith(b'\xff\xd8'):
+        fh.seek(2)
+        while True:
+            marker = fh.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return 'JPEG', None, None
+            if marker[1] in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                fh.read(3) # Segment length + precision
+                height, width = struct.unpack('>HH', fh.read(4))
+                return 'JPEG', width, height
+            (length,) = struct.unpack('>H', fh.read(2))
+            fh.seek(length - 2, os.SEEK_CUR)
+    if b'<svg' in header:
+        width = re.search(rb'\bwidth="([\d.]+)', header)
+        height = re.search(rb'\bheight="([\d.]+)', header)
+        return ('SVG',
+                int(float(width.group(1))) if width else None,
+                int(float(height.group(1))) if height else None)
+    return None, None, None
+
+
+@register('IMAGE')
+def extract_image(path, filename):
+    with open(path, 'rb') as fh:
+        header = fh.read(4096)
+        image_format, width, height = _image_size(header, fh)
+    return {'format': image_format, 'width': width, 'height': height}
@@ -0,0 +1,116 @@
+# backend/apps/projects/processing/fingerprints.py
+# MinHash signatures for near-duplicate detection (see duplicates.py for the LSH index).
+# Runs in the worker processes next to the extractors, so it stays free of Django model/DB access.
+# Code is shingled over normalized tokens (identifiers and literals folded, comments dropped), so renaming
+# variables doesn't hide a copy; paper text is shingled over lower-cased words.
+import hashlib
+import random
+import re
+import struct
+
+from .extractors import MAX_CODE_BYTES
+
+NUM_PERM = 128 # Signature length; the Jaccard estimate's standard error is about 1/sqrt(NUM_PERM)
+BANDS, ROWS = 32, 4 # LSH banding of the signature; candidates from Jaccard ~0.4 up
+SHINGLE_SIZE = 5 # Tokens per shingle
+MAX_SHINGLES = 50_000 # Distinct shingles hashed per file, keeps huge files cheap
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240501) # Fixed seed: signatures must be comparable across processes and runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+_CODE_TOKEN_RE = re.compile(
+    r'''(?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)'''
+    r'''|(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')'''
+    r'''|(?P<number>\b\d[\w.]*)'''
+    r'''|(?P<word>[A-Za-z_]\w*)'''
+    r'''|(?P<symbol>[^\w\s])''',
+    re.S,
+)
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Words that carry a program's structure; every other identifier becomes the same token
+CODE_KEYWORDS = frozenset('''
+    if else elif for while do switch case default break continue return def class function fn func
+    var let const new delete try catch except finally raise throw import from package public private
+    protected static void int long float double char bool boolean string true false null none this self
+    and or not in is lambda yield async await struct enum interface extends implements
+'''.split())
+
+
+def code_tokens(source):
+    tokens = []
+    for match in _CODE_TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        if kind == 'word':
+            word = match.group().lower()
+            tokens.append(word if word in CODE_KEYWORDS else 'ID')
+        elif kind in ('string', 'number'):
+            tokens.append(kind.upper())
+        else:
+            tokens.append(match.group())
+    return tokens
+
+
+def text_tokens(text):
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+def shingle_hashes(tokens, size=SHINGLE_SIZE):
+    # 64-bit hashes of the distinct `size`-token windows; shorter inputs become a single shingle
+    windows = [tokens] if len(tokens) < size else (tokens[i:i + size] for i in range(len(tokens) - size + 1))
+    hashes = set()
+    for window in windows:
+        digest = hashlib.blake2b('\x1f'.join(window).encode(), digest_size=8).digest()
+        hashes.add(struct.unpack('<Q', digest)[0])
+        if len(hashes) >= MAX_SHINGLES:
+            break
+    return hashes
+
+
+def minhash(hashes):
+    # One minimum per permutation h(x) = (a*x + b) mod p
+    return [min((a * x + b) % _MERSENNE_PRIME for x in hashes) for a, b in _PERMUTATIONS]
+
+
+def compute_signature(file_type, path, metadata):
+    """
+    MinHash signature of a code file's source or a PDF's extracted text; None for other types
+    and for files without any tokens.
+    """
+    if file_type == 'CODE':
+        with open(path, 'rb') as fh:
+            tokens = code_tokens(fh.read(MAX_CODE_BYTES).decode('utf-8', 'replace'))
+    elif file_type == 'PDF':
+        tokens = text_tokens((metadata or {}).get('text', ''))
+    else:
+        return None
+    if not tokens:
+        return None
+    return minhash(shingle_hashes(tokens))
+
+
+def band_hashes(signature):
+    # One signed 64-bit bucket id per band (fits a BigIntegerField); files sharing any bucket are candidates
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<{ROWS}Q', *rows), digest_size=8).digest()
+        buckets.append(struct.unpack('<q', digest)[0])
+    return buckets
+
+
+def estimate_similarity(a, b):
+    # Share of equal MinHash values: an unbiased estimate of the shingle sets' Jaccard similarity
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def pack(signature):
+    return struct.pack(f'<{len(signature)}Q', *signature)
+
+
+def unpack(data):
+    data = bytes(data) # memoryview on PostgreSQL
+    return list(struct.unpack(f'<{len(data) // 8}Q', data))
@@ -0,0 +1,176 @@
+# backend/apps/projects/processing/jobs.py
+# Durable DB-backed job queue for ProjectFile processing.
+# Jobs are claimed with a conditional UPDATE (works on SQLite and PostgreSQL alike), run in a
+# process pool by the `process_files` command, and their results written back by the parent process.
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .. import codesearch, duplicates
+from ..conditional import touch_projects, touch_projects_of_files
+from ..models import FileProcessingJob, PreviewArtifact, ProjectFile, preview_storage_path
+
+MAX_ATTEMPTS = getattr(settings, 'FILE_PROCESSING_MAX_ATTEMPTS', 3)
+# A RUNNING job older than this is assumed to belong to a dead worker and is retried
+STALE_AFTER = timedelta(minutes=getattr(settings, 'FILE_PROCESSING_STALE_MINUTES', 15))
+
+Status = FileProcessingJob.Status
+
+
+def extra_extractors():
+    # Project-specific extractors run for every file type, as dotted paths in settings.FILE_PROCESSING_EXTRACTORS
+    return [import_string(path) for path in getattr(settings, 'FILE_PROCESSING_EXTRACTORS', [])]
+
+
+def enqueue(project_file):
+    job = FileProcessingJob.objects.create(project_file=project_file)
+    if project_file.processing_status != Status.PENDING:
+        ProjectFile.objects.filter(pk=project_file.pk).update(processing_status=Status.PENDING)
+        touch_projects([project_file.project_id])
+        project_file.processing_status = Status.PENDING
+    return job
+
+
+def reclaim_stale_jobs(now=None):
+    cutoff = (now or timezone.now()) - STALE_AFTER
+    stale = FileProcessingJob.objects.filter(status=Status.RUNNING, started_at__lt=cutoff)
+    for retry in (True, False):
+        jobs = stale.filter(attempts__lt=MAX_ATTEMPTS) if retry else stale
+        file_ids = list(jobs.values_list('project_file_id', flat=True))
+        if retry:
+            jobs.update(status=Status.PENDING)
+        else:
+            jobs.update(status=Status.FAILED, finished_at=timezone.now(), error='Worker did not finish the job.')
+        ProjectFile.objects.filter(pk__in=file_ids).update(
+            processing_status=Status.PENDING if retry else Status.FAILED
+        )
+        touch_projects_of_files(file_ids)
+
+
+def claim_jobs(limit):
+    # Marks up to `limit` pending jobs as RUNNING; rows another worker claimed first are skipped
+    claimed = []
+    candidate_ids = FileProcessingJob.objects.filter(status=Status.PENDING).values_list('pk', flat=True)[:limit * 2]
+    for pk in candidate_ids:
+        if len(claimed) >= limit:
+            break
+        now = timezone.now()
+        if FileProcessingJob.objects.filter(pk=pk, status=Status.PENDING).update(
+            status=Status.RUNNING, started_at=now, attempts=F('attempts') + 1
+        ):
+            claimed.append(pk)
+    jobs = list(FileProcessingJob.objects.filter(pk__in=claimed).select_related('project_file'))
+    file_ids = [job.project_file_id for job in jobs]
+    ProjectFile.objects.filter(pk__in=file_ids).update(processing_status=Status.RUNNING)
+    touch_projects_of_files(file_ids) # processing_status is part of the project's representation
+    return jobs
+
+
+def stored_path(project_file):
+    # Filesystem path of the stored file, or None on remote storage (e.g. S3)
+    try:
+        return project_file.file.storage.path(project_file.file.name)
+    except NotImplementedError:
+        return None
+
+
+@contextmanager
+def local_copy(project_file):
+    # Streams a remote file into a temp file for extractors that need a real path
+    suffix = os.path.splitext(project_file.original_filename)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with project_file.file.storage.open(project_file.file.name, 'rb') as source:
+            shutil.copyfileobj(source, tmp, 1024 * 1024)
+        tmp.flush()
+        yield tmp.name
+
+
+def files_to_backfill(file_types, index_model):
+    """
+    Yields one processed file of the given types per content hash that `index_model` (keyed by sha256)
+    has no row for yet, e.g. files processed before that index existed.
+    """
+    files = (
+        ProjectFile.objects.filter(processing_status=Status.DONE, file_type__in=file_types)
+        .exclude(sha256='').exclude(sha256__in=index_model.objects.values('sha256'))
+    )
+    seen = set()
+    for project_file in files.iterator():
+        if project_file.sha256 not in seen: # Copies of the same content are indexed once
+            seen.add(project_file.sha256)
+            yield project_file
+
+
+def reuse_metadata(project_file):
+    # Files deduplicated into the same blob have identical content: copy an earlier result instead of re-extracting
+    if not project_file.blob_id:
+        return None
+    return (
+        ProjectFile.objects.filter(blob_id=project_file.blob_id, processing_status=Status.DONE)
+        .exclude(pk=project_file.pk)
+        .values_list('extracted_metadata', flat=True)
+        .first()
+    )
+
+
+def store_previews(sha256, previews):
+    # Saves (kind, content_type, bytes) artifacts; ones already stored for this content hash are kept
+    if not sha256:
+        return
+    existing = set(PreviewArtifact.objects.filter(sha256=sha256).values_list('kind', flat=True))
+    for kind, content_type, data in previews:
+        if kind in existing:
+            continue
+        artifact = PreviewArtifact(sha256=sha256, kind=kind, content_type=content_type, size=len(data))
+        artifact.file.save(preview_storage_path(sha256, kind, content_type), ContentFile(data), save=False)
+        try:
+            with transaction.atomic():
+                artifact.save()
+        except IntegrityError: # Rendered concurrently by another worker
+            artifact.file.delete(save=False)
+
+
+def complete_job(job, metadata, previews=(), fingerprint=None, source=None):
+    project_file = job.project_file
+    store_previews(project_file.sha256, previews)
+    metadata = dict(metadata)
+    # Checked for this file's project; metadata reused from a copy elsewhere carries that copy's result
+    metadata.pop(duplicates.METADATA_KEY, None)
+    with transaction.atomic():
+        # The file (and, by cascade, this job) may have been deleted while it was processed: nothing to record.
+        # Indexed only while the row is locked, so a concurrent delete's cleanup handlers see these rows
+        if not ProjectFile.objects.select_for_update().filter(pk=project_file.pk).exists():
+            return
+        duplicates.index_signature(project_file.sha256, fingerprint)
+        codesearch.index_document(project_file.sha256, source)
+        matches = duplicates.near_duplicates(project_file)
+        project_file.extracted_metadata = {**(project_file.extracted_metadata or {}), **metadata}
+        if matches is not None:
+            project_file.extracted_metadata[duplicates.METADATA_KEY] = matches
+        project_file.processing_status = Status.DONE
+        # Goes through save() so post_save handlers (e.g. the search index) see the new metadata
+        project_file.save(update_fields=['extracted_metadata', 'processing_status'])
+        job.status, job.finished_at, job.error = Status.DONE, timezone.now(), ''
+        FileProcessingJob.objects.filter(pk=job.pk).update(status=job.status, finished_at=job.finished_at, error='')
+
+
+def fail_job(job, error):
+    retry = job.attempts < MAX_ATTEMPTS
+    job.status = Status.PENDING if retry else Status.FAILED
+    job.error = str(error)[:2000]
+    job.finished_at = None if retry else timezone.now()
+    # A no-op when the file was deleted mid-run and took the job with it
+    FileProcessingJob.objects.filter(pk=job.pk).update(status=job.status, error=job.error, finished_at=job.finished_at)
+    ProjectFile.objects.filter(pk=job.project_file_id).update(
+        processing_status=Status.PENDING if retry else Status.FAILED
+    )
+    touch_projects_of_files([job.project_file_id])
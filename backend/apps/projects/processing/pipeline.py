@@ -0,0 +1,32 @@
+# backend/apps/projects/processing/pipeline.py
+from .extractors import MAX_CODE_BYTES, run_extractors
+from .fingerprints import compute_signature
+from .previews import render_previews
+
+
+def process_file(file_type, path, filename, extra=()):
+    # Entry point executed in a worker process: metadata first, then previews (which may reuse it)
+    metadata = run_extractors(file_type, path, filename, extra)
+    return {
+        'metadata': metadata,
+        'previews': render_previews(file_type, path, filename, metadata),
+        'fingerprint': _fingerprint(file_type, path, metadata),
+        'source': _source_text(file_type, path),
+    }
+
+
+def _source_text(file_type, path):
+    # Code is returned as text for the code search index, which is written by the parent process
+    if file_type != 'CODE':
+        return None
+    with open(path, 'rb') as fh:
+        return fh.read(MAX_CODE_BYTES).decode('utf-8', 'replace')
+
+
+def _fingerprint(file_type, path, metadata):
+    # MinHash signature for near-duplicate detection; a failure is reported like an extractor's
+    try:
+        return compute_signature(file_type, path, metadata)
+    except Exception as e:
+        metadata.setdefault('extraction_errors', {})['fingerprint'] = str(e)[:500]
+        return None
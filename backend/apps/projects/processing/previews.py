@@ -0,0 +1,113 @@
+# backend/apps/projects/processing/previews.py
+# Compact preview artifacts rendered next to metadata extraction, keyed by file type:
+# - CODE:  syntax-highlighted HTML of the first lines ('code')
+# - PDF:   first-page text ('text') and a first-page thumbnail ('thumbnail', needs PyMuPDF)
+# - IMAGE: a downscaled thumbnail ('thumbnail', needs Pillow)
+# Like the extractors, renderers run in worker processes and return bytes; the parent stores them.
+import html
+import io
+import os
+
+PREVIEW_LINES = 60
+PREVIEW_TEXT_CHARS = 3000
+THUMBNAIL_SIZE = (480, 480)
+
+_renderers = {}
+
+
+def register(*file_types):
+    # Decorator: @register('CODE') adds a preview renderer for that file type
+    def decorator(func):
+        for file_type in file_types:
+            _renderers.setdefault(file_type, []).append(func)
+        return func
+    return decorator
+
+
+def render_previews(file_type, path, filename, metadata):
+    """
+    Returns a list of (kind, content_type, bytes) artifacts for the file.
+    Renderers that fail or lack their optional dependency just produce nothing.
+    """
+    artifacts = []
+    for renderer in _renderers.get(file_type, []):
+        try:
+            artifacts.extend(renderer(path, filename, metadata) or [])
+        except Exception:
+            continue
+    return artifacts
+
+
+@register('CODE')
+def render_code(path, filename, metadata):
+    with open(path, 'rb') as fh:
+        lines = []
+        for _ in range(PREVIEW_LINES):
+            line = fh.readline(4096) # Bounded even for minified one-line files
+            if not line:
+                break
+            lines.append(line)
+    source = b''.join(lines).decode('utf-8', 'replace')
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_for_filename, TextLexer
+        from pygments.util import ClassNotFound
+    except ImportError:
+        body = f'<pre class="codehilite"><code>{html.escape(source)}</code></pre>'
+    else:
+        try:
+            lexer = get_lexer_for_filename(filename)
+        except ClassNotFound:
+            lexer = TextLexer()
+        body = highlight(source, lexer, HtmlFormatter(cssclass='codehilite', noclasses=True))
+    return [('code', 'text/html; charset=utf-8', body.encode('utf-8'))]
+
+
+@register('PDF')
+def render_pdf_text(path, filename, metadata):
+    text = ''
+    try:
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        if reader.pages:
+            text = ' '.join((reader.pages[0].extract_text() or '').split())
+    except Exception: # pypdf missing, or it can't parse this file
+        # The fallback extractor has no page boundaries; the start of the document stands in for page one
+        text = (metadata or {}).get('text', '')
+    if not text:
+        return []
+    return [('text', 'text/plain; charset=utf-8', text[:PREVIEW_TEXT_CHARS].encode('utf-8'))]
+
+
+@register('PDF')
+def render_pdf_thumbnail(path, filename, metadata):
+    try:
+        import fitz # PyMuPDF, optional
+    except ImportError:
+        return []
+    with fitz.open(path) as document:
+        if not document.page_count:
+            return []
+        page = document.load_page(0)
+        zoom = THUMBNAIL_SIZE[0] / max(page.rect.width, 1)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return [('thumbnail', 'image/png', pixmap.tobytes('png'))]
+
+
+@register('IMAGE')
+def render_image_thumbnail(path, filename, metadata):
+    if os.path.splitext(filename.lower())[1] == '.svg':
+        return [] # Vector images are already small and scale in the browser
+    try:
+        from PIL import Image # Pillow, optional
+    except ImportError:
+        return []
+    with Image.open(path) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image.save(output, 'PNG', optimize=True)
+            return [('thumbnail', 'image/png', output.getvalue())]
+        image.convert('RGB').save(output, 'JPEG', quality=80, optimize=True)
+        return [('thumbnail', 'image/jpeg', output.getvalue())]
@@ -0,0 +1,298 @@
+# backend/apps/projects/search.py
+# Full-text search over projects, backed by a real inverted index:
+# - PostgreSQL: a tsvector column with a GIN index (weighted title > department > description > files)
+# - SQLite: an FTS5 virtual table ranked with bm25()
+# The index is kept up to date incrementally by the handlers in signals.py.
+# Use `manage.py rebuild_search_index` to (re)build it for existing data.
+import logging
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count
+from django.db.models.expressions import RawSQL
+
+from . import caching
+from .models import Project, ProjectFile
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'projects_project_search'
+# Hard cap on ranked hits per query, applied after the list filters; pages are cut from this list
+MAX_HITS = getattr(settings, 'PROJECT_SEARCH_MAX_HITS', 1000)
+# Cap on how much extracted file text goes into a single project's document
+MAX_FILES_TEXT = 200_000
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _metadata_text(metadata):
+    # Collect every string value from (possibly nested) extracted_metadata
+    if isinstance(metadata, str):
+        return [metadata]
+    if isinstance(metadata, dict):
+        metadata = list(metadata.values())
+    if isinstance(metadata, (list, tuple)):
+        parts = []
+        for value in metadata:
+            parts.extend(_metadata_text(value))
+        return parts
+    return []
+
+
+# Fields whose values make up the search document; saves touching none of them leave it as it was
+PROJECT_FIELDS = ('title', 'department', 'description')
+FILE_FIELDS = ('original_filename', 'extracted_metadata')
+
+
+def file_text(filename, metadata):
+    # A file's contribution to its project's document: its name and extracted text
+    # (near-duplicate matches name other projects' files; they aren't this project's text)
+    return [filename or '', *_metadata_text({k: v for k, v in (metadata or {}).items() if k != 'near_duplicates'})]
+
+
+def build_document(project):
+    # Text fields for one project; files contribute their names and extracted text
+    files_parts = []
+    for filename, metadata in ProjectFile.objects.filter(project_id=project.pk).values_list(*FILE_FIELDS):
+        files_parts.extend(file_text(filename, metadata))
+    return {
+        'title': project.title or '',
+        'department': project.department or '',
+        'description': project.description or '',
+        'files_text': ' '.join(files_parts)[:MAX_FILES_TEXT],
+    }
+
+
+class BaseSearchBackend(ABC):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _filter_sql(self, selected, alias='p'):
+        # " AND p.<column> = %s" per list filter ({field: value}), applied in the ranked query before LIMIT
+        quote = self.connection.ops.quote_name
+        clauses, params = [], []
+        for field, value in (selected or {}).items():
+            clauses.append(f' AND {alias}.{quote(Project._meta.get_field(field).column)} = %s')
+            params.append(value)
+        return ''.join(clauses), params
+
+    @abstractmethod
+    def ensure_index(self):
+        ...
+
+    @abstractmethod
+    def index_project(self, project):
+        ...
+
+    @abstractmethod
+    def remove_project(self, project_id):
+        ...
+
+    @abstractmethod
+    def search(self, query, selected=None, limit=MAX_HITS):
+        # Returns ids of the projects matching `query` and the {field: value} list filters, best match first
+        ...
+
+    @abstractmethod
+    def match_sql(self, query):
+        # (sql, params) of a SELECT of every matching project id, unranked and uncapped; None for no match
+        ...
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = getattr(settings, 'PROJECT_SEARCH_CONFIG', 'english')
+
+    def ensure_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+                f'project_id bigint PRIMARY KEY REFERENCES {Project._meta.db_table}(id) ON DELETE CASCADE, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_gin ON {SEARCH_TABLE} USING GIN (document)'
+            )
+
+    def index_project(self, project):
+        doc = build_document(project)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (project_id, document) VALUES (%s, '
+                "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'C') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'D')) "
+                'ON CONFLICT (project_id) DO UPDATE SET document = EXCLUDED.document',
+                [
+                    project.pk,
+                    self.config, doc['title'],
+                    self.config, doc['department'],
+                    self.config, doc['description'],
+                    self.config, doc['files_text'],
+                ]
+            )
+
+    def remove_project(self, project_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE project_id = %s', [project_id])
+
+    def search(self, query, selected=None, limit=MAX_HITS):
+        filters, filter_params = self._filter_sql(selected)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT s.project_id FROM {SEARCH_TABLE} s '
+                f'JOIN {Project._meta.db_table} p ON p.id = s.project_id, '
+                'websearch_to_tsquery(%s::regconfig, %s) AS query '
+                f'WHERE s.document @@ query{filters} '
+                'ORDER BY ts_rank_cd(s.document, query) DESC, s.project_id DESC LIMIT %s',
+                [self.config, query, *filter_params, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match_sql(self, query):
+        return (
+            f'SELECT project_id FROM {SEARCH_TABLE} WHERE document @@ websearch_to_tsquery(%s::regconfig, %s)',
+            [self.config, query],
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    # bm25() column weights, in table column order
+    weights = (10.0, 4.0, 2.0, 1.0)
+
+    def ensure_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+                "title, department, description, files_text, tokenize='porter unicode61')"
+            )
+
+    def index_project(self, project):
+        doc = build_document(project)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [project.pk])
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, department, description, files_text) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [project.pk, doc['title'], doc['department'], doc['description'], doc['files_text']]
+            )
+
+    def remove_project(self, project_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [project_id])
+
+    @staticmethod
+    def _match_expression(query):
+        # Quote every token so user input can't inject FTS5 query syntax; tokens are ANDed
+        tokens = _TOKEN_RE.findall(query)
+        return ' '.join(f'"{token}"' for token in tokens) if tokens else None
+
+    def search(self, query, selected=None, limit=MAX_HITS):
+        match = self._match_expression(query)
+        if match is None:
+            return []
+        weights = ', '.join(str(w) for w in self.weights)
+        filters, filter_params = self._filter_sql(selected)
+        with self.connection.cursor() as cursor:
+            # The join also drops index rows of deleted projects (FTS5 tables have no foreign keys)
+            cursor.execute(
+                f'SELECT {SEARCH_TABLE}.rowid FROM {SEARCH_TABLE} '
+                f'JOIN {Project._meta.db_table} p ON p.id = {SEARCH_TABLE}.rowid '
+                f'WHERE {SEARCH_TABLE} MATCH %s{filters} '
+                f'ORDER BY bm25({SEARCH_TABLE}, {weights}), {SEARCH_TABLE}.rowid DESC LIMIT %s',
+                [match, *filter_params, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match_sql(self, query):
+        match = self._match_expression(query)
+        if match is None:
+            return None
+        return f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match]
+
+
+_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+_ensured = set() # DB aliases whose index table has been created in this process
+
+
+def ensure_search_index(using=None, **kwargs):
+    # post_migrate handler: create the index table outside of any request/test transaction
+    using = using or router.db_for_write(Project)
+    backend_class = _BACKENDS.get(connections[using].vendor)
+    if backend_class:
+        backend_class(connections[using]).ensure_index()
+        _ensured.add(using)
+
+
+def get_backend(using=None):
+    using = using or router.db_for_write(Project)
+    connection = connections[using]
+    backend_class = _BACKENDS.get(connection.vendor)
+    if backend_class is None:
+        return None
+    backend = backend_class(connection)
+    if using not in _ensured:
+        backend.ensure_index()
+        _ensured.add(using)
+    return backend
+
+
+def index_project(project):
+    backend = get_backend()
+    if backend:
+        backend.index_project(project)
+
+
+def remove_project(project_id):
+    backend = get_backend()
+    if backend:
+        backend.remove_project(project_id)
+
+
+def search_project_ids(query, selected=None, limit=MAX_HITS):
+    """
+    Ids of the projects matching `query` and the {field: value} list filters, best match first.
+    The filters are part of the ranked query, so `limit` caps the filtered hits.
+    """
+    backend = get_backend(router.db_for_read(Project))
+    if backend is None:
+        # No inverted index for this database vendor; fall back to a plain substring scan
+        logger.warning("No full-text search backend for this database; falling back to icontains.")
+        return list(
+            Project.objects.filter(title__icontains=query, **(selected or {})).values_list('id', flat=True)[:limit]
+        )
+    return backend.search(query, selected, limit)
+
+
+def matching_projects(query):
+    # Every project matching `query` as a queryset (uncapped, unranked), e.g. for exports and facet counts
+    backend = get_backend(router.db_for_read(Project))
+    if backend is None:
+        return Project.objects.filter(title__icontains=query)
+    match = backend.match_sql(query)
+    if match is None:
+        return Project.objects.none()
+    return Project.objects.filter(id__in=RawSQL(*match))
+
+
+def facet_cells(query):
+    # ((type, department, year), count) for every match of `query`, grouped in the database
+    rows = matching_projects(query).order_by().values_list('type', 'department', 'year').annotate(total=Count('id'))
+    return (((row[0], row[1] or '', row[2]), row[3]) for row in rows)
+
+
+def rebuild_index(batch_size=500):
+    backend = get_backend()
+    if backend is None:
+        return 0
+    caching.invalidate([caching.SEARCH_TAG])
+    count = 0
+    for project in Project.objects.only('id', 'title', 'department', 'description').iterator(chunk_size=batch_size):
+        backend.index_project(project)
+        count += 1
+    return count
@@ -1,33 +1,68 @@
 # backend/apps/projects/serializers.py
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Project, ProjectFile # Import your models
+from .models import FileProcessingJob, Project, ProjectFile, UploadSession # Import your models
 # Import UserSerializer if needed for owner/collaborators field representation
 from apps.users.serializers import UserSerializer # Assuming UserSerializer is in apps.users.serializers
 from apps.users.models import User # Import User model
 
+# Preview artifact kinds rendered per file type (see processing/previews.py)
+PREVIEW_KINDS = {
+    ProjectFile.FileType.CODE: ['code'],
+    ProjectFile.FileType.PDF: ['text', 'thumbnail'],
+    ProjectFile.FileType.IMAGE: ['thumbnail'],
+}
+
 class ProjectFileSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
+    previews = serializers.SerializerMethodField()
 
     class Meta:
         model = ProjectFile
-        fields = ['id', 'file', 'file_type', 'original_filename', 'extracted_metadata', 'uploaded_at', 'file_url']
-        read_only_fields = ['file_type', 'original_filename', 'extracted_metadata', 'uploaded_at', 'file_url']
+        fields = ['id', 'file', 'file_type', 'original_filename', 'sha256', 'extracted_metadata', 'processing_status', 'uploaded_at', 'file_url', 'previews']
+        read_only_fields = ['file_type', 'original_filename', 'sha256', 'extracted_metadata', 'processing_status', 'uploaded_at', 'file_url', 'previews']
         extra_kwargs = {
              'file': {'write_only': True} # Prevent file data from being sent in read requests
         }
 
     def get_file_url(self, obj):
-        # Generate absolute URL for the file
+        # Generate absolute URL for the file, served by the Range/ETag-aware download endpoint
         if obj.file:
+             url = reverse('project-file-download', kwargs={'pk': obj.project_id, 'file_id': obj.id})
              # Access the request context from the serializer context
              request = self.context.get('request')
              if request:
-                 return request.build_absolute_uri(obj.file.url)
-             return obj.file.url # Fallback to relative URL if no request context
+                 return request.build_absolute_uri(url)
+             return url # Fallback to relative URL if no request context
         return None
 
+    def get_previews(self, obj):
+        # {kind: url} of the preview artifacts this file type gets, once processing has finished.
+        # A kind can still 404 when its optional renderer (Pillow, PyMuPDF) isn't installed.
+        if obj.processing_status != ProjectFile.ProcessingStatus.DONE:
+            return {}
+        request = self.context.get('request')
+        urls = {}
+        for kind in PREVIEW_KINDS.get(obj.file_type, []):
+            url = reverse('project-file-preview', kwargs={'pk': obj.project_id, 'file_id': obj.id, 'kind': kind})
+            urls[kind] = request.build_absolute_uri(url) if request else url
+        return urls
+
     # We'll handle file creation via a separate view/action, not this serializer's create
 
+class FileProcessingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FileProcessingJob
+        fields = ['id', 'status', 'attempts', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    # State of a chunked upload; `received_bytes` is the offset the next chunk must start at
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'total_size', 'received_bytes', 'status', 'created_at', 'updated_at']
+        read_only_fields = fields
+
 class ProjectSerializer(serializers.ModelSerializer):
     # Read-only fields for owner and collaborators if you want nested representation
     owner = UserSerializer(read_only=True)
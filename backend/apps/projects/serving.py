@@ -0,0 +1,160 @@
+# backend/apps/projects/serving.py
+# File downloads with HTTP validators (ETag / Last-Modified), single byte ranges and
+# hand-off of the byte transfer to the front web server.
+#
+# settings.FILE_SERVING_BACKEND:
+#   'django'   (default) FileResponse, which uses wsgi.file_wrapper/sendfile for whole files
+#   'nginx'    X-Accel-Redirect to settings.FILE_SERVING_INTERNAL_PREFIX + storage name,
+#              e.g. `location /protected-media/ { internal; alias /srv/codenest/media/; }`
+#   'sendfile' X-Sendfile with the absolute path (Apache mod_xsendfile, lighttpd)
+# Remote storages without a local path (S3) are redirected to the storage URL instead.
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+STREAM_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def etag_matches(request, etag):
+    # If-None-Match check, ignoring weak-validator prefixes
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def is_not_modified(request, etag, last_modified=None):
+    if request.headers.get('If-None-Match'):
+        return etag_matches(request, etag) # If-None-Match takes precedence over If-Modified-Since
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(since and last_modified and int(last_modified.timestamp()) <= since)
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single satisfiable `bytes=` range, None when the header
+    should be ignored (absent, malformed or multi-range), or 'unsatisfiable'.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None # Includes multi-range requests; serving the whole file is allowed
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first: # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _iter_range(fh, start, length):
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = fh.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        fh.close()
+
+
+def _local_path(storage, name):
+    try:
+        return storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+def serve_file(request, storage, name, *, filename, etag, last_modified=None, as_attachment=False,
+               content_type=None):
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    validators = {'ETag': etag, 'Accept-Ranges': 'bytes'}
+    if last_modified:
+        validators['Last-Modified'] = http_date(last_modified.timestamp())
+
+    if is_not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    path = _local_path(storage, name)
+    backend = getattr(settings, 'FILE_SERVING_BACKEND', 'django')
+    if path is None:
+        # No local file to stream or hand off (e.g. S3): send the client to the storage URL
+        response = HttpResponseRedirect(storage.url(name))
+    elif backend == 'nginx':
+        prefix = getattr(settings, 'FILE_SERVING_INTERNAL_PREFIX', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name.lstrip('/'))
+    elif backend == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        response = _django_response(request, storage, name, content_type, etag)
+
+    # The front server applies Range itself for X-Accel-Redirect/X-Sendfile responses
+    for header, value in validators.items():
+        response.setdefault(header, value)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _django_response(request, storage, name, content_type, etag):
+    size = storage.size(name)
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range.strip() != etag:
+        byte_range = None # The client's partial copy is stale; send the whole file
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        # Whole file: FileResponse lets the WSGI server use sendfile() (zero-copy)
+        return FileResponse(storage.open(name, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _iter_range(storage.open(name, 'rb'), start, length), status=206, content_type=content_type
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    return response
+
+
+def serve_project_file(request, project_file, as_attachment=False):
+    # Content-addressed files get their hash as a strong ETag; older ones fall back to id + upload time
+    if project_file.sha256:
+        etag = f'"{project_file.sha256}"'
+    else:
+        etag = f'"{project_file.pk}-{int(project_file.uploaded_at.timestamp())}"'
+    return serve_file(
+        request, project_file.file.storage, project_file.file.name,
+        filename=project_file.original_filename or project_file.file.name.rsplit('/', 1)[-1],
+        etag=etag,
+        last_modified=project_file.uploaded_at,
+        as_attachment=as_attachment,
+    )
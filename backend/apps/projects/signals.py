@@ -0,0 +1,181 @@
+# backend/apps/projects/signals.py
+from collections import Counter
+
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Project, ProjectFile
+from . import caching, codesearch, conditional, duplicates, facets, search
+from .processing import jobs as processing_jobs
+
+
+@receiver(pre_save, sender=Project)
+def remember_facet_key(sender, instance, raw=False, **kwargs):
+    # Stash the stored (type, department, year) so post_save can move the project between facet cells,
+    # and the stored search fields so it can tell whether cached search results went stale
+    instance._facet_key_before_save = None
+    instance._search_fields_before_save = None
+    if instance.pk and not raw:
+        row = Project.objects.filter(pk=instance.pk).values_list(
+            'type', 'department', 'year', *search.PROJECT_FIELDS
+        ).first()
+        if row is not None:
+            instance._facet_key_before_save = (row[0], row[1] or '', row[2])
+            instance._search_fields_before_save = row[3:]
+
+
+def _search_fields_changed(instance):
+    before = getattr(instance, '_search_fields_before_save', None)
+    return before is None or before != tuple(getattr(instance, field) for field in search.PROJECT_FIELDS)
+
+
+@receiver(post_save, sender=Project)
+def update_facet_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_key = getattr(instance, '_facet_key_before_save', None)
+    new_key = facets.facet_key(instance)
+    if old_key == new_key:
+        return
+    deltas = Counter({new_key: 1})
+    if old_key is not None:
+        deltas[old_key] -= 1
+    facets.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Project)
+def update_facet_counts_on_delete(sender, instance, **kwargs):
+    facets.apply_deltas({facets.facet_key(instance): -1})
+
+
+@receiver(post_save, sender=Project)
+def invalidate_cache_on_project_save(sender, instance, created, raw=False, **kwargs):
+    # Pages showing the project are stale; a new project, or one moved between filters,
+    # also shifts the pages of the lists it joins or leaves
+    if raw:
+        return
+    tags = [caching.project_tag(instance.pk)]
+    if _search_fields_changed(instance):
+        tags.append(caching.SEARCH_TAG)
+    old_key = getattr(instance, '_facet_key_before_save', None)
+    new_key = facets.facet_key(instance)
+    if old_key != new_key:
+        tags += caching.membership_tags(new_key)
+        if old_key is not None:
+            tags += caching.membership_tags(old_key)
+    caching.invalidate(tags)
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_cache_on_project_delete(sender, instance, **kwargs):
+    caching.invalidate([
+        caching.project_tag(instance.pk), caching.SEARCH_TAG, *caching.membership_tags(facets.facet_key(instance))
+    ])
+
+
+@receiver(post_save, sender=Project)
+def index_project_on_save(sender, instance, raw=False, **kwargs):
+    if raw or not _search_fields_changed(instance): # Skip fixture loading and saves the document doesn't see
+        return
+    search.index_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_from_index(sender, instance, **kwargs):
+    search.remove_project(instance.pk)
+
+
+@receiver(pre_save, sender=ProjectFile)
+def remember_search_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Stash the file's stored contribution to the search document. Saves that only touch other
+    # fields (e.g. the worker's processing_status) leave it unchanged without a lookup
+    instance._search_text_before_save = None
+    if not instance.pk or raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(search.FILE_FIELDS):
+        instance._search_text_before_save = _file_search_text(instance)
+        return
+    row = ProjectFile.objects.filter(pk=instance.pk).values_list(*search.FILE_FIELDS).first()
+    if row is not None:
+        instance._search_text_before_save = search.file_text(*row)
+
+
+def _file_search_text(instance):
+    return search.file_text(*(getattr(instance, field) for field in search.FILE_FIELDS))
+
+
+@receiver(post_save, sender=ProjectFile)
+def queue_file_processing(sender, instance, created, raw=False, **kwargs):
+    # Extraction runs in the `process_files` worker; the upload request returns straight away
+    if created and not raw:
+        processing_jobs.enqueue(instance)
+
+
+@receiver(post_delete, sender=ProjectFile)
+def release_file_storage(sender, instance, **kwargs):
+    instance.release_storage()
+
+
+def _deleted_with_project(origin):
+    # True when a ProjectFile delete cascades from deleting its project (instance or queryset)
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Project
+
+
+@receiver(post_save, sender=ProjectFile)
+@receiver(post_delete, sender=ProjectFile)
+def reindex_project_on_file_change(sender, instance, raw=False, origin=None, **kwargs):
+    # File names and extracted_metadata text are part of the project's search document.
+    # Files removed along with their project are skipped: the project's own delete handlers
+    # drop its document and cache entries, so rebuilding it once per file would be wasted work
+    if raw or _deleted_with_project(origin):
+        return
+    if kwargs.get('signal') is post_save and not kwargs.get('created'):
+        if getattr(instance, '_search_text_before_save', None) == _file_search_text(instance):
+            # Only fields outside the search document changed: pages showing the project are stale, search isn't
+            caching.invalidate([caching.project_tag(instance.project_id)])
+            return
+    caching.invalidate([caching.project_tag(instance.project_id), caching.SEARCH_TAG])
+    project = Project.objects.filter(pk=instance.project_id).only('id', 'title', 'department', 'description').first()
+    if project is not None:
+        search.index_project(project)
+
+
+@receiver(m2m_changed, sender=Project.collaborators.through)
+def touch_project_on_collaborator_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # The M2M rows carry no timestamp, so collaborator changes bump updated_at for the HTTP validators
+    if reverse and action == 'pre_clear':
+        # user.collaborating_projects.clear(): remember the projects before their rows are gone
+        instance._cleared_project_ids = list(instance.collaborating_projects.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        conditional.touch_projects([instance.pk])
+    elif action == 'post_clear':
+        conditional.touch_projects(getattr(instance, '_cleared_project_ids', []))
+    elif pk_set:
+        conditional.touch_projects(pk_set)
+
+
+@receiver(post_save, sender=ProjectFile)
+def touch_project_on_file_update(sender, instance, created, raw=False, **kwargs):
+    # New and deleted files change the validator by themselves (file count, newest uploaded_at);
+    # edits to an existing file, such as its extracted metadata, don't
+    if not created and not raw:
+        conditional.touch_projects([instance.project_id])
+
+
+@receiver(post_delete, sender=ProjectFile)
+def drop_unreferenced_fingerprint(sender, instance, **kwargs):
+    # Near-duplicate fingerprints are per content hash too; drop them with the last file holding it
+    if instance.file_type in (ProjectFile.FileType.CODE, ProjectFile.FileType.PDF):
+        duplicates.remove_unreferenced([instance.sha256])
+
+
+@receiver(post_delete, sender=ProjectFile)
+def drop_unreferenced_code(sender, instance, **kwargs):
+    # The code search index keeps one document per content hash; drop it with the last file holding it
+    if instance.file_type == ProjectFile.FileType.CODE:
+        codesearch.remove_unreferenced([instance.sha256])
@@ -0,0 +1,181 @@
+# backend/apps/projects/similarity.py
+# "Related projects": TF-IDF vectors of title, description and department compared by cosine similarity,
+# with the top-K neighbours of every project precomputed into RelatedProject.
+# `manage.py refresh_related_projects` vectorizes the catalog into one sparse matrix (NumPy/SciPy) and
+# multiplies only the rows that need it, in chunks of X[rows] @ X.T:
+# - a full build computes every row
+# - an incremental refresh computes the rows of projects changed since the last refresh, of projects
+#   whose lists mention a changed or deleted project, and of projects a changed one would now displace
+# Reading a project's neighbours is one indexed lookup, whatever the size of the catalog.
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.utils import timezone
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError: # Only refresh() needs them; serving the precomputed lists doesn't
+    np = sparse = None
+
+from .models import Project, RelatedProject
+
+TOP_K = getattr(settings, 'RELATED_PROJECTS_TOP_K', 10)
+MIN_SCORE = getattr(settings, 'RELATED_PROJECTS_MIN_SCORE', 0.05)
+CHUNK_SIZE = 500 # Rows multiplied (and written) at a time
+TITLE_WEIGHT = 2 # Titles are short and say the most about a project
+
+_TOKEN_RE = re.compile(r'[^\W\d_]{2,}', re.UNICODE) # Words of two or more letters
+STOP_WORDS = frozenset('''
+    a an and are as at be by for from has have in into is it its of on or our that the their this to
+    using via was we were which with project projects system based
+'''.split())
+
+
+def terms(title, description, department):
+    # Term counts of one project; the department is a single term, so "Computer Engineering" doesn't
+    # make every project of that department look like it's about computers
+    counts = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1)):
+        for token in _TOKEN_RE.findall((text or '').lower()):
+            if token not in STOP_WORDS:
+                counts[token] += weight
+    if department and department.strip():
+        counts[f'department:{department.strip().lower()}'] += 1
+    return counts
+
+
+def build_matrix(rows):
+    """
+    (ids, X) for rows of (id, title, description, department): X is a CSR matrix with one L2-normalized
+    TF-IDF row per project (sublinear tf, smoothed idf), so X @ X.T holds cosine similarities.
+    """
+    ids, indptr, indices, data = [], [0], [], []
+    vocabulary = {}
+    for pk, title, description, department in rows:
+        ids.append(pk)
+        for term, count in terms(title, description, department).items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            data.append(1.0 + math.log(count))
+        indptr.append(len(indices))
+    X = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(ids), len(vocabulary)),
+    )
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    X.data *= (np.log((1 + X.shape[0]) / (1 + df)) + 1.0)[X.indices]
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return ids, (sparse.diags(1.0 / norms) @ X).tocsr()
+
+
+def iter_neighbours(X, rows, k=TOP_K, min_score=MIN_SCORE):
+    """
+    Yields chunks of {row: [(row, score), ...]} with the best `k` neighbours of each of `rows`
+    (positions in X), best first; ties go to the lower row. A project is not its own neighbour.
+    """
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        S = (X[chunk] @ X.T).tocsr()
+        result = {}
+        for i, row in enumerate(chunk):
+            cols = S.indices[S.indptr[i]:S.indptr[i + 1]]
+            scores = S.data[S.indptr[i]:S.indptr[i + 1]]
+            keep = (cols != row) & (scores >= min_score)
+            cols, scores = cols[keep], scores[keep]
+            if len(scores) > k:
+                best = np.argpartition(-scores, k)[:k]
+                cols, scores = cols[best], scores[best]
+            result[row] = [(int(cols[j]), float(scores[j])) for j in np.lexsort((cols, -scores))]
+        yield result
+
+
+def _in_chunks(values, size=CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _stale_rows(X, ids, position, k, min_score):
+    # Rows whose stored list may be out of date: projects never computed or changed since their list was
+    changed = [
+        position[pk] for pk in Project.objects.filter(
+            Q(related_computed_at__isnull=True) | Q(updated_at__gt=F('related_computed_at'))
+        ).values_list('id', flat=True)
+        if pk in position
+    ]
+    changed_ids = [ids[row] for row in changed]
+    stale = set(changed)
+
+    # Lists that mention a changed project (its score moved) or a deleted one
+    mentioning = set()
+    for chunk in _in_chunks(changed_ids):
+        mentioning.update(RelatedProject.objects.filter(related_id__in=chunk).values_list('project_id', flat=True))
+    mentioning.update(
+        RelatedProject.objects.exclude(related_id__in=Project.objects.values('id')).values_list('project_id', flat=True)
+    )
+    stale.update(position[pk] for pk in mentioning if pk in position)
+
+    # Lists a changed project would now enter: its similarity beats the list's k-th score
+    # (or just the minimum score when the list isn't full)
+    if changed:
+        threshold = np.full(len(ids), min_score)
+        for pk, entries, lowest in RelatedProject.objects.values_list('project_id').annotate(
+            entries=Count('id'), lowest=Min('score')
+        ).order_by():
+            if pk in position and entries >= k:
+                threshold[position[pk]] = lowest
+        best = np.zeros(len(ids))
+        for chunk in _in_chunks(changed):
+            best = np.maximum(best, (X[chunk] @ X.T).max(axis=0).toarray().ravel())
+        stale.update(np.flatnonzero(best > threshold).tolist())
+    return sorted(stale)
+
+
+def refresh(full=False, k=TOP_K, min_score=MIN_SCORE):
+    """
+    Recomputes neighbour lists: all of them with `full` (or when none exist yet), otherwise only the stale ones.
+    Returns (lists recomputed, projects in the catalog).
+    """
+    if np is None:
+        raise ImproperlyConfigured("Related projects need numpy and scipy.")
+    started = timezone.now() # Changes made while the refresh runs are picked up by the next one
+    # Projects whose list came back empty have no RelatedProject rows, so the timestamp lives on Project
+    last = Project.objects.aggregate(last=Max('related_computed_at'))['last']
+    rows = Project.objects.order_by('id').values_list('id', 'title', 'description', 'department')
+    ids, X = build_matrix(rows.iterator(chunk_size=2000))
+    if not ids:
+        RelatedProject.objects.all().delete()
+        return 0, 0
+    position = {pk: row for row, pk in enumerate(ids)}
+    if full or last is None:
+        targets = list(range(len(ids)))
+    else:
+        targets = _stale_rows(X, ids, position, k, min_score)
+
+    with transaction.atomic():
+        if full or last is None:
+            RelatedProject.objects.all().delete()
+        for neighbours in iter_neighbours(X, targets, k, min_score):
+            chunk_ids = [ids[row] for row in neighbours]
+            RelatedProject.objects.filter(project_id__in=chunk_ids).delete()
+            # update() leaves updated_at alone, so this doesn't mark the projects as changed
+            Project.objects.filter(pk__in=chunk_ids).update(related_computed_at=started)
+            RelatedProject.objects.bulk_create([
+                RelatedProject(project_id=ids[row], related_id=ids[col], rank=rank, score=score, computed_at=started)
+                for row, entries in neighbours.items()
+                for rank, (col, score) in enumerate(entries)
+            ], batch_size=1000)
+    return len(targets), len(ids)
+
+
+def neighbours(project_id, limit=TOP_K):
+    # [(related project id, score)], best first
+    return list(
+        RelatedProject.objects.filter(project_id=project_id).order_by('rank').values_list('related_id', 'score')[:limit]
+    )
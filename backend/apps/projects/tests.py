@@ -1,3 +1,1520 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import struct
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import msgpack
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.users.models import User
+from . import batch, caching, codesearch, duplicates, exports, fast_serializers, imports, search, similarity
+from .models import (
+    CodeDocument, CodeTrigram, ContentFingerprint, FileBlob, FileProcessingJob, LshBucket, Project, ProjectFacetCount,
+    ProjectFile, RelatedProject, UploadSession,
+)
+from .processing import extractors, fingerprints, jobs
+from .processing.extractors import run_extractors
+from .serializers import ProjectSerializer
+
+# Uploaded files in tests go to a throwaway directory instead of the real MEDIA_ROOT
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='codenest-test-media-')
+
+
+class QueryBudgetMixin:
+    """
+    Asserts that a block of code stays within a fixed number of SQL queries.
+    """
+    def assertMaxQueries(self, budget, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        executed = len(ctx.captured_queries)
+        self.assertLessEqual(
+            executed, budget,
+            f"Query budget exceeded: {executed} > {budget}\n" +
+            "\n".join(q['sql'] for q in ctx.captured_queries)
+        )
+        return result
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ProjectQueryBudgetTests(QueryBudgetMixin, TestCase):
+    # One query for projects joined with owner, one prefetch each for collaborators and files
+    LIST_BUDGET = 3
+    RETRIEVE_BUDGET = 3
+    # One query for the project existence check, one for its files
+    LIST_FILES_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='owner@rdu.edu.tr', password='pass12345', first_name='Owner', last_name='User'
+        )
+        cls.collaborators = [
+            User.objects.create_user(
+                email=f'collab{i}@rdu.edu.tr', password='pass12345', first_name='Collab', last_name=str(i)
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _make_projects(self, count, files_per_project=2):
+        projects = []
+        for i in range(count):
+            project = Project.objects.create(owner=self.owner, title=f'Project {i}', department='SE', year=2024)
+            project.collaborators.set(self.collaborators)
+            for j in range(files_per_project):
+                ProjectFile.objects.create(
+                    project=project,
+                    file=ContentFile(b'print("hello")', name=f'main_{j}.py'),
+                    original_filename=f'main_{j}.py',
+                )
+            projects.append(project)
+        return projects
+
+    def test_list_query_count_is_constant(self):
+        self._make_projects(3)
+        response = self.assertMaxQueries(self.LIST_BUDGET, self.client.get, '/api/projects/')
+        self.assertEqual(response.status_code, 200)
+
+        self._make_projects(12)
+        response = self.assertMaxQueries(self.LIST_BUDGET, self.client.get, '/api/projects/?page_size=15')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 15)
+
+    def test_retrieve_within_budget(self):
+        project = self._make_projects(1, files_per_project=5)[0]
+        response = self.assertMaxQueries(self.RETRIEVE_BUDGET, self.client.get, f'/api/projects/{project.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['files']), 5)
+        self.assertEqual(len(response.data['collaborators']), 3)
+
+    def test_list_files_within_budget(self):
+        project = self._make_projects(1, files_per_project=10)[0]
+        response = self.assertMaxQueries(
+            self.LIST_FILES_BUDGET, self.client.get, f'/api/projects/{project.id}/list_files/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 10)
+
+
+class ProjectCursorPaginationTests(QueryBudgetMixin, TestCase):
+    # Page of projects + prefetches for collaborators and files
+    PAGE_BUDGET = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='pager@rdu.edu.tr', password='pass12345', first_name='Page', last_name='User'
+        )
+        for i in range(25):
+            Project.objects.create(
+                owner=cls.owner, title=f'Project {i}',
+                type=Project.ProjectType.CODE if i % 2 else Project.ProjectType.PAPER,
+                department='SE', year=2020 + i % 3,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            response = self.assertMaxQueries(self.PAGE_BUDGET, self.client.get, url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_cursor_walk_covers_catalog_once(self):
+        seen = self._walk('/api/projects/?page_size=10')
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        expected = list(Project.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filtered_cursor_walk(self):
+        seen = self._walk('/api/projects/?type=CODE&page_size=5')
+        expected = list(
+            Project.objects.filter(type=Project.ProjectType.CODE)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_invalid_year_returns_empty_page(self):
+        response = self.client.get('/api/projects/?year=abc')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ProjectSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='searcher@rdu.edu.tr', password='pass12345', first_name='Search', last_name='User'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _search(self, query, **params):
+        response = self.client.get('/api/projects/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_title_match_ranks_above_description_match(self):
+        in_description = Project.objects.create(
+            owner=self.owner, title='Bridge design', description='Uses a neural network for load estimation'
+        )
+        in_title = Project.objects.create(owner=self.owner, title='Neural network compiler', description='')
+        Project.objects.create(owner=self.owner, title='Unrelated', description='Nothing here')
+
+        self.assertEqual(self._search('neural network'), [in_title.id, in_description.id])
+
+    def test_index_updates_on_save_and_delete(self):
+        project = Project.objects.create(owner=self.owner, title='Compiler', department='Computer Engineering')
+        self.assertEqual(self._search('robotics'), [])
+
+        project.description = 'A robotics control stack'
+        project.save()
+        self.assertEqual(self._search('robotics'), [project.id])
+
+        project.delete()
+        self.assertEqual(self._search('robotics'), [])
+
+    def test_extracted_metadata_is_searchable(self):
+        project = Project.objects.create(owner=self.owner, title='Thesis')
+        project_file = ProjectFile.objects.create(
+            project=project,
+            file=ContentFile(b'%PDF-1.4', name='thesis.pdf'),
+            original_filename='thesis.pdf',
+            extracted_metadata={'text': 'Quantum annealing for scheduling'},
+        )
+        self.assertEqual(self._search('annealing'), [project.id])
+        project_file.delete()
+        self.assertEqual(self._search('annealing'), [])
+
+    @override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+    def test_deleting_a_project_does_not_reindex_it_per_file(self):
+        project = Project.objects.create(owner=self.owner, title='Archive')
+        for n in range(3):
+            ProjectFile.objects.create(
+                project=project, file=ContentFile(b'data', name=f'{n}.txt'), original_filename=f'{n}.txt'
+            )
+        with mock.patch('apps.projects.search.index_project') as index_project:
+            project.delete()
+        index_project.assert_not_called()
+        self.assertEqual(self._search('archive'), [])
+
+    def test_search_honours_list_filters(self):
+        code = Project.objects.create(owner=self.owner, title='Parser generator', type=Project.ProjectType.CODE)
+        Project.objects.create(owner=self.owner, title='Parser survey', type=Project.ProjectType.PAPER)
+        self.assertEqual(self._search('parser', type='CODE'), [code.id])
+
+    def test_filters_apply_before_the_hit_cap(self):
+        code = Project.objects.create(owner=self.owner, title='Parser generator', type=Project.ProjectType.CODE)
+        for n in range(3):
+            Project.objects.create(
+                owner=self.owner, title=f'Parser parser survey {n}', description='parser', type=Project.ProjectType.PAPER
+            )
+        self.assertEqual(search.search_project_ids('parser', {'type': 'CODE'}, limit=1), [code.id])
+        facets = self.client.get('/api/projects/facets/', {'q': 'parser'}).data
+        self.assertEqual({item['value']: item['count'] for item in facets['type']}, {'PAPER': 3, 'CODE': 1})
+
+
+class ProjectFacetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='facets@rdu.edu.tr', password='pass12345', first_name='Facet', last_name='User'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _counts(self, data, field):
+        return {item['value']: item['count'] for item in data[field]}
+
+    def test_counts_follow_save_and_delete(self):
+        a = Project.objects.create(owner=self.owner, title='A', type='CODE', department='SE', year=2023)
+        b = Project.objects.create(owner=self.owner, title='B', type='CODE', department='CE', year=2024)
+        Project.objects.create(owner=self.owner, title='C', type='PAPER', department='SE', year=2024)
+
+        data = self.client.get('/api/projects/facets/').data
+        self.assertEqual(self._counts(data, 'type'), {'CODE': 2, 'PAPER': 1})
+        self.assertEqual(self._counts(data, 'department'), {'SE': 2, 'CE': 1})
+        self.assertEqual(self._counts(data, 'year'), {2023: 1, 2024: 2})
+
+        b.type = 'BOOK'
+        b.save()
+        a.delete()
+        data = self.client.get('/api/projects/facets/').data
+        self.assertEqual(self._counts(data, 'type'), {'BOOK': 1, 'PAPER': 1})
+        self.assertEqual(self._counts(data, 'department'), {'SE': 1, 'CE': 1})
+
+    def test_unmatchable_filter_gives_empty_facets(self):
+        Project.objects.create(owner=self.owner, title='A', type='CODE', department='SE', year=2023)
+        empty = {'type': [], 'department': [], 'year': []}
+        response = self.client.get('/api/projects/', {'year': 'abc', 'facets': 'true'})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['facets'], empty)
+        self.assertEqual(self.client.get('/api/projects/facets/', {'year': 'abc'}).data, empty)
+
+    def test_one_row_per_cell(self):
+        Project.objects.create(owner=self.owner, title='A', type='CODE', department='SE')
+        Project.objects.create(owner=self.owner, title='B', type='CODE', department='SE')
+        self.assertEqual(ProjectFacetCount.objects.get(type='CODE', department='SE', year=None).count, 2)
+        for year in (None, 2024):
+            ProjectFacetCount.objects.create(type='PAPER', department='SE', year=year, count=1)
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                ProjectFacetCount.objects.create(type='PAPER', department='SE', year=year, count=1)
+
+    def test_filtered_list_returns_facets_in_one_response(self):
+        Project.objects.create(owner=self.owner, title='A', type='CODE', department='SE', year=2023)
+        Project.objects.create(owner=self.owner, title='B', type='PAPER', department='SE', year=2023)
+        Project.objects.create(owner=self.owner, title='C', type='CODE', department='CE', year=2023)
+
+        # Page (3 queries) + a single read of the facet table
+        response = self.assertMaxQueries(4, self.client.get, '/api/projects/', {'department': 'SE', 'facets': 'true'})
+        self.assertEqual(len(response.data['results']), 2)
+        facets = response.data['facets']
+        # The selected dimension still lists its alternatives; the others are narrowed to SE
+        self.assertEqual(self._counts(facets, 'department'), {'SE': 2, 'CE': 1})
+        self.assertEqual(self._counts(facets, 'type'), {'CODE': 1, 'PAPER': 1})
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='uploader@rdu.edu.tr', password='pass12345', first_name='Up', last_name='Loader'
+        )
+        cls.project = Project.objects.create(owner=cls.owner, title='Drawings')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.payload = bytes(range(256)) * 1000 # 256 KB
+
+    def _start(self):
+        response = self.client.post(
+            f'/api/projects/{self.project.id}/uploads/',
+            {'filename': 'plan.dwg', 'size': len(self.payload)}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return f"/api/projects/{self.project.id}/uploads/{response.data['id']}/"
+
+    def _put(self, url, offset, data):
+        return self.client.generic(
+            'PUT', url, data, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunked_upload_resume_and_finalize(self):
+        url = self._start()
+        self.assertEqual(self._put(url, 0, self.payload[:100_000]).data['received_bytes'], 100_000)
+
+        # A chunk at the wrong offset is rejected; the client asks for the offset and resumes
+        self.assertEqual(self._put(url, 50_000, self.payload[50_000:]).status_code, 409)
+        offset = self.client.get(url).data['received_bytes']
+        self.assertEqual(self._put(url, offset, self.payload[offset:]).status_code, 200)
+
+        expected = hashlib.sha256(self.payload).hexdigest()
+        response = self.client.post(url + 'finalize/', {'sha256': expected}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sha256'], expected)
+        self.assertEqual(response.data['file_type'], ProjectFile.FileType.AUTOCAD)
+
+        project_file = ProjectFile.objects.get(pk=response.data['id'])
+        with project_file.file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.payload)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.Status.COMPLETE)
+
+    def test_finalize_rejects_incomplete_and_mismatched_uploads(self):
+        url = self._start()
+        self._put(url, 0, self.payload[:10])
+        self.assertEqual(self.client.post(url + 'finalize/').status_code, 400)
+
+        self._put(url, 10, self.payload[10:])
+        response = self.client.post(url + 'finalize/', {'sha256': '0' * 64}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.Status.ABORTED)
+        self.assertFalse(ProjectFile.objects.exists())
+
+    def test_competing_puts_at_same_offset_keep_digest_consistent(self):
+        url = self._start()
+        self.assertEqual(self._put(url, 0, self.payload[:100_000]).status_code, 200)
+        # A second PUT for the same offset, carrying different bytes, loses and must not touch the staged data
+        self.assertEqual(self._put(url, 0, b'\xff' * 100_000).status_code, 409)
+        self.assertEqual(self._put(url, 100_000, self.payload[100_000:]).status_code, 200)
+
+        response = self.client.post(url + 'finalize/')
+        self.assertEqual(response.status_code, 201)
+        project_file = ProjectFile.objects.get(pk=response.data['id'])
+        with project_file.file.open('rb') as stored:
+            on_disk = stored.read()
+        self.assertEqual(response.data['sha256'], hashlib.sha256(on_disk).hexdigest())
+        self.assertEqual(on_disk, self.payload)
+
+    def test_only_owner_can_upload(self):
+        other = User.objects.create_user(
+            email='other@rdu.edu.tr', password='pass12345', first_name='Other', last_name='User'
+        )
+        url = self._start()
+        self.client.force_authenticate(other)
+        self.assertEqual(self._put(url, 0, self.payload).status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FileBlobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='blobs@rdu.edu.tr', password='pass12345', first_name='Blob', last_name='User'
+        )
+
+    def _upload(self, project, content, name='textbook.pdf'):
+        return ProjectFile.objects.create(project=project, file=ContentFile(content, name=name), original_filename=name)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self._upload(Project.objects.create(owner=self.owner, title='One'), b'%PDF same bytes')
+        second = self._upload(Project.objects.create(owner=self.owner, title='Two'), b'%PDF same bytes')
+        other = self._upload(Project.objects.create(owner=self.owner, title='Three'), b'%PDF other bytes')
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.blob_id, other.blob_id)
+        self.assertEqual(FileBlob.objects.get(pk=first.blob_id).ref_count, 2)
+
+    def test_blob_is_removed_with_its_last_reference(self):
+        first = self._upload(Project.objects.create(owner=self.owner, title='One'), b'shared dataset')
+        second_project = Project.objects.create(owner=self.owner, title='Two')
+        self._upload(second_project, b'shared dataset')
+        blob = FileBlob.objects.get(pk=first.blob_id)
+        storage, name = blob.file.storage, blob.file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(FileBlob.objects.get(pk=blob.pk).ref_count, 1)
+        self.assertTrue(storage.exists(name))
+
+        # Deleting the project cascades to its files and releases the last reference
+        with self.captureOnCommitCallbacks(execute=True):
+            second_project.delete()
+        self.assertFalse(FileBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(storage.exists(name))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FileProcessingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='worker@rdu.edu.tr', password='pass12345', first_name='Work', last_name='Er'
+        )
+        cls.project = Project.objects.create(owner=cls.owner, title='Pipeline')
+
+    def test_upload_queues_job_and_worker_extracts_metadata(self):
+        source = b'# entry point\n\nimport sys\nprint(sys.argv)\n'
+        project_file = ProjectFile.objects.create(
+            project=self.project, file=ContentFile(source, name='main.py'), original_filename='main.py'
+        )
+        self.assertEqual(project_file.processing_status, ProjectFile.ProcessingStatus.PENDING)
+        self.assertEqual(FileProcessingJob.objects.filter(project_file=project_file).count(), 1)
+
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+
+        project_file.refresh_from_db()
+        self.assertEqual(project_file.processing_status, ProjectFile.ProcessingStatus.DONE)
+        self.assertEqual(project_file.extracted_metadata['language'], 'Python')
+        self.assertEqual(project_file.extracted_metadata['line_count'], 4)
+        self.assertEqual(project_file.extracted_metadata['comment_lines'], 1)
+
+        response = APIClient().get(f'/api/projects/{self.project.id}/files/{project_file.id}/processing/')
+        self.assertEqual(response.data['processing_status'], 'DONE')
+        self.assertEqual(response.data['jobs'][0]['attempts'], 1)
+
+    def test_file_deleted_mid_processing_is_skipped(self):
+        project_file = ProjectFile.objects.create(
+            project=self.project, file=ContentFile(b'x = 1\n', name='gone.py'), original_filename='gone.py'
+        )
+        claimed = jobs.claim_jobs(1)
+        self.assertEqual(len(claimed), 1)
+        project_file.delete() # Cascades to the claimed job
+
+        # Neither path raises, so the worker loop keeps running
+        jobs.complete_job(claimed[0], {'language': 'Python'}, source='x = 1\n')
+        jobs.fail_job(claimed[0], RuntimeError('extractor crashed'))
+        self.assertFalse(FileProcessingJob.objects.exists())
+        self.assertFalse(CodeDocument.objects.exists()) # Nothing indexed for a file that's gone
+        self.assertFalse(ProjectFile.objects.filter(pk=project_file.pk).exists())
+
+    def test_code_preview_is_served_with_long_lived_caching(self):
+        project_file = ProjectFile.objects.create(
+            project=self.project, file=ContentFile(b'def add(a, b):\n    return a + b\n', name='calc.py'),
+            original_filename='calc.py',
+        )
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+
+        client = APIClient()
+        listing = client.get(f'/api/projects/{self.project.id}/list_files/').data
+        preview_url = listing[0]['previews']['code']
+        response = client.get(preview_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('add', b''.join(response.streaming_content).decode())
+
+        cached = client.get(preview_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        missing = client.get(f'/api/projects/{self.project.id}/files/{project_file.id}/preview/thumbnail/')
+        self.assertEqual(missing.status_code, 404)
+
+    def test_image_and_pdf_extractors(self):
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + struct.pack('>II', 640, 480) + b'\x08\x02\x00\x00\x00'
+        pdf = (
+            b'%PDF-1.4\n1 0 obj << /Title (Graph Theory Notes) /Author (A. Student) >> endobj\n'
+            b'2 0 obj << /Type /Page >> endobj\n3 0 obj << /Type /Page >> endobj\n'
+            b'4 0 obj << /Length 30 >> stream\nBT (Hello graphs) Tj ET\nendstream endobj\n'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {}
+            for name, data in (('img.png', png), ('notes.pdf', pdf)):
+                paths[name] = os.path.join(tmp, name)
+                with open(paths[name], 'wb') as fh:
+                    fh.write(data)
+            image = run_extractors('IMAGE', paths['img.png'], 'img.png')
+            document = run_extractors('PDF', paths['notes.pdf'], 'notes.pdf')
+
+        self.assertEqual((image['format'], image['width'], image['height']), ('PNG', 640, 480))
+        self.assertEqual(document['page_count'], 2)
+        self.assertEqual(document['title'], 'Graph Theory Notes')
+        self.assertIn('Hello graphs', document['text'])
+
+    def test_pdf_fallback_bounds_inflated_streams(self):
+        bomb = zlib.compress(b'(x) Tj ' * 10_000_000, 9) # ~70 MB once inflated
+        pdf = b'%PDF-1.4\n1 0 obj << /Filter /FlateDecode >> stream\n' + bomb + b'\nendstream endobj\n'
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as tmp:
+            tmp.write(pdf)
+            tmp.flush()
+            with mock.patch.object(extractors.zlib, 'decompress', side_effect=AssertionError('unbounded inflate')):
+                document = extractors._pdf_fallback(tmp.name)
+        self.assertLessEqual(len(document['text']), extractors.MAX_TEXT_CHARS)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FileDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='downloader@rdu.edu.tr', password='pass12345', first_name='Down', last_name='Loader'
+        )
+        cls.project = Project.objects.create(owner=cls.owner, title='Videos')
+        cls.payload = bytes(range(256)) * 40
+        cls.project_file = ProjectFile.objects.create(
+            project=cls.project, file=ContentFile(cls.payload, name='clip.bin'), original_filename='clip.bin'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/projects/{self.project.id}/files/{self.project_file.id}/download/'
+
+    def test_full_download_and_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.payload)
+        self.assertEqual(response['ETag'], f'"{self.project_file.sha256}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[100:200])
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), self.payload[-10:])
+
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    @override_settings(FILE_SERVING_BACKEND='nginx', FILE_SERVING_INTERNAL_PREFIX='/protected-media/')
+    def test_nginx_offload(self):
+        response = self.client.get(self.url + '?download=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.project_file.file.name)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ArchiveUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='archiver@rdu.edu.tr', password='pass12345', first_name='Arch', last_name='Iver'
+        )
+
+    def setUp(self):
+        self.project = Project.objects.create(owner=self.owner, title='Compiler')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/projects/{self.project.id}/upload_archive/'
+
+    def _zip(self, entries):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, data in entries.items():
+                archive.writestr(name, data)
+        buffer.seek(0)
+        buffer.name = 'project.zip'
+        return buffer
+
+    def test_zip_expands_into_project_files(self):
+        archive = self._zip({
+            'src/main.py': b'print("hi")\n',
+            'src/util/helpers.c': b'int x;\n',
+            'docs/report.pdf': b'%PDF-1.4',
+            '../escape.txt': b'nope',
+            '__MACOSX/src/._main.py': b'junk',
+        })
+        response = self.client.post(self.url, {'archive': archive}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(len(response.data['skipped']), 2)
+
+        files = {f.original_filename: f for f in self.project.files.all()}
+        self.assertEqual(set(files), {'src/main.py', 'src/util/helpers.c', 'docs/report.pdf'})
+        self.assertEqual(files['src/main.py'].file_type, ProjectFile.FileType.CODE)
+        self.assertEqual(files['docs/report.pdf'].file_type, ProjectFile.FileType.PDF)
+        self.assertEqual(FileProcessingJob.objects.filter(project_file__project=self.project).count(), 3)
+        with files['src/main.py'].file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'print("hi")\n')
+
+    def test_tar_gz_is_supported(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+            data = b'class A {}\n'
+            info = tarfile.TarInfo('pkg/A.java')
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+        buffer.seek(0)
+        buffer.name = 'project.tar.gz'
+        response = self.client.post(self.url, {'archive': buffer}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.project.files.get().original_filename, 'pkg/A.java')
+
+    def test_entry_limit_rolls_back_everything(self):
+        archive = self._zip({f'f{i}.py': f'x = {i}\n'.encode() for i in range(5)})
+        with mock.patch('apps.projects.archives.MAX_ENTRIES', 3):
+            response = self.client.post(self.url, {'archive': archive}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.project.files.exists())
+        self.assertFalse(FileBlob.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='etag-owner@rdu.edu.tr', password='pass12345', first_name='Etag', last_name='Owner'
+        )
+        cls.collaborator = User.objects.create_user(
+            email='etag-collab@rdu.edu.tr', password='pass12345', first_name='Etag', last_name='Collab'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.project = Project.objects.create(owner=self.owner, title='Cached', department='SE', year=2024)
+        ProjectFile.objects.create(
+            project=self.project, file=ContentFile(b'x = 1\n', name='a.py'), original_filename='a.py'
+        )
+        self.url = f'/api/projects/{self.project.id}/'
+
+    def _etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_unchanged_project_returns_304_with_one_query(self):
+        etag = self._etag()
+        response = self.assertMaxQueries(1, self.client.get, self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_validator_changes_with_project_files_and_collaborators(self):
+        etag = self._etag()
+        self.project.collaborators.add(self.collaborator)
+        self.assertNotEqual(self._etag(), etag)
+
+        etag = self._etag()
+        self.collaborator.collaborating_projects.clear()
+        self.assertNotEqual(self._etag(), etag)
+
+        etag = self._etag()
+        ProjectFile.objects.create(
+            project=self.project, file=ContentFile(b'y = 2\n', name='b.py'), original_filename='b.py'
+        )
+        self.assertNotEqual(self._etag(), etag)
+
+        etag = self._etag()
+        self.project.files.first().delete()
+        self.assertNotEqual(self._etag(), etag)
+
+        etag = self._etag()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_etag_gets_full_response(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='W/"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Cached')
+
+    def test_list_files_has_its_own_validator(self):
+        files_url = f'/api/projects/{self.project.id}/list_files/'
+        etag = self._etag(files_url)
+        self.assertNotEqual(etag, self._etag())
+        response = self.client.get(files_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/projects/999999/list_files/').status_code, 404)
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of the redis-py client the project cache uses.
+    """
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def mset(self, mapping):
+        for key, value in mapping.items():
+            self.set(key, value)
+
+    def hincrby(self, name, field, amount=1):
+        fields = self.hashes.setdefault(name, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + amount
+
+    def hgetall(self, name):
+        return {field: str(value).encode() for field, value in self.hashes.get(name, {}).items()}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, PROJECT_CACHE_ENABLED=True)
+class ProjectListCacheTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='cache-owner@rdu.edu.tr', password='pass12345', first_name='Cache', last_name='Owner'
+        )
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('apps.projects.caching.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caching.clear_local()
+        caching.reset_stats()
+        self.client = APIClient()
+        self.code = Project.objects.create(owner=self.owner, title='Parser', type='CODE', department='SE', year=2024)
+        self.paper = Project.objects.create(owner=self.owner, title='Survey', type='PAPER', department='EE', year=2023)
+
+    def _titles(self, url):
+        return [item['title'] for item in self.client.get(url).data['results']]
+
+    def test_second_request_is_served_from_cache_without_queries(self):
+        first = self.client.get('/api/projects/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second = self.assertMaxQueries(0, self.client.get, '/api/projects/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(caching.stats()['process']['local_hits'], 1)
+
+    def test_shared_tier_serves_other_processes(self):
+        self.client.get('/api/projects/?type=CODE')
+        caching.clear_local() # As seen from a fresh worker
+        response = self.client.get('/api/projects/?type=CODE')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(caching.stats()['process']['shared_hits'], 1)
+
+    def test_edit_only_evicts_pages_containing_the_project(self):
+        self.client.get('/api/projects/?type=CODE')
+        self.client.get('/api/projects/?type=PAPER')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code.title = 'Lexer'
+            self.code.save()
+        self.assertEqual(self.client.get('/api/projects/?type=PAPER')['X-Cache'], 'HIT')
+        response = self.client.get('/api/projects/?type=CODE')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'Lexer')
+
+    def test_membership_changes_evict_affected_lists(self):
+        self.assertEqual(self._titles('/api/projects/?type=CODE'), ['Parser'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(owner=self.owner, title='Compiler', type='CODE', year=2025)
+        self.assertEqual(self._titles('/api/projects/?type=CODE'), ['Compiler', 'Parser'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.paper.type = 'CODE'
+            self.paper.save()
+        self.assertEqual(len(self._titles('/api/projects/?type=CODE')), 3)
+
+    def test_file_and_collaborator_changes_invalidate(self):
+        self.client.get('/api/projects/')
+        collaborator = User.objects.create_user(
+            email='cache-collab@rdu.edu.tr', password='pass12345', first_name='Cache', last_name='Collab'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code.collaborators.add(collaborator)
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectFile.objects.create(
+                project=self.code, file=ContentFile(b'x = 1\n', name='a.py'), original_filename='a.py'
+            )
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        code = next(item for item in response.data['results'] if item['id'] == self.code.id)
+        self.assertEqual(len(code['files']), 1)
+
+    def test_only_searchable_changes_evict_search_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            project_file = ProjectFile.objects.create(
+                project=self.code, file=ContentFile(b'x = 1\n', name='a.py'), original_filename='a.py'
+            )
+        self.client.get('/api/projects/?q=survey')
+
+        # Worker-style saves that leave the search document as it was
+        with self.captureOnCommitCallbacks(execute=True):
+            project_file.processing_status = ProjectFile.ProcessingStatus.RUNNING
+            project_file.save(update_fields=['processing_status'])
+            project_file.extracted_metadata = {'line_count': 1}
+            project_file.save(update_fields=['extracted_metadata', 'processing_status'])
+            self.code.save()
+        self.assertEqual(self.client.get('/api/projects/?q=survey')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project_file.extracted_metadata = {'line_count': 1, 'language': 'Python'}
+            project_file.save(update_fields=['extracted_metadata'])
+        self.assertEqual(self.client.get('/api/projects/?q=survey')['X-Cache'], 'MISS')
+
+    def test_facets_are_cached_and_invalidated(self):
+        self.assertEqual(self.client.get('/api/projects/facets/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/projects/facets/')['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.create(owner=self.owner, title='Thesis', type='BOOK')
+        response = self.client.get('/api/projects/facets/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('BOOK', [item['value'] for item in response.data['type']])
+
+    @override_settings(PROJECT_CACHE_ENABLED=False)
+    def test_disabled_cache_is_bypassed(self):
+        self.client.get('/api/projects/')
+        self.assertEqual(self.client.get('/api/projects/')['X-Cache'], 'MISS')
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='fast-owner@rdu.edu.tr', password='pass12345', first_name='Fäst', last_name='Owner'
+        )
+        cls.collaborator = User.objects.create_user(
+            email='fast-collab@rdu.edu.tr', password='pass12345', first_name='Fast', last_name='Collab'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        first = Project.objects.create(owner=self.owner, title='Ünïcode {braces}', type='CODE', department='SE', year=2024)
+        first.collaborators.add(self.collaborator)
+        done = ProjectFile.objects.create(
+            project=first, file=ContentFile(b'x = 1\n', name='a.py'), original_filename='src/a.py'
+        )
+        ProjectFile.objects.filter(pk=done.pk).update(
+            processing_status=ProjectFile.ProcessingStatus.DONE, extracted_metadata={'language': 'Python', 'lines': 1}
+        )
+        ProjectFile.objects.create(
+            project=first, file=ContentFile(b'%PDF-1.4', name='r.pdf'), original_filename='r.pdf'
+        )
+        Project.objects.create(owner=self.owner, title='No year', description='', year=None)
+
+    def _drf_bytes(self, request_path='/api/projects/'):
+        request = APIRequestFactory().get(request_path)
+        queryset = Project.objects.select_related('owner').prefetch_related('collaborators', 'files').order_by('-created_at', '-id')
+        return JSONRenderer().render(ProjectSerializer(queryset, many=True, context={'request': request}).data), request
+
+    def test_matches_project_serializer_byte_for_byte(self):
+        expected, request = self._drf_bytes()
+        rows = list(Project.objects.values(*fast_serializers.project_columns()).order_by('-created_at', '-id'))
+        actual = JSONRenderer().render(
+            fast_serializers.render_projects(fast_serializers.attach_relations(rows), {'request': request})
+        )
+        self.assertEqual(actual, expected)
+
+    def test_list_endpoint_uses_same_representation(self):
+        expected, _ = self._drf_bytes()
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'], json.loads(expected))
+
+    def test_benchmark_command_checks_identical_output(self):
+        out = io.StringIO()
+        call_command('benchmark_serializers', '--sizes', '5', '20', '--repeat', '1', stdout=out)
+        self.assertIn('byte-identical', out.getvalue())
+        self.assertEqual(Project.objects.count(), 2) # Generated rows are rolled back
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class SparseFieldsetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='sparse-owner@rdu.edu.tr', password='pass12345', first_name='Sparse', last_name='Owner'
+        )
+        cls.collaborator = User.objects.create_user(
+            email='sparse-collab@rdu.edu.tr', password='pass12345', first_name='Sparse', last_name='Collab'
+        )
+        for i in range(3):
+            project = Project.objects.create(owner=cls.owner, title=f'Sparse {i}', type='CODE', year=2024)
+            project.collaborators.add(cls.collaborator)
+            for j in range(i):
+                ProjectFile.objects.create(
+                    project=project, file=ContentFile(b'x = 1\n', name=f'{j}.py'), original_filename=f'{j}.py'
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_card_preset(self):
+        # Page query with the owner joined, plus one count query over files; no collaborator or file rows
+        response = self.assertMaxQueries(2, self.client.get, '/api/projects/?fields=card')
+        self.assertEqual(response.status_code, 200)
+        card = response.data['results'][0]
+        self.assertEqual(
+            list(card), ['id', 'owner', 'title', 'description', 'type', 'department', 'year', 'file_count']
+        )
+        self.assertEqual(card['owner']['first_name'], 'Sparse')
+        self.assertEqual([item['file_count'] for item in response.data['results']], [2, 1, 0])
+
+    def test_fields_subset_skips_relations(self):
+        response = self.assertMaxQueries(1, self.client.get, '/api/projects/?fields=title,year')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title', 'year'])
+
+    def test_unexpanded_relations_are_ids(self):
+        response = self.client.get('/api/projects/?fields=owner,collaborators,files&expand=files')
+        project = response.data['results'][0]
+        self.assertEqual(project['owner'], self.owner.id)
+        self.assertEqual(project['collaborators'], [self.collaborator.id])
+        self.assertEqual([f['original_filename'] for f in project['files']], ['0.py', '1.py'])
+
+    def test_expand_only_keeps_all_fields(self):
+        response = self.client.get('/api/projects/?expand=owner')
+        project = response.data['results'][0]
+        self.assertEqual(project['owner']['email'], 'sparse-owner@rdu.edu.tr')
+        self.assertEqual(project['collaborators'], [self.collaborator.id])
+        self.assertIn('created_at', project)
+        self.assertNotIn('file_count', project)
+
+    def test_file_count_only_when_selected(self):
+        self.assertNotIn('file_count', self.client.get('/api/projects/').data['results'][0])
+        response = self.client.get('/api/projects/?fields=title,file_count')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'title', 'file_count'])
+
+    def test_cursor_pagination_with_sparse_fields(self):
+        first = self.client.get('/api/projects/?fields=title&page_size=2')
+        second = self.client.get(first.data['next'])
+        titles = [p['title'] for p in first.data['results'] + second.data['results']]
+        self.assertEqual(titles, ['Sparse 2', 'Sparse 1', 'Sparse 0'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/projects/?fields=title,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+        self.assertEqual(self.client.get('/api/projects/?expand=title').status_code, 400)
+
+
+class RendererNegotiationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='codec-owner@rdu.edu.tr', password='pass12345', first_name='Çodec', last_name='Owner'
+        )
+        Project.objects.create(owner=cls.owner, title='Line\u2028separator', description='ünïcode', year=2024)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_msgpack_response(self):
+        json_response = self.client.get('/api/projects/')
+        response = self.client.get('/api/projects/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), json.loads(json_response.content))
+        self.assertEqual(self.client.get('/api/projects/?format=msgpack')['Content-Type'], 'application/msgpack')
+
+    def test_fast_json_matches_drf_json(self):
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(json.loads(response.content)))
+        self.assertIn(b'\\u2028', response.content)
+
+    def test_msgpack_request_body(self):
+        self.client.force_authenticate(self.owner)
+        body = msgpack.packb({'title': 'Packed', 'type': 'CODE', 'year': 2025})
+        response = self.client.post('/api/projects/', body, content_type='application/msgpack')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Project.objects.get(pk=response.data['id']).title, 'Packed')
+
+    def test_malformed_bodies_are_400(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(
+            self.client.post('/api/projects/', b'\xc1', content_type='application/msgpack').status_code, 400
+        )
+        self.assertEqual(
+            self.client.post('/api/projects/', b'{"title": ', content_type='application/json').status_code, 400
+        )
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark_renderers', '--sizes', '5', '--repeat', '1', stdout=out)
+        self.assertIn('msgpack', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ProjectExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email='export-owner@rdu.edu.tr', password='pass12345', first_name='Export', last_name='Owner'
+        )
+        cls.collaborator = User.objects.create_user(
+            email='export-collab@rdu.edu.tr', password='pass12345', first_name='Export', last_name='Collab'
+        )
+        code = Project.objects.create(owner=cls.owner, title='Exported, with "quotes"', type='CODE', year=2024)
+        code.collaborators.add(cls.collaborator)
+        ProjectFile.objects.create(
+            project=code, file=ContentFile(b'x = 1\n', name='a.py'), original_filename='src/a.py'
+        )
+        for i in range(4):
+            Project.objects.create(owner=cls.owner, title=f'Paper {i}', type='PAPER', year=2023)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_csv_export_honors_filters(self):
+        response = self.client.get('/api/projects/export/csv/?type=CODE', HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(self._body(response).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Exported, with "quotes"')
+        self.assertEqual(rows[0]['collaborator_emails'], 'export-collab@rdu.edu.tr')
+        self.assertEqual(rows[0]['file_names'], 'src/a.py')
+
+    def test_jsonl_export_streams_in_batches(self):
+        queryset = exports.export_queryset({})
+        chunks = list(exports.iter_export('jsonl', queryset, {'request': None}, batch_size=2))
+        self.assertEqual(len(chunks), 3) # 5 projects in batches of 2
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], sorted(Project.objects.values_list('id', flat=True)))
+
+    def test_gzip_download(self):
+        response = self.client.get('/api/projects/export/jsonl/?gzip=1&year=2023')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(self._body(response)).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+
+    def test_gzip_content_encoding(self):
+        response = self.client.get('/api/projects/export/csv/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(gzip.decompress(self._body(response)).startswith(b'id,title'))
+
+        for refused in ('gzip;q=0', 'deflate, gzip; q=0.0', 'identity'):
+            response = self.client.get('/api/projects/export/csv/', HTTP_ACCEPT_ENCODING=refused)
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertTrue(self._body(response).startswith(b'id,title'))
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/projects/export/csv/').status_code, 401)
+
+    def test_management_command(self):
+        path = os.path.join(TEST_MEDIA_ROOT, 'export.csv.gz')
+        call_command('export_projects', '--format', 'csv', '--gzip', '--type', 'PAPER', '--output', path, stderr=io.StringIO())
+        with gzip.open(path, 'rt') as exported:
+            self.assertEqual(len(list(csv.DictReader(exported))), 4)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ProjectImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='legacy-owner@rdu.edu.tr', password='pass12345')
+        cls.collaborator = User.objects.create_user(email='legacy-collab@rdu.edu.tr', password='pass12345')
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='codenest-import-')
+        os.makedirs(os.path.join(self.root, 'thesis1', 'src'))
+        with open(os.path.join(self.root, 'thesis1', 'src', 'main.py'), 'wb') as f:
+            f.write(b'print("legacy")\n')
+        with open(os.path.join(self.root, 'thesis1', 'report.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 legacy')
+
+    def _manifest(self, rows, name='manifest.csv'):
+        path = os.path.join(self.root, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=imports.MANIFEST_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _import(self, manifest, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_projects', manifest, '--files-root', self.root, '--no-progress', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_projects_collaborators_and_files(self):
+        manifest = self._manifest([
+            {'title': 'Legacy thesis', 'type': 'code', 'year': '2015', 'owner_email': 'Legacy-Owner@rdu.edu.tr',
+             'collaborator_emails': 'legacy-collab@rdu.edu.tr; ghost@rdu.edu.tr',
+             'files': 'thesis1/src/main.py;thesis1/report.pdf;thesis1/missing.txt;../etc/passwd'},
+            {'title': 'Orphan', 'owner_email': 'nobody@rdu.edu.tr'},
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            _, err = self._import(manifest)
+
+        project = Project.objects.get(title='Legacy thesis')
+        self.assertEqual((project.owner, project.type, project.year), (self.owner, 'CODE', 2015))
+        self.assertEqual(list(project.collaborators.all()), [self.collaborator])
+        files = {f.original_filename: f for f in project.files.all()}
+        self.assertEqual(set(files), {'thesis1/src/main.py', 'thesis1/report.pdf'})
+        self.assertEqual(files['thesis1/report.pdf'].file_type, ProjectFile.FileType.PDF)
+        self.assertEqual(files['thesis1/src/main.py'].file.read(), b'print("legacy")\n')
+        self.assertEqual(FileProcessingJob.objects.filter(project_file__project=project).count(), 2)
+        self.assertEqual(ProjectFacetCount.objects.get(type='CODE', year=2015).count, 1)
+        self.assertFalse(Project.objects.filter(title='Orphan').exists())
+        for reason in ("unknown collaborator 'ghost@rdu.edu.tr'", "missing file 'thesis1/missing.txt'",
+                       "missing file '../etc/passwd'", "unknown owner 'nobody@rdu.edu.tr'"):
+            self.assertIn(reason, err)
+
+    def test_users_are_resolved_once_per_batch(self):
+        rows = [{'title': f'Thesis {i}', 'owner_email': 'legacy-owner@rdu.edu.tr',
+                 'collaborator_emails': 'legacy-collab@rdu.edu.tr'} for i in range(10)]
+        importer = imports.Importer(self.root, batch_size=5)
+        with CaptureQueriesContext(connection) as ctx:
+            importer.run(iter(rows))
+        user_queries = [q for q in ctx.captured_queries if 'users_user' in q['sql'] and 'projects_project' not in q['sql']]
+        self.assertEqual(len(user_queries), 1) # The second batch only has emails resolved by the first
+        self.assertEqual(importer.projects, 10)
+
+    def test_resumes_from_checkpoint(self):
+        rows = [{'title': f'Thesis {i}', 'owner_email': 'legacy-owner@rdu.edu.tr', 'type': 'PAPER'} for i in range(5)]
+        manifest = self._manifest(rows)
+        checkpoint = os.path.join(self.root, 'import.checkpoint')
+        imports.save_checkpoint(checkpoint, manifest, 3) # A previous run committed the first 3 rows
+
+        out, _ = self._import(manifest, '--checkpoint', checkpoint, '--batch-size', '1')
+        self.assertIn('Resuming after row 3.', out)
+        self.assertEqual(sorted(Project.objects.values_list('title', flat=True)), ['Thesis 3', 'Thesis 4'])
+        self.assertEqual(imports.load_checkpoint(checkpoint, manifest), 5)
+
+        self._import(manifest, '--checkpoint', checkpoint)
+        self.assertEqual(Project.objects.count(), 2) # Nothing left to import
+
+
+class ProjectBatchTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor = User.objects.create_user(email='batch-advisor@rdu.edu.tr', password='pass12345')
+        cls.other = User.objects.create_user(email='batch-other@rdu.edu.tr', password='pass12345')
+        cls.students = [
+            User.objects.create_user(email=f'batch-student{i}@rdu.edu.tr', password='pass12345') for i in range(3)
+        ]
+        cls.cohort = [
+            Project.objects.create(owner=cls.advisor, title=f'Cohort {i}', type='CODE', department='SE', year=2023)
+            for i in range(3)
+        ]
+        cls.cohort[0].collaborators.add(cls.students[0])
+        cls.foreign = Project.objects.create(owner=cls.other, title='Not mine', type='PAPER')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor)
+
+    def _post(self, operations, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/projects/batch/', {'operations': operations, **extra}, format='json')
+
+    def test_applies_creates_and_updates(self):
+        response = self._post([
+            {'op': 'create', 'data': {'title': 'New thesis', 'type': 'PAPER', 'collaborator_ids': [self.students[1].pk]}},
+            *({'op': 'partial_update', 'id': project.pk,
+               'data': {'department': 'CE', 'add_collaborator_ids': [self.students[2].pk]}} for project in self.cohort),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['applied'])
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 200, 200, 200])
+
+        created = Project.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual((created.owner, created.title), (self.advisor, 'New thesis'))
+        self.assertEqual(list(created.collaborators.all()), [self.students[1]])
+        for project in self.cohort:
+            project.refresh_from_db()
+            self.assertEqual(project.department, 'CE')
+            self.assertIn(self.students[2], project.collaborators.all())
+        self.assertIn(self.students[0], self.cohort[0].collaborators.all()) # add_ keeps existing collaborators
+        self.assertEqual(response.data['results'][1]['project']['department'], 'CE')
+        counts = dict(ProjectFacetCount.objects.filter(type='CODE').values_list('department', 'count'))
+        self.assertEqual((counts.get('SE'), counts.get('CE')), (0, 3))
+
+    def test_collaborator_ids_replace_collaborators(self):
+        self._post([{'op': 'partial_update', 'id': self.cohort[0].pk, 'data': {'collaborator_ids': [self.students[1].pk]}}])
+        self.assertEqual(list(self.cohort[0].collaborators.all()), [self.students[1]])
+
+    def test_validation_is_constant_in_queries(self):
+        operations = [
+            {'op': 'partial_update', 'id': project.pk, 'data': {'collaborator_ids': [user.pk for user in self.students]}}
+            for project in self.cohort
+        ] + [{'op': 'create', 'data': {'title': f'T{i}', 'add_collaborator_ids': [self.other.pk]}} for i in range(10)]
+        results = self.assertMaxQueries(2, batch.validate_operations, self.advisor, operations)
+        self.assertFalse([result for result in results if 'errors' in result])
+
+    def test_atomic_batch_with_errors_writes_nothing(self):
+        response = self._post([
+            {'op': 'partial_update', 'id': self.cohort[0].pk, 'data': {'year': 2030}},
+            {'op': 'partial_update', 'id': self.foreign.pk, 'data': {'year': 2030}},
+            {'op': 'partial_update', 'id': self.cohort[1].pk, 'data': {'collaborator_ids': [999999]}},
+            {'op': 'update', 'id': self.cohort[2].pk, 'data': {'year': 2030}}, # PUT without the required title
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data['applied'])
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 403, 400, 400])
+        self.assertIn('title', response.data['results'][3]['errors'])
+        self.assertFalse(Project.objects.filter(year=2030).exists())
+
+    def test_non_atomic_batch_applies_valid_operations(self):
+        response = self._post([
+            {'op': 'partial_update', 'id': self.cohort[0].pk, 'data': {'year': 2030}},
+            {'op': 'delete', 'id': self.cohort[1].pk},
+        ], atomic=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 400])
+        self.assertEqual(list(Project.objects.filter(year=2030)), [self.cohort[0]])
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post('/api/projects/batch/', {'operations': []}, format='json').status_code, 401)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ProjectZipDownloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='zip-owner@rdu.edu.tr', password='pass12345')
+        cls.project = Project.objects.create(owner=cls.owner, title='Zip Me Up', type='CODE')
+        cls.contents = {
+            'src/main.py': b'print("hello")\n' * 200,
+            'docs/report.pdf': b'%PDF-1.4 ' + os.urandom(2048),
+        }
+        for name, data in cls.contents.items():
+            ProjectFile.objects.create(project=cls.project, file=ContentFile(data, name=os.path.basename(name)),
+                                       original_filename=name)
+        ProjectFile.objects.create(project=cls.project, file=ContentFile(b'again', name='main.py'),
+                                   original_filename='src/main.py')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/projects/{self.project.pk}/download/'
+
+    def test_streams_zip_of_all_files(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('zip-me-up.zip', response['Content-Disposition'])
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1) # Sent entry by entry, not as one buffered body
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            infos = {info.filename: info for info in archive.infolist()}
+            self.assertEqual(set(infos), {'zip-me-up/docs/report.pdf', 'zip-me-up/src/main.py', 'zip-me-up/src/main (2).py'})
+            self.assertEqual(infos['zip-me-up/docs/report.pdf'].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(infos['zip-me-up/src/main.py'].compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(archive.read('zip-me-up/docs/report.pdf'), self.contents['docs/report.pdf'])
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_unknown_project(self):
+        self.assertEqual(self.client.get('/api/projects/999999/download/').status_code, 404)
+
+
+@skipUnless(similarity.np is not None, "numpy/scipy are not installed")
+class RelatedProjectsTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email='related-owner@rdu.edu.tr', password='pass12345')
+        titles = [
+            ('Neural network image classifier', 'Convolutional neural network that classifies images.'),
+            ('Image classification with neural networks', 'Deep neural network image classifier in PyTorch.'),
+            ('Library management website', 'Django website for managing library loans.'),
+            ('Bridge load analysis', 'Finite element analysis of bridge loads.'),
+        ]
+        cls.projects = [
+            Project.objects.create(owner=cls.owner, title=title, description=description)
+            for title, description in titles
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _related_ids(self, project):
+        return [pk for pk, _ in similarity.neighbours(project.pk)]
+
+    def test_full_build_ranks_similar_projects_first(self):
+        recomputed, total = similarity.refresh(full=True)
+        self.assertEqual((recomputed, total), (4, 4))
+        classifier, classification, library, bridge = self.projects
+        self.assertEqual(self._related_ids(classifier)[0], classification.pk)
+        self.assertEqual(self._related_ids(classification)[0], classifier.pk)
+        scores = dict(similarity.neighbours(classifier.pk))
+        self.assertGreater(scores[classification.pk], scores.get(bridge.pk, 0))
+
+    def test_related_action(self):
+        similarity.refresh(full=True)
+        classifier, classification = self.projects[:2]
+        response = self.assertMaxQueries(4, self.client.get, f'/api/projects/{classifier.pk}/related/')
+        self.assertEqual(response.status_code, 200)
+        first = response.data[0]
+        self.assertEqual(first['project']['id'], classification.pk)
+        self.assertEqual(set(first['project']), set(fast_serializers.PROJECT_FIELD_PRESETS['card'][0]))
+        self.assertGreater(first['score'], 0)
+
+    def test_related_action_unknown_project(self):
+        self.assertEqual(self.client.get('/api/projects/999999/related/').status_code, 404)
+
+    def test_empty_lists_are_not_recomputed(self):
+        similarity.refresh(full=True, min_score=1.1) # Nothing is related: every list comes back empty
+        self.assertFalse(RelatedProject.objects.exists())
+        self.assertFalse(Project.objects.filter(related_computed_at__isnull=True).exists())
+        self.assertEqual(similarity.refresh(min_score=1.1), (0, 4))
+
+    def test_incremental_refresh(self):
+        similarity.refresh(full=True)
+        classifier, classification, _, bridge = self.projects
+        # Only the changed project and the lists it now affects are recomputed
+        Project.objects.filter(pk=bridge.pk).update(
+            title='Neural network bridge crack classifier', updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        recomputed, total = similarity.refresh()
+        self.assertLess(recomputed, total)
+        self.assertEqual(self._related_ids(bridge)[0], classifier.pk)
+        self.assertIn(bridge.pk, self._related_ids(classifier))
+
+        classification.delete() # Leaves an entry in the classifier's list until the next refresh
+        similarity.refresh()
+        self.assertNotIn(classification.pk, self._related_ids(classifier))
+        self.assertEqual(self._related_ids(classifier)[0], bridge.pk)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class NearDuplicateTests(QueryBudgetMixin, TestCase):
+    ORIGINAL = (
+        'def merge_sort(items):\n'
+        '    if len(items) <= 1:\n'
+        '        return items\n'
+        '    middle = len(items) // 2\n'
+        '    left = merge_sort(items[:middle])\n'
+        '    right = merge_sort(items[middle:])\n'
+        '    merged = []\n'
+        '    while left and right:\n'
+        '        merged.append(left.pop(0) if left[0] <= right[0] else right.pop(0))\n'
+        '    return merged + left + right\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(email='dup-author@rdu.edu.tr', password='pass12345')
+        cls.copier = User.objects.create_user(email='dup-copier@rdu.edu.tr', password='pass12345')
+        cls.lecturer = User.objects.create_user(
+            email='dup-lecturer@rdu.edu.tr', password='pass12345', role=User.Role.LECTURER
+        )
+        cls.original_project = Project.objects.create(owner=cls.author, title='Sorting', type='CODE')
+        cls.copy_project = Project.objects.create(owner=cls.copier, title='My sorting', type='CODE')
+
+    def _upload(self, project, name, source):
+        return ProjectFile.objects.create(
+            project=project, file=ContentFile(source.encode(), name=name), original_filename=name
+        )
+
+    def test_renamed_copy_has_the_same_signature(self):
+        renamed = self.ORIGINAL.replace('items', 'values').replace('merged', 'out') + '# my own work\n'
+        original = fingerprints.minhash(fingerprints.shingle_hashes(fingerprints.code_tokens(self.ORIGINAL)))
+        copy = fingerprints.minhash(fingerprints.shingle_hashes(fingerprints.code_tokens(renamed)))
+        self.assertEqual(fingerprints.estimate_similarity(original, copy), 1.0)
+
+    def test_processing_records_near_duplicates(self):
+        original = self._upload(self.original_project, 'sort.py', self.ORIGINAL)
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+        copy = self._upload(self.copy_project, 'mine.py', self.ORIGINAL.replace('middle', 'half') + 'print(1)\n')
+        unrelated = self._upload(self.copy_project, 'hello.py', 'print("hello world")\n')
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+
+        copy.refresh_from_db()
+        unrelated.refresh_from_db()
+        matches = copy.extracted_metadata['near_duplicates']
+        self.assertEqual([(m['file_id'], m['project_id']) for m in matches], [(original.pk, self.original_project.pk)])
+        self.assertGreaterEqual(matches[0]['similarity'], duplicates.MIN_SIMILARITY)
+        self.assertEqual(unrelated.extracted_metadata['near_duplicates'], [])
+
+        # The earlier upload's report picks up the later copy; lookups don't depend on the corpus size
+        client = APIClient()
+        client.force_authenticate(self.lecturer)
+        response = self.assertMaxQueries(
+            7, client.get, f'/api/projects/{self.original_project.pk}/near_duplicates/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['files'][0]['file_id'], original.pk)
+        self.assertEqual(response.data['files'][0]['matches'][0]['file_id'], copy.pk)
+
+    def test_chunked_lookups_and_fingerprint_cleanup(self):
+        original = self._upload(self.original_project, 'sort.py', self.ORIGINAL)
+        copy = self._upload(self.copy_project, 'mine.py', self.ORIGINAL + '# copied\n')
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+        expected = duplicates.project_report(self.original_project.pk)
+        self.assertEqual(expected[0]['matches'][0]['file_id'], copy.pk)
+        # Many small IN (...) lookups give the same report as one big one
+        with mock.patch.object(duplicates, 'LOOKUP_CHUNK_SIZE', 3):
+            self.assertEqual(duplicates.project_report(self.original_project.pk), expected)
+
+        original.delete()
+        self.assertFalse(ContentFingerprint.objects.filter(sha256=original.sha256).exists())
+        self.assertTrue(ContentFingerprint.objects.filter(sha256=copy.sha256).exists())
+        copy.delete()
+        self.assertFalse(ContentFingerprint.objects.exists())
+        self.assertFalse(LshBucket.objects.exists())
+
+    def test_report_is_for_lecturers_and_advisors(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.assertEqual(client.get(f'/api/projects/{self.original_project.pk}/near_duplicates/').status_code, 403)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CodeSearchTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='code-search@rdu.edu.tr', password='pass12345', role=User.Role.LECTURER
+        )
+        cls.project = Project.objects.create(owner=cls.user, title='Numerics', type='CODE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _upload(self, name, source):
+        project_file = ProjectFile.objects.create(
+            project=self.project, file=ContentFile(source.encode(), name=name), original_filename=name
+        )
+        call_command('process_files', once=True, workers=1, stdout=io.StringIO())
+        return project_file
+
+    def test_plans(self):
+        self.assertEqual(codesearch.plan_query('Sort'), ('trigrams', {'sor', 'ort'}))
+        self.assertEqual(
+            codesearch.plan_query('import (numpy|scipy)', regex=True),
+            ('and', [('trigrams', {'imp', 'mpo', 'por', 'ort', 'rt '}),
+                     ('or', [('trigrams', {'num', 'ump', 'mpy'}), ('trigrams', {'sci', 'cip', 'ipy'})])]),
+        )
+        for query, regex in [('ab', False), ('a.*b', True), ('(foo)?bar|x', True), ('(abc+)+d', True),
+                             (r'import (\w*\s?)*x', True), ('abc' * 40, True)]:
+            with self.assertRaises(ValidationError):
+                codesearch.plan_query(query, regex)
+
+    def test_literal_and_regex_search(self):
+        solver = self._upload('solver.py', 'import numpy as np\n\ndef solve(a, b):\n    return np.linalg.solve(a, b)\n')
+        self._upload('notes.py', '# nothing to see\nprint("hello")\n')
+
+        response = self.assertMaxQueries(4, self.client.get, '/api/projects/code_search/', {'q': 'linalg'})
+        self.assertEqual(response.status_code, 200)
+        [result] = response.data['results']
+        self.assertEqual(result['file_id'], solver.pk)
+        self.assertEqual(result['hits'], [{'line': 4, 'text': '    return np.linalg.solve(a, b)'}])
+        self.assertTrue(result['file_url'].endswith(f'/files/{solver.pk}/download/'))
+
+        response = self.client.get('/api/projects/code_search/', {'q': r'^def \w+\(', 'regex': '1'})
+        self.assertEqual([hit['line'] for hit in response.data['results'][0]['hits']], [3])
+        response = self.client.get('/api/projects/code_search/', {'q': 'IMPORT NUMPY'})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/projects/code_search/', {'q': 'IMPORT NUMPY', 'ignore_case': '1'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get('/api/projects/code_search/', {'q': 'x'}).status_code, 400)
+
+    def test_deleting_the_last_copy_drops_the_document(self):
+        first = self._upload('a.py', 'def unique_helper():\n    pass\n')
+        second = self._upload('b.py', 'def unique_helper():\n    pass\n')
+        self.assertEqual(CodeDocument.objects.count(), 1)
+        first.delete()
+        self.assertEqual(CodeDocument.objects.count(), 1)
+        second.delete()
+        self.assertFalse(CodeDocument.objects.exists())
+        self.assertFalse(CodeTrigram.objects.exists())
+
+    def test_search_is_for_lecturers_and_advisors(self):
+        student = User.objects.create_user(email='code-search-student@rdu.edu.tr', password='pass12345')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get('/api/projects/code_search/', {'q': 'linalg'}).status_code, 403)
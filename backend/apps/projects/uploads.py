@@ -0,0 +1,208 @@
+# backend/apps/projects/uploads.py
+# Resumable chunked uploads: initiate -> PUT chunks at offsets -> finalize.
+# Each chunk is streamed from the request body to a part file in fixed-size pieces, so memory stays
+# bounded whatever the file size, and then appended to the session's staging file. The SHA-256 is updated as the bytes go by; finalize moves
+# the staging file into blob storage (or drops it if the content is already stored) and creates the ProjectFile.
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import ProjectFile, UploadSession
+
+READ_SIZE = 64 * 1024 # Bytes read from the request stream per iteration
+MAX_UPLOAD_SIZE = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 ** 3) # 2 GB
+SESSION_TTL = timedelta(hours=getattr(settings, 'CHUNKED_UPLOAD_TTL_HOURS', 24))
+
+# Running hashers for sessions this process has recently written to: upload_id -> (offset, hasher).
+# If the next chunk lands on another worker (or after a restart) the hasher is rebuilt from the staged bytes.
+_hashers = LRUCache(maxsize=256)
+_hashers_lock = threading.Lock()
+
+
+class UploadConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The upload offset does not match the bytes received so far.'
+    default_code = 'upload_conflict'
+
+
+class StagedFile(File):
+    # Exposes temporary_file_path() so FileSystemStorage moves the staged file instead of copying it
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'chunked_uploads')
+
+
+def staging_path(session):
+    return os.path.join(upload_dir(), f'{session.id}.part')
+
+
+def start_session(project, user, filename, total_size):
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise ValidationError({'filename': 'A filename is required.'})
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise ValidationError({'size': 'The total file size in bytes is required.'})
+    if total_size < 0 or total_size > MAX_UPLOAD_SIZE:
+        raise ValidationError({'size': f'File size must be between 0 and {MAX_UPLOAD_SIZE} bytes.'})
+
+    session = UploadSession.objects.create(project=project, owner=user, filename=filename, total_size=total_size)
+    os.makedirs(upload_dir(), exist_ok=True)
+    open(staging_path(session), 'wb').close()
+    with _hashers_lock:
+        _hashers[session.id] = (0, hashlib.sha256())
+    return session
+
+
+def _hasher_at(session):
+    with _hashers_lock:
+        cached = _hashers.get(session.id)
+    if cached and cached[0] == session.received_bytes:
+        return cached[1]
+    # Rehash the staged prefix once, streaming, then continue incrementally from there
+    hasher = hashlib.sha256()
+    remaining = session.received_bytes
+    with open(staging_path(session), 'rb') as staged:
+        while remaining > 0:
+            data = staged.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def _ensure_active(session):
+    if session.status != UploadSession.Status.ACTIVE:
+        raise ValidationError({'detail': f'This upload is {session.get_status_display().lower()}.'})
+
+
+def write_chunk(session, offset, stream, length):
+    """
+    Appends `length` bytes read from `stream` at `offset` and returns the new offset.
+    Bytes that arrived before a dropped connection are kept, so the client resumes from the returned offset.
+    """
+    session.refresh_from_db(fields=['status', 'received_bytes'])
+    _ensure_active(session)
+    if offset != session.received_bytes:
+        raise UploadConflict(f'Expected offset {session.received_bytes}, got {offset}.')
+    if length <= 0:
+        raise ValidationError({'detail': 'Chunk body is empty.'})
+    if offset + length > session.total_size:
+        raise ValidationError({'detail': 'Chunk extends past the declared file size.'})
+
+    # The body is read from the client into a part file of this request, outside any transaction, so a
+    # slow client holds no DB connection. Hashed into a copy: the cached hasher only moves on commit
+    hasher = _hasher_at(session).copy()
+    part_path = f'{staging_path(session)}.{uuid.uuid4().hex}'
+    written, error = 0, None
+    try:
+        with open(part_path, 'wb') as part:
+            try:
+                while written < length:
+                    data = stream.read(min(READ_SIZE, length - written))
+                    if not data:
+                        break
+                    part.write(data)
+                    hasher.update(data)
+                    written += len(data)
+            except Exception as exc: # Dropped connection: keep what arrived, then re-raise
+                error = exc
+        committed = written > 0 and _commit_part(session, offset, part_path, written)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    new_offset = offset + written
+    with _hashers_lock:
+        if committed:
+            _hashers[session.id] = (new_offset, hasher)
+    if error is not None:
+        raise error
+    if not committed:
+        raise UploadConflict()
+    session.received_bytes = new_offset
+    return new_offset
+
+
+def _commit_part(session, offset, part_path, written):
+    # Appends a received part to the staging file, if the offset is still current. The row lock is only
+    # held for this local copy, and keeps concurrent commits from writing the staging file at once
+    with transaction.atomic():
+        current = UploadSession.objects.select_for_update().filter(
+            pk=session.pk, status=UploadSession.Status.ACTIVE
+        ).values_list('received_bytes', flat=True).first()
+        if current != offset:
+            return False
+        with open(staging_path(session), 'r+b') as staged, open(part_path, 'rb') as part:
+            staged.seek(offset)
+            staged.truncate() # Drop any tail left by an earlier, uncommitted attempt
+            shutil.copyfileobj(part, staged, READ_SIZE)
+        UploadSession.objects.filter(pk=session.pk, received_bytes=offset).update(
+            received_bytes=offset + written, updated_at=timezone.now()
+        )
+    return True
+
+
+def finalize_session(session, expected_sha256=None):
+    _ensure_active(session)
+    if session.received_bytes != session.total_size:
+        raise ValidationError({
+            'detail': f'Upload incomplete: {session.received_bytes} of {session.total_size} bytes received.'
+        })
+    digest = _hasher_at(session).hexdigest()
+    if expected_sha256 and expected_sha256.lower() != digest:
+        abort_session(session)
+        raise ValidationError({'sha256': 'Checksum mismatch; the upload has been discarded.'})
+
+    path = staging_path(session)
+    with transaction.atomic():
+        project_file = ProjectFile(project=session.project, original_filename=session.filename, sha256=digest)
+        with open(path, 'rb') as staged:
+            # Stored as a content-addressed blob; an existing blob with this hash is reused as-is
+            project_file.file = StagedFile(staged, name=session.filename)
+            project_file.save()
+        session.status = UploadSession.Status.COMPLETE
+        session.save(update_fields=['status', 'updated_at'])
+    _discard_staging(session)
+    return project_file
+
+
+def abort_session(session):
+    session.status = UploadSession.Status.ABORTED
+    session.save(update_fields=['status', 'updated_at'])
+    _discard_staging(session)
+
+
+def _discard_staging(session):
+    with _hashers_lock:
+        _hashers.pop(session.id, None)
+    path = staging_path(session)
+    if os.path.exists(path): # Already gone when storage moved it into place
+        os.remove(path)
+
+
+def cleanup_stale_sessions(now=None):
+    # Aborts active sessions that haven't received a chunk within SESSION_TTL
+    cutoff = (now or timezone.now()) - SESSION_TTL
+    stale = UploadSession.objects.filter(status=UploadSession.Status.ACTIVE, updated_at__lt=cutoff)
+    count = 0
+    for session in stale.iterator():
+        abort_session(session)
+        count += 1
+    return count
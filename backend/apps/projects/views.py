@@ -3,19 +3,208 @@ from rest_framework import viewsets, permissions, status,generics, filters
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FileUploadParser # For file uploads
 from rest_framework.decorators import action # For custom actions on ViewSets
+from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
 
 from apps.users.serializers import UserSerializer # For upload action
+from codenest_core.renderers import API_PARSER_CLASSES, API_RENDERER_CLASSES
 
-from .models import Project, ProjectFile
-from .serializers import ProjectSerializer, ProjectFileSerializer # Import your serializers
+from .models import PreviewArtifact, Project, ProjectFile, UploadSession
+from .serializers import (  # Import your serializers
+    FileProcessingJobSerializer, ProjectSerializer, ProjectFileSerializer, UploadSessionSerializer,
+)
+from .pagination import ProjectCursorPagination, ProjectSearchPagination
+from . import (
+    archives, batch as batch_ops, caching, codesearch, conditional, duplicates, exports, facets as facet_counts,
+    fast_serializers, search, serving, similarity, uploads, zipstream,
+)
+from .filters import ProjectFilterBackend, get_facet_filters
 from apps.users.models import User # Import User model if needed for permission checks
 # from .permissions import IsOwnerOrCollaboratorOrReadOnly # Create this later for permissions
 
+UPLOAD_URL_PATH = r'uploads/(?P<upload_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'
+
 class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+    # Load owner with a join and collaborators/files with one prefetch query each,
+    # so list/retrieve cost a fixed number of queries regardless of page size.
+    queryset = Project.objects.select_related('owner').prefetch_related('collaborators', 'files')
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # Base permissions
+    pagination_class = ProjectCursorPagination # Keyset pages over (created_at, id)
+    filter_backends = [ProjectFilterBackend] # ?type=, ?department=, ?year=
+    renderer_classes = API_RENDERER_CLASSES # JSON (orjson) by default, MessagePack on request
+    parser_classes = API_PARSER_CLASSES
+
+    def get_queryset(self):
+        if self.action == 'related':
+            return Project.objects.only('id') # Only the existence check; neighbours are rendered from values()
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        # Serialized pages are cached (see caching.py) and tagged with the projects and filters they contain
+        cache_key = caching.make_key(request, 'list')
+        cached = caching.lookup(cache_key)
+        if cached is not None:
+            return self._cached_response(cached)
+
+        # ?q= switches the list to relevance-ranked full-text search
+        query = request.query_params.get('q', '').strip()
+        if query:
+            response = self._search_list(request, query)
+        else:
+            response = self._fast_list(request)
+            # ?facets=true adds the facet breakdown of the filtered catalog to the same response
+            if self._wants_facets(request):
+                response.data['facets'] = facet_counts.get_facets(get_facet_filters(request))
+
+        tags = caching.list_tags(get_facet_filters(request) or {})
+        tags += [caching.project_tag(item['id']) for item in response.data['results']]
+        if query:
+            tags.append(caching.SEARCH_TAG)
+        if self._wants_facets(request):
+            tags.append(caching.FACETS_TAG)
+        caching.store(cache_key, response.data, tags)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _fast_list(self, request):
+        # Same output as ListModelMixin.list with ProjectSerializer, built from values() rows
+        # (see fast_serializers.py): no model instances or per-object serializer fields
+        plan = fast_serializers.parse_field_selection(request.query_params) # ?fields= / ?expand=
+        queryset = self.filter_queryset(Project.objects.values(*fast_serializers.project_columns(plan)))
+        page = self.paginate_queryset(queryset)
+        rows = fast_serializers.attach_relations(list(queryset) if page is None else page, plan)
+        data = fast_serializers.render_projects(rows, self.get_serializer_context(), plan)
+        return Response(data) if page is None else self.get_paginated_response(data)
+
+    def _cached_response(self, data):
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def _wants_facets(self, request):
+        return request.query_params.get('facets', '').lower() in ('1', 'true', 'yes')
+
+    def _search_list(self, request, query):
+        # The list filters are applied inside the ranked query, before its hit cap
+        selected = get_facet_filters(request)
+        ranked_ids = [] if selected is None else search.search_project_ids(query, selected)
+
+        paginator = ProjectSearchPagination()
+        page_ids = paginator.paginate_queryset(ranked_ids, request, view=self)
+        plan = fast_serializers.parse_field_selection(request.query_params)
+        data = fast_serializers.render_projects(
+            fast_serializers.project_rows(page_ids, plan), self.get_serializer_context(), plan
+        )
+        response = paginator.get_paginated_response(data)
+        if self._wants_facets(request):
+            response.data['facets'] = facet_counts.get_facets_for_cells(search.facet_cells(query), selected)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        # Conditional GET: with If-None-Match/If-Modified-Since a single validator query decides
+        # whether the project changed, and a 304 skips loading and serializing it entirely
+        if conditional.has_conditional_headers(request):
+            validators = conditional.query_validators('project', kwargs[self.lookup_field])
+            if validators and conditional.not_modified(request, validators):
+                return conditional.set_validators(HttpResponseNotModified(), validators)
+        instance = self.get_object()
+        # Computed from the loaded instance: no extra query when there's nothing to compare against
+        validators = conditional.instance_validators('project', instance, instance.files.all())
+        response = Response(self.get_serializer(instance).data)
+        return conditional.set_validators(response, validators)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        # Facet counts only, for the same ?type=/?department=/?year=/?q= params as the list
+        cache_key = caching.make_key(request, 'facets')
+        cached = caching.lookup(cache_key)
+        if cached is not None:
+            return self._cached_response(cached)
+        selected = get_facet_filters(request) # None when the filters can't match: empty facets
+        query = request.query_params.get('q', '').strip()
+        if query:
+            data = facet_counts.get_facets_for_cells(search.facet_cells(query), selected)
+            caching.store(cache_key, data, [caching.FACETS_TAG, caching.SEARCH_TAG])
+        else:
+            data = facet_counts.get_facets(selected)
+            caching.store(cache_key, data, [caching.FACETS_TAG])
+        response = Response(data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<export_format>csv|jsonl)',
+            content_negotiation_class=exports.ExportContentNegotiation)
+    def export(self, request, export_format=None):
+        # Streams the whole (filtered) catalog as CSV or JSON Lines; takes the list's ?type=/?department=/?year=/?q=.
+        # ?gzip=1 downloads a .gz file; otherwise the body is gzip-encoded on the fly when the client accepts it.
+        selected = get_facet_filters(request)
+        query = request.query_params.get('q', '').strip()
+        queryset = Project.objects.none() if selected is None else exports.export_queryset(selected, query)
+        as_gz_file = request.query_params.get('gzip', '').lower() in ('1', 'true')
+        encode = as_gz_file or exports.accepts_gzip(request)
+        response = StreamingHttpResponse(
+            exports.iter_export(export_format, queryset, {'request': request}, gzip=encode),
+            content_type='application/gzip' if as_gz_file else exports.CONTENT_TYPES[export_format],
+        )
+        filename = f'projects.{export_format}' + ('.gz' if as_gz_file else '')
+        if encode and not as_gz_file:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        response['X-Accel-Buffering'] = 'no' # Let nginx pass batches through as they're produced
+        return response
+
+    @action(detail=False, methods=['get'])
+    def code_search(self, request):
+        # grep over all uploaded source files through the trigram index (see codesearch.py):
+        # ?q=<literal or pattern>, ?regex=1 for a regular expression, ?ignore_case=1
+        params = request.query_params
+        results, truncated = codesearch.search(
+            params.get('q', ''),
+            regex=params.get('regex', '').lower() in ('1', 'true'),
+            ignore_case=params.get('ignore_case', '').lower() in ('1', 'true'),
+        )
+        for result in results:
+            url = reverse('project-file-download', kwargs={'pk': result['project_id'], 'file_id': result['file_id']})
+            result['file_url'] = request.build_absolute_uri(url)
+        return Response({'results': results, 'truncated': truncated})
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        # Hit/miss counters of the list/search/facet cache
+        return Response(caching.stats())
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        # Many creates/updates/partial updates in one request, written in one transaction (see batch.py):
+        # {"operations": [{"op": "partial_update", "id": 3, "data": {"year": 2024}}, ...], "atomic": true}
+        # Returns one result per operation; with atomic (the default) any invalid operation cancels the batch.
+        body = batch_ops.BatchRequestSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        results = batch_ops.validate_operations(request.user, body.validated_data['operations'])
+        failed = any('errors' in result for result in results)
+        if failed and body.validated_data['atomic']:
+            return Response(
+                {'applied': False, 'results': [batch_ops.public(result) for result in results]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        written = batch_ops.apply_operations(request.user, results)
+        rendered = {
+            project['id']: project for project in fast_serializers.render_projects(
+                fast_serializers.project_rows(written), self.get_serializer_context()
+            )
+        }
+        results = [batch_ops.public(result) for result in results]
+        for result in results:
+            if 'errors' not in result:
+                result['project'] = rendered[result['id']]
+        return Response({'applied': True, 'results': results})
 
     def perform_create(self, serializer):
         # Set the owner to the currently authenticated user
@@ -25,10 +214,20 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         Instantiates and returns the list of permissions that this view requires.
         """
-        if self.action in ['update', 'partial_update', 'destroy', 'upload_file']:
+        if self.action in ['update', 'partial_update', 'destroy', 'upload_file', 'upload_archive',
+                           'start_upload', 'upload_chunk', 'abort_upload', 'finalize_upload']:
             # For these actions, require the user to be the owner
             # Replace with a more robust permission class like IsOwnerOrReadOnly
             self.permission_classes = [permissions.IsAuthenticated, IsProjectOwnerPermission]
+        elif self.action in ['export', 'batch']:
+            # batch checks ownership per operation
+            self.permission_classes = [permissions.IsAuthenticated]
+        elif self.action in ['near_duplicates', 'code_search']:
+            self.permission_classes = [permissions.IsAuthenticated, IsLecturerOrAdvisor]
+        elif self.action == 'cache_stats':
+            self.permission_classes = [permissions.IsAdminUser]
+        elif self.action in ['file_download', 'download'] and getattr(settings, 'PROJECT_FILES_REQUIRE_AUTH', False):
+            self.permission_classes = [permissions.IsAuthenticated]
         else:
             # For list, retrieve, create (owner set in perform_create)
             self.permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -73,19 +272,160 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         if file_serializer.is_valid():
             project_file = file_serializer.save(project=project, original_filename=uploaded_file.name)
-            # You might trigger background processing here
+            # Metadata extraction is queued on save; poll files/{id}/processing/ for its status
             return Response(ProjectFileSerializer(project_file, context={'request': request}).data, status=status.HTTP_201_CREATED)
         else:
             return Response(file_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser])
+    def upload_archive(self, request, pk=None):
+        # Expands a zip/tar(.gz) archive into one ProjectFile per entry, in a single transaction
+        project = get_object_or_404(Project, pk=pk)
+        if project.owner != request.user:
+             return Response({'detail': 'You do not have permission to upload files to this project.'}, status=status.HTTP_403_FORBIDDEN)
+        if 'archive' not in request.FILES:
+            return Response({'detail': 'No archive was provided in the request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, skipped = archives.import_archive(project, request.FILES['archive'])
+        return Response({
+            'created': len(created),
+            'skipped': skipped,
+            'files': ProjectFileSerializer(created, many=True, context={'request': request}).data,
+        }, status=status.HTTP_201_CREATED)
+
+    # --- Resumable chunked uploads ---
+    # POST   /projects/{id}/uploads/                  {filename, size} -> session
+    # PUT    /projects/{id}/uploads/{upload_id}/      raw bytes, Upload-Offset header -> session
+    # GET    /projects/{id}/uploads/{upload_id}/      current offset, for resuming
+    # DELETE /projects/{id}/uploads/{upload_id}/      abort
+    # POST   /projects/{id}/uploads/{upload_id}/finalize/  {sha256?} -> ProjectFile
+    def _get_upload_session(self, request, pk, upload_id):
+        session = get_object_or_404(UploadSession.objects.select_related('project__owner'), pk=upload_id, project_id=pk)
+        if session.owner_id != request.user.id:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You do not have permission to access this upload.")
+        return session
+
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, pk=None):
+        project = get_object_or_404(Project, pk=pk)
+        if project.owner != request.user:
+             return Response({'detail': 'You do not have permission to upload files to this project.'}, status=status.HTTP_403_FORBIDDEN)
+        session = uploads.start_session(project, request.user, request.data.get('filename'), request.data.get('size'))
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'put'], url_path=UPLOAD_URL_PATH)
+    def upload_chunk(self, request, pk=None, upload_id=None):
+        session = self._get_upload_session(request, pk, upload_id)
+        if request.method == 'PUT':
+            # The body is streamed straight from the socket; request.data is never touched
+            try:
+                offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset', '')))
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                return Response({'detail': 'Upload-Offset and Content-Length must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+            uploads.write_chunk(session, offset, request.stream, length)
+        return Response(UploadSessionSerializer(session).data)
+
+    @upload_chunk.mapping.delete
+    def abort_upload(self, request, pk=None, upload_id=None):
+        session = self._get_upload_session(request, pk, upload_id)
+        uploads.abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'], url_path=UPLOAD_URL_PATH + '/finalize')
+    def finalize_upload(self, request, pk=None, upload_id=None):
+        session = self._get_upload_session(request, pk, upload_id)
+        project_file = uploads.finalize_session(session, request.data.get('sha256'))
+        return Response(ProjectFileSerializer(project_file, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
     # Optional: custom action to list files for a project instance
     @action(detail=True, methods=['get'])
     def list_files(self, request, pk=None):
-         project = get_object_or_404(Project, pk=pk)
+         # The validator query doubles as the project existence check
+         validators = conditional.query_validators('files', pk)
+         if validators is None:
+             raise Http404
+         if conditional.not_modified(request, validators):
+             return conditional.set_validators(HttpResponseNotModified(), validators)
          # Optional: Add permission checks to view files
-         files = project.files.all() # Access related files
+         files = ProjectFile.objects.filter(project_id=pk) # Single query; file_url needs no extra lookups
          serializer = ProjectFileSerializer(files, many=True, context={'request': request})
-         return Response(serializer.data)
+         return conditional.set_validators(Response(serializer.data), validators)
+
+    @action(detail=True, methods=['get'])
+    def near_duplicates(self, request, pk=None):
+        # Files of this project with near-duplicates in other projects (MinHash-LSH, see duplicates.py);
+        # for lecturers and advisors reviewing academic integrity
+        project = get_object_or_404(Project.objects.only('id'), pk=pk)
+        return Response({'project_id': project.pk, 'files': duplicates.project_report(project.pk)})
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        # Precomputed nearest neighbours (see similarity.py): one indexed lookup plus the rows to render,
+        # whatever the catalog size. Rendered as cards unless ?fields=/?expand= ask for something else.
+        project = self.get_object() # 404 for an unknown project
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            params = {'fields': 'card'}
+        plan = fast_serializers.parse_field_selection(params)
+        scores = dict(similarity.neighbours(project.pk))
+        rows = fast_serializers.project_rows(list(scores), plan) # Skips neighbours deleted since the last refresh
+        data = fast_serializers.render_projects(rows, self.get_serializer_context(), plan)
+        return Response([{'score': round(scores[project['id']], 4), 'project': project} for project in data])
+
+    @action(detail=True, methods=['get'], content_negotiation_class=exports.ExportContentNegotiation)
+    def download(self, request, pk=None):
+        # The whole project as a zip, built and streamed entry by entry (see zipstream.py)
+        validators = conditional.query_validators('zip', pk)
+        if validators is None:
+            raise Http404
+        if conditional.not_modified(request, validators):
+            return conditional.set_validators(HttpResponseNotModified(), validators)
+        project = get_object_or_404(Project.objects.only('id', 'title'), pk=pk)
+        storage = ProjectFile._meta.get_field('file').storage
+        response = StreamingHttpResponse(
+            zipstream.iter_zip(storage, zipstream.project_entries(project)), content_type='application/zip'
+        )
+        response['Content-Disposition'] = content_disposition_header(True, f'{zipstream.archive_root(project)}.zip')
+        response['X-Accel-Buffering'] = 'no'
+        return conditional.set_validators(response, validators)
+
+    @action(detail=True, methods=['get'], url_path=r'files/(?P<file_id>\d+)/processing')
+    def file_processing(self, request, pk=None, file_id=None):
+        # Background processing status of one file, with its job history (latest first)
+        project_file = get_object_or_404(ProjectFile.objects.only('id', 'processing_status'), pk=file_id, project_id=pk)
+        job_list = project_file.processing_jobs.order_by('-created_at')[:5]
+        return Response({
+            'id': project_file.id,
+            'processing_status': project_file.processing_status,
+            'jobs': FileProcessingJobSerializer(job_list, many=True).data,
+        })
+
+    @action(detail=True, methods=['get'], url_path=r'files/(?P<file_id>\d+)/preview/(?P<kind>code|text|thumbnail)')
+    def file_preview(self, request, pk=None, file_id=None, kind=None):
+        # Serves a pre-rendered preview artifact. Artifacts are keyed by content hash and never
+        # change, so they can be cached by browsers and proxies for a year.
+        sha256 = get_object_or_404(ProjectFile.objects.values_list('sha256', flat=True), pk=file_id, project_id=pk)
+        artifact = get_object_or_404(PreviewArtifact, sha256=sha256, kind=kind)
+        etag = f'"{sha256}-{kind}"'
+        if serving.etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(artifact.file.open('rb'), content_type=artifact.content_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    @action(detail=True, methods=['get'], url_path=r'files/(?P<file_id>\d+)/download')
+    def file_download(self, request, pk=None, file_id=None):
+        # Range/conditional-aware download; the byte transfer is handed to nginx/Apache when configured
+        project_file = get_object_or_404(
+            ProjectFile.objects.only('id', 'project_id', 'file', 'sha256', 'original_filename', 'uploaded_at'),
+            pk=file_id, project_id=pk,
+        )
+        as_attachment = request.query_params.get('download', '').lower() in ('1', 'true')
+        return serving.serve_project_file(request, project_file, as_attachment=as_attachment)
 
     # TODO: Add a custom permission class (e.g., IsOwnerOrCollaborator) for update/destroy/upload actions
     # def get_permissions(self):
@@ -95,6 +435,17 @@ class ProjectViewSet(viewsets.ModelViewSet):
     #          self.permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     #     return super().get_permissions()
 
+class IsLecturerOrAdvisor(permissions.BasePermission):
+    """
+    Allows lecturers, advisors and staff (e.g. for academic integrity reviews).
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (
+            user.is_staff or user.role in (User.Role.LECTURER, User.Role.ADVISOR, User.Role.ADMIN)
+        ))
+
+
 class IsProjectOwnerPermission(permissions.BasePermission):
     """
     Custom permission to only allow owners of a project to edit or delete it.
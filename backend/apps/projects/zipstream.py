@@ -0,0 +1,105 @@
+# backend/apps/projects/zipstream.py
+# Whole-project download as a zip built while it is sent.
+# ZipFile writes into a sink that isn't seekable, so every entry is emitted as local header + data +
+# data descriptor and handed to the response as soon as it's written: no temp file, and memory is bounded
+# by one read chunk whatever the project size. Files are read through the storage API (storage.open),
+# so local disk and remote storages such as S3 work the same way.
+import logging
+import os
+import posixpath
+import zipfile
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import archives
+from .models import ProjectFile
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+# Formats that are compressed already: deflating them again costs CPU and saves nothing
+STORED_EXTENSIONS = frozenset([
+    '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.dwg',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar',
+    '.docx', '.xlsx', '.pptx', '.odt', '.epub', '.mp3', '.mp4', '.mov',
+])
+
+
+class _Sink:
+    # Write-only file object for ZipFile; without tell()/seek() ZipFile writes data descriptors
+    # instead of going back to patch sizes and CRCs into the local headers
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def compress_type(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def archive_root(project):
+    return slugify(project.title) or f'project-{project.pk}'
+
+
+def project_entries(project):
+    """
+    (name in the archive, storage name, size or None, uploaded_at) per file, from a single query.
+    Names keep the uploaded directory structure under a folder named after the project; clashes get a suffix.
+    """
+    root = archive_root(project)
+    seen = set()
+    rows = (
+        ProjectFile.objects.filter(project_id=project.pk).exclude(file='')
+        .order_by('original_filename', 'id')
+        .values_list('file', 'original_filename', 'blob__size', 'uploaded_at')
+    )
+    for stored_name, original_filename, size, uploaded_at in rows:
+        path = archives.clean_path(original_filename or '') or posixpath.basename(stored_name)
+        base, ext = posixpath.splitext(path)
+        name, copy = path, 1
+        while name.lower() in seen:
+            copy += 1
+            name = f'{base} ({copy}){ext}'
+        seen.add(name.lower())
+        yield f'{root}/{name}', stored_name, size, uploaded_at
+
+
+def iter_zip(storage, entries):
+    """
+    Yields the bytes of a zip archive of `entries` (from project_entries), file by file.
+    Files that can't be opened are logged and left out; headers can't report errors once streaming started.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for name, stored_name, size, uploaded_at in entries:
+            try:
+                source = storage.open(stored_name, 'rb')
+                if size is None:
+                    size = storage.size(stored_name) # Legacy files without a blob row
+            except (OSError, ValueError) as e:
+                logger.warning("Leaving %s out of the project zip: %s", stored_name, e)
+                continue
+            info = zipfile.ZipInfo(name, date_time=max(timezone.localtime(uploaded_at).timetuple()[:6], (1980, 1, 1, 0, 0, 0)))
+            info.compress_type = compress_type(name)
+            info.file_size = size # Lets ZipFile pick ZIP64 records up front for files over 4 GiB
+            with source, archive.open(info, 'w') as dest:
+                while True:
+                    data = source.read(READ_SIZE)
+                    if not data:
+                        break
+                    dest.write(data)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain() # Central directory
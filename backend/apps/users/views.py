@@ -2,6 +2,7 @@
 from rest_framework import generics, permissions, status,filters
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
+from codenest_core.renderers import API_PARSER_CLASSES, API_RENDERER_CLASSES
 from .serializers import RegisterSerializer, UserSerializer
 from .models import User
 
@@ -9,6 +10,8 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,) # Allow anyone to register
     serializer_class = RegisterSerializer
+    renderer_classes = API_RENDERER_CLASSES
+    parser_classes = API_PARSER_CLASSES
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -30,6 +33,7 @@ class RegisterView(generics.CreateAPIView):
 class CurrentUserView(generics.RetrieveAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = UserSerializer
+    renderer_classes = API_RENDERER_CLASSES
 
     def get_object(self):
         return self.request.user
@@ -40,4 +44,5 @@ class UserListView(generics.ListAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated] # Only authenticated users can search others
     filter_backends = [filters.SearchFilter]
-    search_fields = ['email', 'first_name', 'last_name']
\ No newline at end of file
+    search_fields = ['email', 'first_name', 'last_name']
+    renderer_classes = API_RENDERER_CLASSES
\ No newline at end of file
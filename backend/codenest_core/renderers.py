@@ -0,0 +1,83 @@
+# backend/codenest_core/renderers.py
+# Renderers/parsers shared by the API views: a fast JSON codec (orjson when installed, DRF's json
+# otherwise) and MessagePack, selected through regular DRF content negotiation:
+#   Accept: application/msgpack  (or ?format=msgpack)  ->  MessagePack response
+#   Content-Type: application/msgpack                  ->  MessagePack request body
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, FormParser, JSONParser, MultiPartParser
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+import msgpack
+
+try:
+    import orjson
+except ImportError: # Falls back to DRF's json-based codec
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Types orjson/msgpack don't know natively (Decimal, lazy translations, querysets, ...),
+    # converted the same way DRF's JSONEncoder does
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    application/json via orjson. Output matches DRF's compact JSON for API data (UTF-8, no whitespace);
+    indented output (?indent / Accept: ...; indent=N) and missing orjson fall back to JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) \
+                or not api_settings.UNICODE_JSON or not api_settings.COMPACT_JSON:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Datetimes go through _default too, so they are formatted exactly like JSONRenderer's
+        ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        # Same as JSONRenderer: U+2028/U+2029 are valid JSON but break JavaScript string literals
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+
+
+class LegacyMessagePackParser(MessagePackParser):
+    media_type = 'application/x-msgpack' # Name used by older clients
+
+
+# Set as renderer_classes/parser_classes on API views; JSON stays first, so it remains the default
+API_RENDERER_CLASSES = [FastJSONRenderer, MessagePackRenderer, renderers.BrowsableAPIRenderer]
+API_PARSER_CLASSES = [FastJSONParser, MessagePackParser, LegacyMessagePackParser, FormParser, MultiPartParser]
@@ -15,7 +15,8 @@ const ChatWindow: React.FC = observer(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
-  useEffect(scrollToBottom, [chatStore.messages]); // Scroll on new messages
+  const lastMessageText = chatStore.messages[chatStore.messages.length - 1]?.text;
+  useEffect(scrollToBottom, [chatStore.messages.length, lastMessageText]); // Scroll on new messages and streamed text
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
@@ -68,7 +69,7 @@ const ChatWindow: React.FC = observer(() => {
             <ChatMessageItem key={msg.id} message={msg} />
           ))}
         </AnimatePresence>
-        {chatStore.isLoadingReply && (
+        {chatStore.isLoadingReply && !chatStore.isStreamingReply && ( // Until the first streamed text arrives
           <motion.div layout className="flex justify-start items-end mb-3">
              <CpuChipIcon className="w-7 h-7 text-blue-500 dark:text-blue-400 mr-2 flex-shrink-0" />
              <div className="max-w-[70%] p-3 rounded-xl bg-gray-200 dark:bg-gray-700 text-gray-800 dark:text-gray-200 rounded-bl-none">
@@ -1,5 +1,5 @@
 // frontend/src/components/project/FilePreviewer.tsx
-import React, { useState } from 'react'; // Added useState for potential iframe loading state
+import React, { useEffect, useState } from 'react'; // Added useState for potential iframe loading state
 import type { ProjectFile, FileType as ProjectFileTypeEnum } from '../../types/project';
 import { DocumentTextIcon, PhotoIcon, CodeBracketIcon, CubeTransparentIcon } from '@heroicons/react/24/outline'; // Added more icons
 import { cn } from '../../lib/utils'; // For conditional classes
@@ -43,8 +43,28 @@ const isGoogleViewerSupported = (filename: string): boolean => {
 };
 
 
+// Fetches a small text/HTML preview artifact; the browser caches it (immutable), so repeat views are free
+const usePreviewText = (url?: string) => {
+  const [content, setContent] = useState<string | null>(null);
+  useEffect(() => {
+    if (!url) return;
+    let cancelled = false;
+    fetch(url)
+      .then((response) => (response.ok ? response.text() : null))
+      .then((text) => { if (!cancelled) setContent(text); })
+      .catch(() => { if (!cancelled) setContent(null); });
+    return () => { cancelled = true; };
+  }, [url]);
+  return content;
+};
+
 const FilePreviewer: React.FC<FilePreviewerProps> = ({ file }) => {
   const [iframeLoading, setIframeLoading] = useState(true); // For iframe loading state
+  const [showFullDocument, setShowFullDocument] = useState(false); // Full viewer loads the whole file; opt-in
+  const [thumbnailFailed, setThumbnailFailed] = useState(false);
+  const previews = file.previews || {};
+  const codePreview = usePreviewText(file.file_type === 'CODE' ? previews.code : undefined);
+  const textPreview = usePreviewText(file.file_type === 'PDF' ? previews.text : undefined);
   // const [useExternalViewer, setUseExternalViewer] = useState<'google' | 'microsoft' | 'none'>('none');
 
   const encodedFileUrl = encodeURIComponent(file.file_url || '');
@@ -68,11 +88,13 @@ const FilePreviewer: React.FC<FilePreviewerProps> = ({ file }) => {
       return <p className="text-sm text-gray-500">File URL not available.</p>;
     }
 
-    // Native browser preview for images (usually best)
+    // Native browser preview for images, using the downscaled thumbnail when one was rendered
     if (file.file_type === 'IMAGE') {
       return (
         <img
-          src={file.file_url}
+          src={previews.thumbnail && !thumbnailFailed ? previews.thumbnail : file.file_url}
+          onError={() => setThumbnailFailed(true)}
+          loading="lazy"
           alt={file.original_filename}
           className="my-2 max-w-full h-auto rounded-md shadow-md"
           style={{ maxHeight: '500px' }} // Limit image height
@@ -80,6 +102,35 @@ const FilePreviewer: React.FC<FilePreviewerProps> = ({ file }) => {
       );
     }
 
+    // PDFs show the pre-rendered first page; the full viewer (which downloads the whole file) is opt-in
+    if (file.file_type === 'PDF' && !showFullDocument && (previews.thumbnail || textPreview)) {
+      return (
+        <div className="my-2 flex flex-col md:flex-row gap-4">
+          {previews.thumbnail && !thumbnailFailed && (
+            <img
+              src={previews.thumbnail}
+              alt={`First page of ${file.original_filename}`}
+              onError={() => setThumbnailFailed(true)}
+              loading="lazy"
+              className="max-w-[240px] h-auto rounded-md shadow-md"
+            />
+          )}
+          <div className="min-w-0">
+            {textPreview && (
+              <p className="text-sm text-gray-600 dark:text-gray-300 whitespace-pre-line line-clamp-[12]">{textPreview}</p>
+            )}
+            <button
+              type="button"
+              onClick={() => setShowFullDocument(true)}
+              className="mt-2 text-sm text-blue-600 dark:text-blue-400 hover:underline"
+            >
+              Open full document
+            </button>
+          </div>
+        </div>
+      );
+    }
+
     // Use external viewers for supported document types
     if (viewerToUse === 'microsoft') {
       return (
@@ -132,7 +183,15 @@ const FilePreviewer: React.FC<FilePreviewerProps> = ({ file }) => {
       case 'CODE':
         return (
           <div className="my-2">
-            <p className="text-sm text-gray-500 mb-1">Code file. Enhanced preview coming soon.</p>
+            {codePreview ? (
+              // Highlighted server-side from the first lines of the file; the markup is escaped by the backend
+              <div
+                className="mb-2 max-h-[500px] overflow-auto rounded-md text-sm"
+                dangerouslySetInnerHTML={{ __html: codePreview }}
+              />
+            ) : (
+              <p className="text-sm text-gray-500 mb-1">Code file. Preview is being prepared.</p>
+            )}
             <a
               href={file.file_url}
               download={file.original_filename}
@@ -1,13 +1,13 @@
 // frontend/src/components/project/ProjectCard.tsx
 import React from 'react';
 import { Link } from 'react-router-dom';
-import type { Project } from '../../types/project';
+import type { Project, ProjectSummary } from '../../types/project';
 import { motion } from 'framer-motion';
 import { cn } from '../../lib/utils';
 import { AcademicCapIcon, CodeBracketIcon, DocumentTextIcon } from '@heroicons/react/24/outline'; // Example icons
 
 interface ProjectCardProps {
-  project: Project;
+  project: ProjectSummary;
 }
 
 const getProjectIcon = (type: Project['type']) => {
@@ -50,9 +50,9 @@ const ProjectCard: React.FC<ProjectCardProps> = ({ project }) => {
           <span>{project.department || 'N/A'} {project.year && `(${project.year})`}</span>
         </div>
         {/* Optionally show number of files or other summary info */}
-        {project.files && project.files.length > 0 && (
+        {!!project.file_count && (
             <p className="mt-2 text-xs text-gray-400 dark:text-gray-600">
-                {project.files.length} file(s)
+                {project.file_count} file(s)
             </p>
         )}
       </motion.div>
@@ -1,11 +1,17 @@
 // frontend/src/services/chatService.ts
 import apiClient from './apiClient';
+import { authStore } from '../stores';
 import type { ChatHistoryEntry } from '../types/chat';
 
 interface BotResponse {
   reply: string;
 }
 
+interface ChatStreamEvent {
+  event: string;
+  data: any;
+}
+
 const sendMessageToBot = async (message: string, history: ChatHistoryEntry[]): Promise<string> => {
   try {
     const response = await apiClient.post<BotResponse>('/ai/chat/gemini/', { message, history });
@@ -17,6 +23,89 @@ const sendMessageToBot = async (message: string, history: ChatHistoryEntry[]): P
   }
 };
 
+// Parses one Server-Sent Events frame ("event: ...\ndata: ..."); comment-only frames give null
+const parseStreamEvent = (frame: string): ChatStreamEvent | null => {
+  let event = 'message';
+  const dataLines: string[] = [];
+  for (const line of frame.split('\n')) {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trimStart());
+    }
+  }
+  return dataLines.length ? { event, data: JSON.parse(dataLines.join('\n')) } : null;
+};
+
+// Streams the reply as Server-Sent Events: onDelta gets each piece of text as it arrives
+// (the backend never splits a @@LINK[...](...)@@ marker across pieces). Resolves with the full reply.
+// Uses fetch because axios can't hand out a response body while it is still arriving.
+// Set VITE_CHAT_ASYNC=true when the backend is served under ASGI to use the async chat endpoint, which
+// answers "busy" (429/503) when its concurrency caps are reached. Under WSGI that endpoint's stream
+// would only be sent once the reply is complete, so the sync endpoint is used by default.
+const CHAT_STREAM_PATH = import.meta.env.VITE_CHAT_ASYNC === 'true' ? '/ai/chat/gemini/async/' : '/ai/chat/gemini/';
+
+const streamMessageToBot = async (
+  message: string,
+  history: ChatHistoryEntry[],
+  onDelta: (text: string) => void,
+  signal?: AbortSignal,
+): Promise<string> => {
+  const token = authStore.tokens?.access;
+  const response = await fetch(`${apiClient.defaults.baseURL}${CHAT_STREAM_PATH}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify({ message, history }),
+    signal,
+  });
+  // fetch bypasses apiClient's interceptors, so errors such as an expired token (401) may arrive as plain JSON.
+  // Errors the chat views report themselves (bad request, 429/503 "busy") are an event stream with an error
+  // frame even when the status isn't 2xx, so those are read below like any other stream
+  const isEventStream = (response.headers.get('content-type') ?? '').startsWith('text/event-stream');
+  if (!isEventStream || !response.body) {
+    const body = await response.json().catch(() => null);
+    throw new Error(
+      body?.error || body?.detail || `The AI assistant is unavailable (HTTP ${response.status}).`,
+    );
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  let reply: string | null = null;
+  for (;;) {
+    const { done, value } = await reader.read();
+    // Network chunks can end mid-frame or mid-character: keep the rest for the next read
+    buffered += decoder.decode(value, { stream: !done }).replace(/\r\n/g, '\n');
+    let boundary: number;
+    while ((boundary = buffered.indexOf('\n\n')) !== -1) {
+      const frame = parseStreamEvent(buffered.slice(0, boundary));
+      buffered = buffered.slice(boundary + 2);
+      if (!frame) continue;
+      if (frame.event === 'delta') {
+        onDelta(frame.data.text);
+      } else if (frame.event === 'done') {
+        reply = frame.data.reply;
+      } else if (frame.event === 'error') {
+        throw new Error(frame.data.error || `The AI assistant is unavailable (HTTP ${response.status}).`);
+      }
+    }
+    if (done) break;
+  }
+  if (!response.ok) {
+    throw new Error(`The AI assistant is unavailable (HTTP ${response.status}).`);
+  }
+  if (reply === null) {
+    throw new Error("The connection to the AI assistant was interrupted.");
+  }
+  return reply;
+};
+
 export const chatService = {
   sendMessageToBot,
-};
\ No newline at end of file
+  streamMessageToBot,
+};
@@ -1,6 +1,6 @@
 // frontend/src/services/projectService.ts
 import apiClient from './apiClient';
-import type { Project, ProjectCreateData, ProjectFile,ProjectUpdateData } from '../types/project';
+import type { Project, ProjectCreateData, ProjectFile, ProjectSummary, ProjectUpdateData } from '../types/project';
  // Assuming User type is defined here
 
 // Example function to fetch projects (for future list page)
@@ -8,12 +8,17 @@ import type { Project, ProjectCreateData, ProjectFile,ProjectUpdateData } from '
 //     const response = await apiClient.get<Project[]>('/projects/'); // Check URL
 //     return response.data;
 // };
-const fetchProjects = async (): Promise<Project[]> => { // Add pagination params later
-  // Assuming your backend list endpoint is /api/projects/
-  const response = await apiClient.get<Project[]>('/projects/');
-  // If backend uses DRF pagination, response.data might be an object like { count, next, previous, results }
-  // For now, assuming it returns an array directly. Adapt if paginated.
-  // return response.data.results if paginated, and handle response.data.count etc.
+// The list endpoint is cursor-paginated: { next, previous, results }
+export interface ProjectPage {
+  next: string | null;
+  previous: string | null;
+  results: ProjectSummary[];
+}
+
+const fetchProjects = async (cursorUrl?: string | null): Promise<ProjectPage> => {
+  // Pass the `next`/`previous` URL from a previous page to move through the catalog.
+  // Catalog pages only need card fields; the cursor URLs keep the ?fields= param.
+  const response = await apiClient.get<ProjectPage>(cursorUrl || '/projects/?fields=card');
   return response.data;
 };
 // Example function to fetch a single project (for future detail page)
@@ -36,11 +41,61 @@ const createProject = async (data: ProjectCreateData): Promise<Project> => {
 // Callback type for upload progress
 type UploadProgressCallback = (percentage: number) => void;
 
+// Files above this size go through the resumable chunked upload protocol
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_SIZE = 4 * 1024 * 1024;
+const MAX_CHUNK_RETRIES = 3;
+
+interface UploadSession {
+  id: string;
+  filename: string;
+  total_size: number;
+  received_bytes: number;
+  status: 'ACTIVE' | 'COMPLETE' | 'ABORTED';
+}
+
+const uploadFileChunked = async (
+    projectId: number,
+    file: File,
+    onProgress?: UploadProgressCallback
+): Promise<ProjectFile> => {
+    const { data: session } = await apiClient.post<UploadSession>(`/projects/${projectId}/uploads/`, {
+        filename: file.name,
+        size: file.size,
+    });
+    const sessionUrl = `/projects/${projectId}/uploads/${session.id}/`;
+    let offset = session.received_bytes;
+    let retries = 0;
+
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + CHUNK_SIZE);
+        try {
+            const { data } = await apiClient.put<UploadSession>(sessionUrl, chunk, {
+                headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+            });
+            offset = data.received_bytes;
+            retries = 0;
+        } catch (error) {
+            if (++retries > MAX_CHUNK_RETRIES) throw error;
+            // Resume from whatever the server actually kept
+            const { data } = await apiClient.get<UploadSession>(sessionUrl);
+            offset = data.received_bytes;
+        }
+        if (onProgress) onProgress(Math.round((offset * 100) / file.size));
+    }
+
+    const response = await apiClient.post<ProjectFile>(`${sessionUrl}finalize/`);
+    return response.data;
+};
+
 const uploadFile = async (
     projectId: number,
     file: File,
     onProgress?: UploadProgressCallback // Optional progress callback
 ): Promise<ProjectFile> => {
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+        return uploadFileChunked(projectId, file, onProgress);
+    }
     const formData = new FormData();
     formData.append('file', file); // 'file' should match the name expected by the backend parser/view
 
@@ -35,6 +35,20 @@ class ChatStore {
     // Optionally save to localStorage
   };
 
+  // True once the reply being generated has started to arrive
+  get isStreamingReply() {
+    return this.messages.some(msg => msg.isLoading);
+  }
+
+  appendToBotMessage = (id: string, delta: string) => {
+    const message = this.messages.find(msg => msg.id === id);
+    if (message) {
+      message.text += delta;
+    } else {
+      this.addMessage({ id, text: delta, sender: 'bot', timestamp: new Date(), isLoading: true });
+    }
+  };
+
   sendMessage = async (text: string) => {
     if (!text.trim()) return;
 
@@ -60,21 +74,31 @@ class ChatStore {
         .filter((_, index, arr) => index < arr.length -1);
 
 
+    // The reply is streamed: the bot message appears with the first piece of text and grows from there
+    const botMessageId = uuidv4();
     try {
-      const botReplyText = await chatService.sendMessageToBot(text, historyToSend);
-      const botMessage: ChatMessage = {
-        id: uuidv4(),
-        text: botReplyText,
-        sender: 'bot',
-        timestamp: new Date(),
-      };
+      const botReplyText = await chatService.streamMessageToBot(text, historyToSend, (delta) => {
+        runInAction(() => {
+          this.appendToBotMessage(botMessageId, delta);
+        });
+      });
       runInAction(() => {
-        this.addMessage(botMessage);
+        const botMessage = this.messages.find(msg => msg.id === botMessageId);
+        if (botMessage) {
+          botMessage.text = botReplyText;
+          botMessage.isLoading = false;
+        } else {
+          this.addMessage({ id: botMessageId, text: botReplyText, sender: 'bot', timestamp: new Date() });
+        }
       });
     } catch (err: any) {
       console.error("Chat error:", err);
       const errorMessage = err.response?.data?.error || err.message || "Sorry, I couldn't get a response.";
       runInAction(() => {
+        const partialMessage = this.messages.find(msg => msg.id === botMessageId);
+        if (partialMessage) {
+          partialMessage.isLoading = false; // Keep what arrived before the failure
+        }
         this.error = errorMessage;
         this.addMessage({ // Add an error message to the chat UI
             id: uuidv4(),
@@ -1,10 +1,10 @@
 // frontend/src/stores/ProjectStore.ts
 import { makeAutoObservable, runInAction } from 'mobx';
-import type { Project, ProjectCreateData,ProjectUpdateData } from '../types/project'; // Import your types
+import type { Project, ProjectCreateData, ProjectSummary, ProjectUpdateData } from '../types/project'; // Import your types
 import { projectService } from '../services/projectService'; // We'll create this next
 
 class ProjectStore {
-  projects: Project[] = [];
+  projects: ProjectSummary[] = []; // Card representation of the catalog pages
   currentProject: Project | null = null;
   isLoadingProjects: boolean = false;
   isLoadingProject: boolean = false;
@@ -13,6 +13,7 @@ class ProjectStore {
   uploadProgress: number = 0; // 0-100
   projectError: string | null = null;
   isUpdatingProject: boolean = false; // New state for update operation
+  nextProjectsUrl: string | null = null; // Cursor URL of the next catalog page
 
   constructor() {
     makeAutoObservable(this, {}, { autoBind: true });
@@ -23,13 +24,11 @@ class ProjectStore {
     this.isLoadingProjects = true;
     this.projectError = null;
     try {
-      const fetchedProjects = await projectService.fetchProjects(); // Update service
+      const page = await projectService.fetchProjects();
       runInAction(() => {
-        this.projects = fetchedProjects;
+        this.projects = page.results;
+        this.nextProjectsUrl = page.next; // Cursor for "load more"
         this.isLoadingProjects = false;
-        // Set pagination data here if implementing
-        // this.totalProjects = response.count;
-        // this.currentPage = response.currentPage; // Assuming API returns this
       });
     } catch (error: any) {
       console.error("Fetch projects error:", error.response?.data || error.message);
@@ -40,6 +39,25 @@ class ProjectStore {
     }
   }
 
+  async fetchMoreProjects() {
+    if (!this.nextProjectsUrl || this.isLoadingProjects) return;
+    this.isLoadingProjects = true;
+    try {
+      const page = await projectService.fetchProjects(this.nextProjectsUrl);
+      runInAction(() => {
+        this.projects = [...this.projects, ...page.results];
+        this.nextProjectsUrl = page.next;
+        this.isLoadingProjects = false;
+      });
+    } catch (error: any) {
+      console.error("Fetch more projects error:", error.response?.data || error.message);
+      runInAction(() => {
+        this.projectError = error.response?.data?.detail || 'Failed to load more projects.';
+        this.isLoadingProjects = false;
+      });
+    }
+  }
+
   async fetchProject(id: number) {
     this.isLoadingProject = true;
     this.projectError = null; // Clear previous errors
@@ -11,8 +11,17 @@ export interface ProjectFile {
   file_url: string; // URL to access the file
   file_type: FileType;
   original_filename: string;
+  sha256: string; // Hex SHA-256 of the file contents
   extracted_metadata: any; // Adjust type if metadata structure is known
+  processing_status: 'PENDING' | 'RUNNING' | 'DONE' | 'FAILED';
   uploaded_at: string; // ISO string
+  previews: FilePreviews; // Pre-rendered preview artifact URLs, empty until processing is done
+}
+
+export interface FilePreviews {
+  code?: string; // Syntax-highlighted HTML of the first lines
+  text?: string; // Plain text of the first page (PDF)
+  thumbnail?: string; // Downscaled image / first-page render
 }
 
 export interface Project {
@@ -29,6 +38,11 @@ export interface Project {
   files: ProjectFile[]; // Array of nested files
 }
 
+// Compact catalog representation returned for `?fields=card`: no collaborators or nested files
+export type ProjectSummary = Pick<Project, 'id' | 'owner' | 'title' | 'description' | 'type' | 'department' | 'year'> & {
+  file_count?: number;
+};
+
 // Type for data sent when creating a project (doesn't include files)
 export interface ProjectCreateData {
   title: string;